@@ -0,0 +1,144 @@
+# animation.py - 精灵动画：动画状态机与共享帧缓存
+# 每一帧画面以 (精灵, 朝向, 帧号) 为键从 FrameCache 中取出图集的 subsurface，所有画面共用一份缓存。
+# 动画进度按仿真帧号 state.tick 计算，与显示帧率无关；暂停、回放和联机观战时画面与仿真保持一致。
+# 守卫、炸弹和爆炸火焰的动画状态完全由仿真数据推出 (朝向、速度、放置帧号、开始帧号)，
+# 不必为上百个守卫各建一个对象；只有玩家停下后要保持最后的朝向，由 PlayerAnimation 记住。
+# 渲染器按图层收集 (帧, 位置) 列表，每层只调用一次 Surface.blits (见 renderer.draw_sprites)。
+
+from build_assets import DIRECTIONS
+from config import (
+    BOMB_FUSE_TICKS, EXPLOSION_TICKS, PLAYER_FRAME_TICKS, PLAYER_IDLE_TICKS, GUARD_FRAME_TICKS,
+    BOMB_FRAME_TICKS, BOMB_HURRY_TICKS,
+)
+from visibility import FACING_DOWN, facing_of
+
+GUARD_VARIANTS = ("guard1", "guard2", "guard3") # 守卫的三种外观，按编号轮流使用
+
+# 玩家动画状态
+IDLE = 0 # 站立：行走精灵表的第 0 帧
+WALK = 1 # 行走：从第 1 帧开始循环
+
+
+class FrameCache:
+    """
+    (精灵, 朝向, 帧号) -> Surface，加载图集时一次建好。朝向为 build_assets.DIRECTIONS 中的名称，
+    没有朝向的精灵 (及别名) 为 None。查询时帧号循环取模；精灵没有该朝向时使用不带朝向的同名精灵，
+    仍然没有时返回 None (绘图时使用备用颜色)。
+    """
+
+    def __init__(self, animations=None):
+        self.frames = {}
+        self.counts = {} # (精灵, 朝向) -> 帧数
+        self.tables = {}
+        self.reset(animations or {})
+
+    def reset(self, animations):
+        """按 精灵名 -> 帧列表 (renderer.ANIMATIONS) 重建缓存。"""
+        self.frames.clear()
+        self.counts.clear()
+        self.tables.clear()
+        for name, surfaces in animations.items():
+            sprite, _, direction = name.rpartition("_")
+            if direction not in DIRECTIONS:
+                sprite, direction = name, None
+            for index, surface in enumerate(surfaces):
+                self.frames[(sprite, direction, index)] = surface
+            self.counts[(sprite, direction)] = len(surfaces)
+
+    def frame_count(self, sprite, direction=None):
+        count = self.counts.get((sprite, direction))
+        if not count and direction is not None:
+            count = self.counts.get((sprite, None))
+        return count or 0
+
+    def get(self, sprite, direction, frame):
+        count = self.counts.get((sprite, direction))
+        if not count:
+            direction = None
+            count = self.counts.get((sprite, None))
+            if not count:
+                return None
+        return self.frames[(sprite, direction, frame % count)]
+
+    def table(self, name, length, frame_at):
+        """
+        按经过的帧数 (0 .. length) 直接索引的图片列表，第一次使用时由 frame_at(self, 经过的帧数) 生成。
+        只取决于经过帧数的动画 (炸弹、爆炸火焰) 每个实体只需一次列表索引。
+        """
+        table = self.tables.get(name)
+        if table is None:
+            table = self.tables[name] = [frame_at(self, elapsed) for elapsed in range(length + 1)]
+        return table
+
+
+class PlayerAnimation:
+    """
+    玩家的动画状态机。有移动输入时进入行走状态 (WALK)，朝向随移动方向改变，行走帧从进入该状态的那一帧起计数；
+    连续 PLAYER_IDLE_TICKS 帧没有移动后回到站立状态 (IDLE)，保持最后的朝向。
+    """
+
+    def __init__(self):
+        self.mode = IDLE
+        self.facing = FACING_DOWN
+        self.walk_start = 0
+        self.last_move_tick = 0
+
+    def update(self, state):
+        tick = state.tick
+        speed_x, speed_y = state.player_current_speed_x, state.player_current_speed_y
+        facing = facing_of((speed_x > 0) - (speed_x < 0), (speed_y > 0) - (speed_y < 0))
+        if facing is not None:
+            self.facing = facing
+            if self.mode == IDLE:
+                self.mode = WALK
+                self.walk_start = tick
+            self.last_move_tick = tick
+        elif self.mode == WALK and tick - self.last_move_tick >= PLAYER_IDLE_TICKS:
+            self.mode = IDLE
+
+    def frame(self, frames, state):
+        index = 0 if self.mode == IDLE else 1 + (state.tick - self.walk_start) // PLAYER_FRAME_TICKS
+        return frames.get('player', DIRECTIONS[self.facing], index)
+
+
+def guard_frame(frames, state, i):
+    """第 i 个守卫本帧的图片：外观按编号轮流，朝向即视野朝向，移动时播放行走帧 (各守卫错开相位)。"""
+    guards = state.guards
+    index = 0
+    if guards.speed_x[i] or guards.speed_y[i]:
+        index = (state.tick + i * 5) // GUARD_FRAME_TICKS
+    return frames.get(GUARD_VARIANTS[i % len(GUARD_VARIANTS)], DIRECTIONS[guards.facing[i]], index)
+
+
+def _bomb_frame_at(frames, elapsed):
+    """炸弹的引信动画：循环播放，最后 BOMB_HURRY_TICKS 帧加快一倍。"""
+    period = BOMB_FRAME_TICKS if BOMB_FUSE_TICKS - elapsed > BOMB_HURRY_TICKS else max(1, BOMB_FRAME_TICKS // 2)
+    return frames.get('bomb', None, elapsed // period)
+
+
+def _explosion_frame_at(frames, elapsed):
+    """爆炸火焰在 EXPLOSION_TICKS 帧内依次播放每一帧 (由大到小逐渐熄灭)，不循环。"""
+    count = frames.frame_count('explosion')
+    return frames.get('explosion', None, min(count - 1, elapsed * count // EXPLOSION_TICKS)) if count else None
+
+
+def bomb_frames(frames):
+    """放置后经过 0 .. BOMB_FUSE_TICKS 帧时炸弹的图片。"""
+    return frames.table('bomb', BOMB_FUSE_TICKS, _bomb_frame_at)
+
+
+def explosion_frames(frames):
+    """开始后经过 0 .. EXPLOSION_TICKS 帧时爆炸火焰的图片。"""
+    return frames.table('explosion', EXPLOSION_TICKS, _explosion_frame_at)
+
+
+class SpriteAnimator:
+    """一个画面的动画状态 (目前只有玩家的状态机)；frames 为共享的 FrameCache。"""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.player = PlayerAnimation()
+
+    def update(self, state):
+        """每次绘制前调用一次。"""
+        self.player.update(state)
@@ -0,0 +1,214 @@
+# audio.py - 背景音乐与音效管理
+# 背景音乐：播放列表只在启动时检查一次，缺失的文件直接剔除；下一首曲目由后台线程
+# 整个读入内存，读好后用 pygame.mixer.music.queue 排在当前曲目之后，由 SDL 无缝衔接，
+# 主循环中不再有任何文件读取。
+# 音效：启动时预先解码成 pygame.mixer.Sound，并保留一组专用声道轮流播放，
+# 游戏过程中播放音效只是一次内存中的混音操作。
+
+import io
+import os
+import random
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from config import SFX_CHANNELS, SFX_VOLUME
+
+# 音效文件 (可选)；文件不存在时使用程序合成的音效
+SFX_FILES = {
+    'fuse': "music/fuse.wav",
+    'explosion': "music/explosion.wav",
+}
+
+MUSIC_END = pygame.USEREVENT + 1 # 一首曲目播放结束 (排队的下一首随即开始)
+
+
+def validate_playlist(paths):
+    """返回 paths 中真实存在的文件，并对缺失的文件各提示一次。"""
+    playlist = []
+    for path in paths:
+        if os.path.isfile(path):
+            playlist.append(path)
+        else:
+            print(f"错误: 找不到音乐文件 '{path}'，已从播放列表中移除。")
+    return playlist
+
+
+def _read_file(path):
+    """在后台线程中把整首曲目读入内存。"""
+    with open(path, "rb") as f:
+        return io.BytesIO(f.read())
+
+
+def synthesize_sfx(name, rng=None):
+    """
+    合成一个简单的音效 (带衰减的噪声)，按当前混音器的采样率和声道数生成 16 位样本。
+    Returns:
+        pygame.mixer.Sound | None: 混音器不是 16 位格式时返回 None。
+    """
+    frequency, size, channels = pygame.mixer.get_init()
+    if size != -16:
+        return None
+    rng = rng or random.Random(name)
+    if name == 'explosion':
+        duration, amplitude, smoothing = 0.6, 20000, 0.85 # 低沉的爆炸声
+    else:
+        duration, amplitude, smoothing = 0.15, 6000, 0.0  # 短促的引信嘶嘶声
+    count = int(frequency * duration)
+    samples = array('h')
+    value = 0.0
+    for i in range(count):
+        envelope = (1 - i / count) ** 2
+        value = smoothing * value + (1 - smoothing) * rng.uniform(-1, 1) # 一阶低通，越平滑越低沉
+        sample = int(amplitude * envelope * value)
+        samples.extend([sample] * channels)
+    return pygame.mixer.Sound(buffer=samples.tobytes())
+
+
+class AudioManager:
+    """
+    背景音乐播放器与音效声道池。
+    混音器未初始化 (例如没有音频设备) 时所有方法都什么也不做。
+    主循环每帧调用 update()，并把 MUSIC_END 事件交给 handle_event()。
+    """
+
+    def __init__(self, bgm_files, sfx_files=SFX_FILES, channels=SFX_CHANNELS, rng=None):
+        self.enabled = pygame.mixer.get_init() is not None
+        self.rng = rng or random.Random()
+        self.playlist = validate_playlist(bgm_files) if self.enabled else []
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio")
+        self.pending = None      # 正在后台读取的下一首曲目 (Future)
+        self.current_data = None # 正在播放与已排队的曲目数据，播放期间需要保持引用
+        self.queued_data = None
+        self.last_track = None
+        self.playing = False
+
+        self.sounds = {}
+        self.channels = []
+        self.next_channel = 0
+        if self.enabled:
+            self._load_sfx(sfx_files)
+            # 保留前 channels 个声道专门播放音效，避免被其他 Sound.play 抢占
+            if pygame.mixer.get_num_channels() < channels:
+                pygame.mixer.set_num_channels(channels)
+            pygame.mixer.set_reserved(channels)
+            self.channels = [pygame.mixer.Channel(i) for i in range(channels)]
+            pygame.mixer.music.set_endevent(MUSIC_END)
+
+    def _load_sfx(self, sfx_files):
+        """预先解码所有音效。"""
+        for name, path in sfx_files.items():
+            sound = None
+            if os.path.isfile(path):
+                try:
+                    sound = pygame.mixer.Sound(path)
+                except pygame.error as e:
+                    print(f"错误: 无法加载音效 '{path}'，改用合成音效。错误信息: {e}")
+            if sound is None:
+                sound = synthesize_sfx(name)
+            if sound is not None:
+                sound.set_volume(SFX_VOLUME)
+                self.sounds[name] = sound
+
+    # --- 背景音乐 ---
+
+    def _pick_track(self):
+        """随机选择下一首曲目，播放列表多于一首时不连续重复。"""
+        choices = [path for path in self.playlist if path != self.last_track] or self.playlist
+        self.last_track = self.rng.choice(choices)
+        return self.last_track
+
+    def _prefetch(self):
+        """在后台线程中开始读取下一首曲目。"""
+        if self.playlist and self.pending is None and self.queued_data is None:
+            self.pending = self.executor.submit(_read_file, self._pick_track())
+
+    def start(self):
+        """开始播放背景音乐 (第一首曲目也在后台读取，读好后由 update 开始播放)。"""
+        if not self.enabled or not self.playlist:
+            return
+        self.playing = True
+        self._prefetch()
+
+    def stop(self):
+        """停止背景音乐 (正在后台读取的曲目留给下次 start 使用)。"""
+        if not self.enabled:
+            return
+        self.playing = False
+        pygame.mixer.music.stop() # 同时丢弃已排队的曲目
+        pygame.mixer.music.unload()
+        pygame.event.clear(MUSIC_END) # stop 本身也会触发一次结束事件
+        self.current_data = None
+        self.queued_data = None
+
+    def update(self):
+        """
+        每帧调用：后台读取完成后，开始播放或排在当前曲目之后。只做内存操作，不会阻塞。
+        """
+        if not self.playing or self.pending is None or not self.pending.done():
+            return
+        future, self.pending = self.pending, None
+        try:
+            data = future.result()
+        except OSError as e:
+            print(f"错误: 无法读取音乐文件 '{self.last_track}'。错误信息: {e}")
+            self.playlist.remove(self.last_track)
+            self._prefetch()
+            return
+        try:
+            if pygame.mixer.music.get_busy():
+                pygame.mixer.music.queue(data, namehint=self.last_track)
+                self.queued_data = data
+            else:
+                pygame.mixer.music.load(data, namehint=self.last_track)
+                pygame.mixer.music.play()
+                self.current_data = data
+                self._prefetch()
+        except pygame.error as e:
+            print(f"错误: 无法播放音乐文件 '{self.last_track}'. "
+                  f"请检查文件格式是否受支持。错误信息: {e}")
+            self.playlist.remove(self.last_track)
+            self._prefetch()
+
+    def handle_event(self, event):
+        """处理 MUSIC_END：排队的曲目已经开始播放，接着预读下一首。"""
+        if event.type != MUSIC_END or not self.playing:
+            return
+        self.current_data, self.queued_data = self.queued_data, None
+        self._prefetch()
+
+    # --- 音效 ---
+
+    def play_sfx(self, name):
+        """
+        在音效声道池中播放一个预先解码的音效。所有声道都在播放时，抢占最早使用的声道。
+        """
+        sound = self.sounds.get(name)
+        if sound is None or not self.channels:
+            return
+        channels = self.channels
+        for offset in range(len(channels)):
+            channel = channels[(self.next_channel + offset) % len(channels)]
+            if not channel.get_busy():
+                break
+        else:
+            channel = channels[self.next_channel]
+        channel.play(sound)
+        self.next_channel = (channels.index(channel) + 1) % len(channels)
+
+    def play_events(self, events):
+        """
+        播放仿真事件对应的音效 (事件由 simulation 记录在 state.events 中)，并清空事件队列。
+        """
+        while events:
+            kind = events.popleft()[0]
+            if kind == "bomb_placed":
+                self.play_sfx('fuse')
+            elif kind == "explosion":
+                self.play_sfx('explosion')
+
+    def close(self):
+        """停止音乐并结束后台线程。"""
+        self.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
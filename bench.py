@@ -0,0 +1,565 @@
+# bench.py - 热点路径的基准测试
+# 在无窗口环境 (SDL dummy 视频驱动) 下测量地图生成、碰撞检测、玩家移动、爆炸与炸弹结算、
+# 瓦片层绘制以及无窗口仿真的速度。每项测量多轮，取每次操作耗时的中位数与历史记录中的基准比较，
+# 变慢超过阈值的项目列为性能回退 (此时退出码为 1，可用于持续集成)。
+#
+# 用法示例：
+#   python bench.py                      # 运行全部基准，与最近一次保存的结果比较
+#   python bench.py --save               # 运行并把结果追加到历史记录，作为以后比较的基准
+#   python bench.py --filter explode --quick
+#   python bench.py --list               # 列出历史记录
+# 历史记录 (BENCH_HISTORY) 每行一次运行，记录提交、Python 版本和机器名；
+# 不同机器上的数字不可比，默认只和同一台机器上最近的记录比较。
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import fnmatch
+import gc
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+import pygame
+
+import hud
+import renderer
+import simulation
+from config import TILE_SIZE, WIDTH, HEIGHT, FIXED_DT, PLAYER_MAX_HP
+from maze import generate_maze, place_game_elements, guard_count_for
+from simulation import PlayerInput, new_game_state, place_bomb, explode, update_bombs, step
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BENCH_HISTORY = os.path.join(HERE, "bench_history.jsonl")
+
+DEFAULT_THRESHOLD = 0.10 # 中位数比基准慢 10% 以上视为回退
+MIN_ROUND_TIME = 0.01    # 无需准备的测量每轮至少运行多少秒 (自动决定每轮调用次数)
+MAX_BENCH_TIME = 2.0     # 单个基准最多花费的秒数 (至少跑 MIN_ROUNDS 轮)
+MIN_ROUNDS = 3
+ROUNDS = 15
+QUICK_ROUNDS = 5
+
+DENSE_WALLS = {"wall_density": 0.35, "box_density": 0.10}
+
+# 一个基准：run(prepared) 为被测代码；setup 不为 None 时每轮先调用 setup() 得到 prepared (不计时)，
+# 否则 prepared 为 None 且每轮连续调用 run 多次。ops 为一次 run 完成的操作数，结果按每次操作的耗时报告；
+# 有 setup 的 run 也可以返回实际完成的操作数 (例如对局提前结束时实际仿真的帧数)。
+Case = namedtuple("Case", ["run", "setup", "ops"], defaults=(None, 1))
+
+BENCHMARKS = [] # (名称, 产生 Case 的无参函数)
+
+
+def benchmark(name, params=(None,)):
+    """注册一个基准函数：对每个参数 param 调用 func(param) 得到一个 Case。"""
+    def register(func):
+        for param in params:
+            full_name = name if param is None else f"{name}[{param}]"
+            BENCHMARKS.append((full_name, lambda func=func, param=param: func(param)))
+        return func
+    return register
+
+
+# --- 地图生成 ---
+
+@benchmark("generate_maze", ["scatter-41x41", "scatter-200x200", "scatter-500x500",
+                             "backtracker-201x201", "kruskal-201x201", "cellular-200x200"])
+def bench_generate_maze(param):
+    algorithm, size = param.split("-")
+    cols, rows = map(int, size.split("x"))
+    rng = random.Random(1)
+    return Case(lambda _: generate_maze(rows, cols, rng, algorithm))
+
+
+@benchmark("place_game_elements", ["41x41", "200x200", "500x500"])
+def bench_place_game_elements(param):
+    cols, rows = map(int, param.split("x"))
+    guard_count = guard_count_for(cols, rows)
+
+    def setup():
+        rng = random.Random(2)
+        while True:
+            maze = generate_maze(rows, cols, rng)
+            if place_game_elements(maze.copy(), random.Random(3), guard_count) is not None:
+                return maze, random.Random(3)
+
+    def run(prepared):
+        place_game_elements(prepared[0], prepared[1], guard_count)
+
+    return Case(run, setup)
+
+
+# --- 碰撞与移动 ---
+
+def dense_state(cols=200, rows=200, seed=4):
+    """墙壁密集的地图上的游戏状态。"""
+    return new_game_state(rows, cols, seed, "scatter", maze_options=DENSE_WALLS)
+
+
+def random_rects(state, count=1000, seed=5):
+    limit_x = (state.cols - 1) * TILE_SIZE
+    limit_y = (state.rows - 1) * TILE_SIZE
+    rng = random.Random(seed)
+    return [pygame.Rect(rng.randrange(limit_x), rng.randrange(limit_y), TILE_SIZE, TILE_SIZE)
+            for _ in range(count)]
+
+
+@benchmark("collision_mask", ["blocked", "sweep-1tile", "sweep-8tiles"])
+def bench_collision_mask(mode):
+    """阻挡位掩码：矩形重叠查询，以及每次移动 1 格或 8 格距离的扫掠。"""
+    state = dense_state()
+    boxes = [rect.topleft for rect in random_rects(state)]
+    collision = state.collision
+    if mode == "blocked":
+        def run(_):
+            for x, y in boxes:
+                collision.blocked(x, y, TILE_SIZE, TILE_SIZE)
+    else:
+        distance = TILE_SIZE * (1 if mode == "sweep-1tile" else 8)
+        def run(_):
+            for x, y in boxes:
+                collision.sweep_x(x, y, TILE_SIZE, TILE_SIZE, distance)
+                collision.sweep_y(x, y, TILE_SIZE, TILE_SIZE, -distance)
+
+    return Case(run, ops=len(boxes))
+
+
+@benchmark("move_player_smooth", ["dense-1000ticks"])
+def bench_move_player(param):
+    state = dense_state()
+    start = list(state.player_pixel_pos)
+    rng = random.Random(6)
+    directions = [rng.choice(((1, 0), (-1, 0), (0, 1), (0, -1))) for _ in range(1000 // 25)]
+    speed = simulation.PLAYER_SPEED
+
+    def setup():
+        state.player_pixel_pos[:] = start
+        return state
+
+    def run(state):
+        move = simulation.move_player_smooth
+        for dx, dy in directions: # 每个方向走 25 帧，常常顶着墙触发贴边滑动
+            state.player_current_speed_x = dx * speed
+            state.player_current_speed_y = dy * speed
+            for _ in range(25):
+                move(state, FIXED_DT)
+
+    return Case(run, setup, ops=len(directions) * 25)
+
+
+# --- 爆炸与炸弹结算 ---
+
+def floor_tiles(state, count, seed):
+    """随机挑选 count 个通路瓦片。"""
+    cells = state.maze.cells
+    cols = state.cols
+    tiles = [(i % cols, i // cols) for i, tile in enumerate(cells) if tile == 0]
+    return random.Random(seed).sample(tiles, count)
+
+
+@benchmark("explode", [1, 10, 100, 1000])
+def bench_explode(bombs):
+    state = new_game_state(100, 100, 7, "scatter")
+    positions = floor_tiles(state, bombs, 8)
+
+    def run(_):
+        for x, y in positions:
+            explode(state, x, y)
+
+    return Case(run, ops=bombs)
+
+
+@benchmark("update_bombs", [1, 10, 100, 1000])
+def bench_update_bombs(bombs):
+    """同一帧内引爆 bombs 颗炸弹：连锁引爆、炸开障碍物 (通知所有地图监听器) 并结算伤害。"""
+    def setup():
+        state = new_game_state(100, 100, 9, "scatter")
+        for x, y in floor_tiles(state, bombs, 10):
+            place_bomb(state, x, y, 'player')
+        state.tick = state.timers.next_tick()
+        state.spatial.rebuild(state.player_pixel_pos, state.guards)
+        return state
+
+    return Case(update_bombs, setup, ops=bombs)
+
+
+@benchmark("blast_timeline", [10, 100, 1000])
+def bench_blast_timeline(bombs):
+    """每帧放置一颗炸弹 (登记到爆炸时间表，含连锁引爆帧号的传递) 并查询一个瓦片。按每颗炸弹报告。"""
+    def setup():
+        state = new_game_state(100, 100, 9, "scatter")
+        return state, floor_tiles(state, bombs, 10)
+
+    def run(prepared):
+        state, positions = prepared
+        timeline = state.blast_timeline
+        for x, y in positions:
+            state.tick += 1
+            place_bomb(state, x, y, 'player')
+            timeline.ticks_until(x, y, state.tick)
+
+    return Case(run, setup, ops=bombs)
+
+
+# --- 守卫 ---
+
+GUARD_AI_TICKS = 300
+
+
+@benchmark("guard_ai", ["200x200-200guards"])
+def bench_guard_ai(param):
+    """
+    所有守卫的决策与移动 (move_guard_smooth，含守卫炸弹的结算)，玩家不动。按每个守卫每帧报告。
+    """
+    def setup():
+        return new_game_state(200, 200, 14, "scatter", guard_count=200)
+
+    def run(state):
+        move = simulation.move_guard_smooth
+        for _ in range(GUARD_AI_TICKS):
+            state.spatial.rebuild(state.player_pixel_pos, state.guards)
+            update_bombs(state)
+            move(state, FIXED_DT)
+            state.tick += 1
+            state.time += FIXED_DT
+        return GUARD_AI_TICKS * len(state.guards)
+
+    return Case(run, setup)
+
+
+# --- 绘制 ---
+
+def render_fixture(cols=200, rows=200, seed=11):
+    """地图中央的游戏状态、屏幕 Surface 与视口。"""
+    if not renderer.GAME_IMAGES:
+        pygame.display.init()
+        pygame.display.set_mode((WIDTH, HEIGHT))
+        renderer.load_images(os.path.join(HERE, renderer.ATLAS_IMAGE), os.path.join(HERE, renderer.ATLAS_MANIFEST))
+    state = new_game_state(rows, cols, seed, "scatter")
+    screen = pygame.display.get_surface()
+    view_rect = pygame.Rect(cols * TILE_SIZE // 2, rows * TILE_SIZE // 2, WIDTH, HEIGHT)
+    return state, screen, view_rect
+
+
+@benchmark("draw_maze", ["full", "cached", "cold-chunks"])
+def bench_draw_maze(mode):
+    """
+    full：逐个瓦片绘制整个视口 (draw_maze)；cached：从已缓存的区块复制视口；
+    cold-chunks：区块缓存为空时第一次绘制视口 (摄像机移到新区域)。
+    """
+    state, screen, view_rect = render_fixture()
+    offset = view_rect.topleft
+    if mode == "full":
+        return Case(lambda _: renderer.draw_maze(screen, state, offset))
+    if mode == "cached":
+        layer = renderer.MazeLayer(state)
+        layer.blit_region(screen, view_rect, offset)
+        return Case(lambda _: layer.blit_region(screen, view_rect, offset))
+    return Case(lambda layer: layer.blit_region(screen, view_rect, offset),
+                lambda: renderer.MazeLayer(state))
+
+
+@benchmark("dirty_rect_frame", ["200x200"])
+def bench_dirty_rect_frame(param):
+    """摄像机不动时 DirtyRectRenderer 绘制一帧 (瓦片层擦除 + 精灵重绘)。"""
+    state, screen, _ = render_fixture()
+    frame_renderer = renderer.DirtyRectRenderer(screen, state)
+    frame_renderer.draw()
+    return Case(lambda _: frame_renderer.draw())
+
+
+@benchmark("draw_sprites", ["busy"])
+def bench_draw_sprites(param):
+    """视口内有 40 个守卫、30 颗炸弹和 100 格爆炸火焰时绘制所有精灵与血量条 (不含瓦片层)。"""
+    state, screen, view_rect = render_fixture()
+    left, top = view_rect.left // TILE_SIZE, view_rect.top // TILE_SIZE
+    width, height = view_rect.width // TILE_SIZE, view_rect.height // TILE_SIZE
+    rng = random.Random(15)
+    tiles = rng.sample([(left + x, top + y) for y in range(height) for x in range(width)], 170)
+    guards = state.guards
+    for x, y in tiles[:40]:
+        i = guards.add((x, y), [(x, y)])
+        guards.facing[i] = i % 4
+    for x, y in tiles[40:70]:
+        state.bombs[(x, y)] = (x, y, -rng.randrange(100), 'player')
+    for x, y in tiles[70:]:
+        state.explosions[(x, y)] = -rng.randrange(60)
+    offset = view_rect.topleft
+    frame_hud = hud.Hud(screen.get_width())
+    frame_hud.update(state)
+    return Case(lambda _: renderer.draw_sprites(screen, state, offset, hud=frame_hud))
+
+
+@benchmark("hud", ["cached", "rebuild"])
+def bench_hud(mode):
+    """
+    cached：数值不变时检查并绘制 HUD (每帧的情况)；rebuild：血量每帧变化，重新合成后绘制。
+    """
+    state, screen, _ = render_fixture()
+    frame_hud = hud.Hud(screen.get_width())
+    frame_hud.update(state)
+    if mode == "cached":
+        def run(_):
+            frame_hud.update(state)
+            frame_hud.draw(screen)
+        return Case(run)
+
+    def run(_):
+        state.player_hp = state.player_hp % PLAYER_MAX_HP + 1
+        frame_hud.update(state)
+        frame_hud.draw(screen)
+    return Case(run)
+
+
+# --- 端到端 ---
+
+# 地图尺寸 -> 种子：选用玩家随机走动 600 帧也不会被发现的地图
+HEADLESS_SEEDS = {"20x10": 18, "200x200": 13, "500x500": 13}
+
+
+@benchmark("headless_ticks", list(HEADLESS_SEEDS))
+def bench_headless_ticks(param):
+    """无窗口仿真最多 600 帧 (10 秒游戏时间)，玩家随机走动，守卫巡逻、追击并放置炸弹。按每帧报告。"""
+    cols, rows = map(int, param.split("x"))
+    rng = random.Random(12)
+    inputs = [PlayerInput(*rng.choice(((1, 0), (-1, 0), (0, 1), (0, -1), (0, 0))), False)
+              for _ in range(600)]
+
+    def setup():
+        return new_game_state(rows, cols, HEADLESS_SEEDS[param], "scatter")
+
+    def run(state):
+        for player_input in inputs:
+            step(state, player_input, FIXED_DT)
+            if state.result is not None:
+                break
+        return state.tick
+
+    return Case(run, setup, ops=len(inputs))
+
+
+# --- 测量 ---
+
+def measure(case, rounds, max_time=MAX_BENCH_TIME):
+    """
+    Returns:
+        list[float]: 每轮中一次操作的耗时 (秒)。
+    """
+    run, setup = case.run, case.setup
+    timer = time.perf_counter
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    deadline = timer() + max_time
+    try:
+        if setup is None:
+            # 先决定每轮调用次数，使一轮至少持续 MIN_ROUND_TIME
+            number = 1
+            while True:
+                start = timer()
+                for _ in range(number):
+                    run(None)
+                elapsed = timer() - start
+                if elapsed >= MIN_ROUND_TIME:
+                    break
+                number *= 2 if elapsed == 0 else max(2, min(10, int(MIN_ROUND_TIME / elapsed) + 1))
+            while len(samples) < rounds and (len(samples) < MIN_ROUNDS or timer() < deadline):
+                gc.disable()
+                start = timer()
+                for _ in range(number):
+                    run(None)
+                elapsed = timer() - start
+                if gc_was_enabled:
+                    gc.enable()
+                samples.append(elapsed / (number * case.ops))
+        else:
+            while len(samples) < rounds and (len(samples) < MIN_ROUNDS or timer() < deadline):
+                prepared = setup()
+                gc.disable()
+                start = timer()
+                ops = run(prepared)
+                elapsed = timer() - start
+                if gc_was_enabled:
+                    gc.enable()
+                samples.append(elapsed / (ops or case.ops))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return samples
+
+
+def run_benchmarks(patterns, rounds):
+    """
+    运行名称包含 patterns 中任意一项 (可使用 fnmatch 通配符，空表示全部) 的基准。
+    Returns:
+        dict: {名称: {"median", "min", "stdev", "rounds", "ops"}}，均为每次操作的耗时 (秒)。
+    """
+    results = {}
+    for name, make_case in BENCHMARKS:
+        if patterns and not any(fnmatch.fnmatch(name, f"*{pattern}*") for pattern in patterns):
+            continue
+        print(f"  {name} ...", end="\r", flush=True)
+        case = make_case()
+        samples = measure(case, rounds)
+        results[name] = {
+            "median": statistics.median(samples),
+            "min": min(samples),
+            "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            "rounds": len(samples),
+            "ops": case.ops,
+        }
+        print(" " * (len(name) + 6), end="\r")
+    return results
+
+
+# --- 历史记录与回退报告 ---
+
+def git_commit():
+    """当前的提交 (短哈希)，工作区有未提交的修改时加上 "+dirty"；不在 git 仓库中时为 None。"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=HERE,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("+dirty" if dirty else "")
+
+
+def load_history(path=BENCH_HISTORY):
+    """读取历史记录 (每行一个 JSON 对象)，文件不存在时为空列表。"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def append_history(record, path=BENCH_HISTORY):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def make_record(results):
+    return {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.node(),
+        "results": results,
+    }
+
+
+def pick_baseline(history, against=None, machine=None):
+    """
+    选出用于比较的历史记录：against 为历史记录的序号 (可为负数) 或提交哈希前缀；
+    为 None 时取同一台机器上最近的一条。
+    """
+    if against is not None:
+        try:
+            return history[int(against)]
+        except ValueError:
+            matches = [record for record in history if (record.get("commit") or "").startswith(against)]
+            if not matches:
+                raise ValueError(f"历史记录中没有提交 '{against}'") from None
+            return matches[-1]
+        except IndexError:
+            raise ValueError(f"历史记录只有 {len(history)} 条") from None
+    for record in reversed(history):
+        if machine is None or record.get("machine") == machine:
+            return record
+    return None
+
+
+def format_time(seconds):
+    """把秒数格式化为合适的单位。"""
+    if seconds >= 1:
+        return f"{seconds:.3f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.2f} us"
+
+
+def report(results, baseline, threshold):
+    """
+    打印结果表 (每次操作的耗时)，与基准 baseline 比较中位数。
+    Returns:
+        list[str]: 变慢超过 threshold 的基准名称。
+    """
+    previous = baseline["results"] if baseline else {}
+    if baseline:
+        print(f"基准: {baseline['time']} 提交 {baseline.get('commit')} (Python {baseline.get('python')})")
+    width = max([len(name) for name in results] + [4])
+    print(f"{'名称':<{width - 2}}  {'中位数':>9}  {'最小值':>9}  {'每秒操作数':>9}  {'基准':>10}  变化")
+    regressions = []
+    for name, result in results.items():
+        median = result["median"]
+        ops_per_second = 1 / median if median else float("inf")
+        line = f"{name:<{width}}  {format_time(median):>12}  {format_time(result['min']):>12}  {ops_per_second:>14,.0f}"
+        old = previous.get(name)
+        if old is not None:
+            change = median / old["median"] - 1
+            mark = ""
+            if change > threshold:
+                mark = "  <-- 回退"
+                regressions.append(name)
+            elif change < -threshold:
+                mark = "  (变快)"
+            line += f"  {format_time(old['median']):>12}  {change:+7.1%}{mark}"
+        print(line)
+    return regressions
+
+
+def list_history(history):
+    for index, record in enumerate(history):
+        print(f"{index:>3}  {record['time']}  {record.get('commit')}  {record.get('machine')}  "
+              f"Python {record.get('python')}  {len(record['results'])} 项")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="热点路径的基准测试 (与历史基准比较，报告性能回退)")
+    parser.add_argument("--filter", action="append", default=[], metavar="PATTERN",
+                        help="只运行名称包含 PATTERN 的基准 (可多次指定，支持通配符)")
+    parser.add_argument("--quick", action="store_true", help=f"每项只测 {QUICK_ROUNDS} 轮")
+    parser.add_argument("--save", action="store_true", help="把本次结果追加到历史记录")
+    parser.add_argument("--against", default=None,
+                        help="与哪条历史记录比较：序号 (可为负数) 或提交哈希前缀，默认为本机最近一条")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="中位数变慢超过该比例视为回退 (默认 0.10)")
+    parser.add_argument("--history", default=BENCH_HISTORY, help="历史记录文件")
+    parser.add_argument("--list", action="store_true", help="列出历史记录后退出")
+    args = parser.parse_args(argv)
+
+    history = load_history(args.history)
+    if args.list:
+        list_history(history)
+        return 0
+    try:
+        baseline = pick_baseline(history, args.against, platform.node())
+    except ValueError as e:
+        parser.error(str(e))
+
+    rounds = QUICK_ROUNDS if args.quick else ROUNDS
+    results = run_benchmarks(args.filter, rounds)
+    if not results:
+        parser.error("没有名称匹配的基准")
+    regressions = report(results, baseline, args.threshold)
+
+    if args.save:
+        append_history(make_record(results), args.history)
+        print(f"结果已追加到 {args.history}")
+    if regressions:
+        print(f"{len(regressions)} 项变慢超过 {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# botmatch.py - 多进程机器人对战批量运行器
+# 用小偷机器人 (bots.ThiefBot) 对阵现有的守卫逻辑，在无窗口环境下批量进行对局，
+# 每局的结果 (胜负、结束原因、用时、使用的炸弹数等) 一出来就写入 CSV 文件的一行。
+# 对局分发到进程池的所有核心上，每局互不依赖，因此参数扫描的速度随核心数线性增长。
+#
+# 用法示例：
+#   python botmatch.py --matches 1000
+#   python botmatch.py --matches 500 --set GUARD_SPEED=0.8,1.0,1.2 --set box_density=0.05,0.1 --out sweep.csv
+# 每组参数组合使用同一批种子 (--seed 起)，不同组合之间比较的是同一批地图上的表现。
+
+import argparse
+import csv
+import inspect
+import itertools
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import guards
+import simulation
+from bots import ThiefBot
+from config import ROWS, COLS, MAZE_ALGORITHM, FIXED_DT, TICK_RATE
+from mazegen import ALGORITHMS
+from simulation import new_game_state, step
+
+# 可扫描的仿真常量 -> 以模块全局变量形式引用它的模块 (在工作进程中直接改写)
+SIM_PARAMS = {
+    "GUARD_SPEED": (simulation,),
+    "GUARD_BOMB_COOLDOWN": (simulation, guards),
+    "EXPLOSION_RANGE": (simulation,),
+    "GUARD_SIGHT_RANGE": (simulation,),
+    "GUARD_SIGHT_SPREAD": (simulation,),
+}
+SIM_DEFAULTS = {name: getattr(simulation, name) for name in SIM_PARAMS}
+
+# 可扫描的地图生成参数 (作为 maze_options 传给生成算法，可用的参数取决于算法)
+MAZE_PARAMS = ("wall_density", "box_density", "loop_density", "fill_ratio")
+
+RESULT_FIELDS = [
+    "match", "seed", "result", "reason", "ticks", "duration", "bombs_used",
+    "treasures", "player_hp", "guards_stunned", "guards", "wall_ms",
+]
+
+DEFAULT_MAX_TIME = 120 # 单局最长仿真时间 (秒)，超时记为 "timeout"
+
+
+def apply_params(params):
+    """
+    在当前进程中设置仿真常量 (params 中没有的恢复为默认值)，返回地图生成参数。
+    工作进程会连续执行不同参数组合的对局，因此每局开始前都重新设置全部常量。
+    """
+    for name, modules in SIM_PARAMS.items():
+        value = params.get(name, SIM_DEFAULTS[name])
+        for module in modules:
+            setattr(module, name, value)
+    return {name: value for name, value in params.items() if name in MAZE_PARAMS}
+
+
+def play_match(task):
+    """
+    在工作进程中进行一局机器人对战。
+    Args:
+        task (tuple): (对局编号, 种子, 参数 dict, 行数, 列数, 生成算法, 最大帧数)。
+    Returns:
+        dict: CSV 中的一行 (参数列在 RESULT_FIELDS 之后)。
+    """
+    match_id, seed, params, rows, cols, algorithm, max_ticks = task
+    start_time = time.perf_counter()
+    maze_options = apply_params(params)
+    state = new_game_state(rows, cols, seed, algorithm, maze_options=maze_options)
+    bot = ThiefBot(state, random.Random(seed))
+    bombs_used = 0
+    events = state.events
+    while state.result is None and state.tick < max_ticks:
+        step(state, bot.act(state), FIXED_DT)
+        while events:
+            event = events.popleft()
+            if event[0] == "bomb_placed" and event[3] == 'player':
+                bombs_used += 1
+
+    row = {
+        "match": match_id,
+        "seed": seed,
+        "result": state.result or "timeout",
+        "reason": state.end_reason or "timeout",
+        "ticks": state.tick,
+        "duration": round(state.tick / TICK_RATE, 3),
+        "bombs_used": bombs_used,
+        "treasures": state.got_treasures,
+        "player_hp": state.player_hp,
+        "guards_stunned": len(state.guards) - len(state.guards.active()),
+        "guards": len(state.guards),
+        "wall_ms": round((time.perf_counter() - start_time) * 1000, 2),
+    }
+    row.update(params)
+    return row
+
+
+def parse_value(text):
+    """把命令行中的参数值解析为 int 或 float。"""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_sweep(settings, algorithm):
+    """
+    把若干个 "NAME=v1,v2,..." 解析为 {参数名: [取值, ...]}，并检查参数是否可扫描。
+    """
+    accepted = inspect.signature(ALGORITHMS[algorithm]).parameters
+    sweep = {}
+    for setting in settings:
+        name, _, values = setting.partition("=")
+        name = name.strip()
+        if name in MAZE_PARAMS:
+            if name not in accepted:
+                raise ValueError(f"生成算法 '{algorithm}' 不支持参数 '{name}'")
+        elif name not in SIM_PARAMS:
+            raise ValueError(f"未知参数 '{name}'，可选: {', '.join(list(SIM_PARAMS) + list(MAZE_PARAMS))}")
+        if not values:
+            raise ValueError(f"参数 '{name}' 没有给出取值")
+        sweep[name] = [parse_value(value) for value in values.split(",")]
+    return sweep
+
+
+def make_tasks(sweep, matches, base_seed, rows, cols, algorithm, max_ticks):
+    """按参数组合依次产生对局任务 (惰性生成，任务数量很大时也不占内存)。"""
+    names = list(sweep)
+    match_id = 0
+    for values in itertools.product(*(sweep[name] for name in names)):
+        params = dict(zip(names, values))
+        for index in range(matches):
+            yield match_id, base_seed + index, params, rows, cols, algorithm, max_ticks
+            match_id += 1
+
+
+def run_matches(tasks, out_path, param_names, workers=None, total=None):
+    """
+    在进程池中执行所有对局，每收到一局结果就写入 CSV。
+    Returns:
+        dict: {结束原因: 局数}。
+    """
+    reasons = {}
+    fields = RESULT_FIELDS + param_names
+    start_time = time.perf_counter()
+    with open(out_path, "w", newline="", encoding="utf-8") as f, \
+            multiprocessing.Pool(workers) as pool:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        done = 0
+        for row in pool.imap_unordered(play_match, tasks, chunksize=4):
+            writer.writerow(row)
+            reasons[row["reason"]] = reasons.get(row["reason"], 0) + 1
+            done += 1
+            if done % 100 == 0:
+                f.flush()
+                elapsed = time.perf_counter() - start_time
+                progress = f"{done}/{total}" if total else str(done)
+                print(f"已完成 {progress} 局，{done / elapsed:.1f} 局/秒")
+    return reasons
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多进程机器人对战批量运行器")
+    parser.add_argument("--matches", type=int, default=100, help="每组参数组合的对局数")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数 (默认为 CPU 核心数)")
+    parser.add_argument("--out", default="botmatch.csv", help="结果 CSV 文件")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--cols", type=int, default=COLS)
+    parser.add_argument("--algorithm", default=MAZE_ALGORITHM, choices=list(ALGORITHMS))
+    parser.add_argument("--seed", type=int, default=0, help="第一局的种子")
+    parser.add_argument("--max-time", type=float, default=DEFAULT_MAX_TIME, help="单局最长仿真时间 (秒)")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=V1,V2",
+                        help="扫描的参数及其取值，可多次指定 (取所有组合)")
+    args = parser.parse_args(argv)
+
+    try:
+        sweep = parse_sweep(args.set, args.algorithm)
+    except ValueError as e:
+        parser.error(str(e))
+    combinations = 1
+    for values in sweep.values():
+        combinations *= len(values)
+    total = combinations * args.matches
+    max_ticks = int(args.max_time * TICK_RATE)
+    tasks = make_tasks(sweep, args.matches, args.seed, args.rows, args.cols, args.algorithm, max_ticks)
+
+    workers = args.workers or os.cpu_count()
+    print(f"{combinations} 组参数 x {args.matches} 局 = {total} 局，{workers} 个进程，结果写入 {args.out}")
+    start_time = time.perf_counter()
+    reasons = run_matches(tasks, args.out, list(sweep), workers, total)
+    elapsed = time.perf_counter() - start_time
+    summary = "，".join(f"{reason} {count}" for reason, count in sorted(reasons.items()))
+    print(f"全部完成，用时 {elapsed:.1f} 秒 ({total / elapsed:.1f} 局/秒)。结束原因: {summary}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
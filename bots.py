@@ -0,0 +1,260 @@
+# bots.py - 脚本控制的玩家 (小偷机器人)
+# 机器人只通过 PlayerInput 操作玩家，和键盘输入走完全相同的仿真路径，
+# 因此可以代替人类玩家进行无窗口对战、参数扫描 (见 botmatch.py)。
+# 行为：用 A* 依次前往最近的宝藏，收集完毕后前往出口；路线被可炸开障碍物挡住时放置炸弹并躲开，
+# 不走进炸弹的爆炸范围和守卫的视线：路线前方被守卫看着时用 A* 绕开视野，绕不开就在视野外等守卫走开。
+# 基准胜率 (默认参数、默认 20x10 地图，python botmatch.py --matches 500)：逃脱 34%，被发现 60%，
+# 被炸死 4%，超时 2%。机器人并不完美 (走进死胡同后无处可躲、与守卫相邻时守卫转身)，
+# 参数扫描的结果应与这一基准对比，而不是与 100% 对比。
+
+import random
+from collections import deque
+
+import simulation
+from config import TILE_SIZE, TILE_TREASURE, TILE_EXIT, TILE_BOX
+from pathfinding import astar
+from simulation import PlayerInput, NO_INPUT
+from tilegrid import BLOCKED_TABLE
+from visibility import FACINGS, facing_of
+
+REPLAN_TICKS = 120 # 每隔多少帧重新规划一次路线 (地图被炸开后可能出现更短的路)
+STUCK_TICKS = 20   # 连续多少帧试图移动而位置没有变化视为被卡住
+WIGGLE_TICKS = 8   # 被卡住后随机移动的帧数
+
+
+class ThiefBot:
+    """
+    小偷机器人。每帧调用一次 act(state) 得到本帧的 PlayerInput。
+    rng 只用于被卡住时的随机移动，与仿真自身的随机数互不影响。
+    """
+
+    def __init__(self, state, rng=None):
+        self.rng = rng if rng is not None else random.Random()
+        cells = state.maze.cells
+        cols = state.cols
+        self.treasures = [(i % cols, i // cols) for i, tile in enumerate(cells) if tile == TILE_TREASURE]
+        exits = [(i % cols, i // cols) for i, tile in enumerate(cells) if tile == TILE_EXIT]
+        self.exit = exits[0] if exits else None
+        self.route = []
+        self.replan_tick = 0
+        self.last_pixel_pos = None
+        self.still_ticks = 0
+        self.wiggle = 0
+        self.wiggle_input = NO_INPUT
+        self.last_input = NO_INPUT
+        self.snapped = False
+        self.failed_detour = None # 上一次绕路失败时的 (位置, 危险区域)，两者都不变时不必重新搜索
+
+    # --- 路线规划 ---
+
+    def _goals(self, state):
+        """尚未收集的宝藏；全部收集后为出口。"""
+        maze = state.maze
+        self.treasures = [pos for pos in self.treasures if maze.get(pos[0], pos[1]) == TILE_TREASURE]
+        if self.treasures:
+            return self.treasures
+        return [self.exit] if self.exit is not None else []
+
+    def _plan(self, state, avoid=()):
+        """
+        规划到最近目标的 A* 路线。avoid 不为空时绕开其中的瓦片 (守卫视野与爆炸范围)，
+        绕不开时保留原来的路线。
+        Returns:
+            bool: 是否找到了路线。
+        """
+        here = tuple(state.player_tile_pos)
+        best = None
+        for goal in self._goals(state):
+            route = astar(state.maze, here, goal, avoid=avoid)
+            if route is not None and (best is None or len(route) < len(best)):
+                best = route
+        if best is None and avoid:
+            return False
+        self.route = best or []
+        self.replan_tick = state.tick + REPLAN_TICKS
+        return best is not None
+
+    # --- 危险区域 ---
+
+    def _danger(self, state):
+        """
+        正在燃烧的爆炸火焰，以及所有未爆炸弹将要炸到的瓦片 (查询与守卫共用的爆炸时间表，
+        不再每帧重新计算每颗炸弹的爆炸范围)。
+        """
+        danger = set(state.explosions)
+        danger.update(state.blast_timeline.blast_tick)
+        return danger
+
+    def _watched(self, state):
+        """
+        Returns:
+            tuple: (seen, near)。seen 为守卫当前 (及走进下一个瓦片后) 的视野；
+            near 为守卫在所在与正要走进的瓦片上朝任意方向能看到的瓦片：
+            守卫每走到一个瓦片都可能转向，这些瓦片随时可能进入视野。
+        """
+        guards = state.guards
+        sight = state.vision.sight
+        seen = set()
+        near = set()
+        for i in guards.active():
+            here = guards.tile_of(i)
+            seen.update(sight(here[0], here[1], guards.facing[i]))
+            origins = [here]
+            next_tile = guards.next_tiles[i]
+            if next_tile is not None:
+                origins.append(next_tile)
+                facing = facing_of(next_tile[0] - here[0], next_tile[1] - here[1])
+                seen.update(sight(next_tile[0], next_tile[1], guards.facing[i] if facing is None else facing))
+            for x, y in origins:
+                near.add((x, y))
+                for facing in range(len(FACINGS)):
+                    near.update(sight(x, y, facing))
+        return seen, near
+
+    def _escape_route(self, state, avoid, seen):
+        """
+        广度优先搜索离开 avoid 区域的最短路线：只走可通行且不在守卫视野 seen 内的瓦片。
+        """
+        cells = state.maze.cells
+        cols, rows = state.cols, state.rows
+        start = tuple(state.player_tile_pos)
+        came_from = {start: None}
+        queue = deque([start])
+        while queue:
+            pos = queue.popleft()
+            if pos not in avoid:
+                route = []
+                while pos != start:
+                    route.append(pos)
+                    pos = came_from[pos]
+                route.reverse()
+                return route
+            x, y = pos
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if 0 <= nx < cols and 0 <= ny < rows and (nx, ny) not in came_from \
+                        and (nx, ny) not in seen and not BLOCKED_TABLE[cells[ny * cols + nx]]:
+                    came_from[(nx, ny)] = pos
+                    queue.append((nx, ny))
+        return []
+
+    # --- 移动 ---
+
+    def _steer(self, state, target):
+        """
+        朝相邻瓦片 target 移动一帧的输入。玩家每次只能沿一个方向移动，
+        因此先在垂直于前进方向的轴上对齐到瓦片，再沿前进方向移动。
+        玩家每帧移动 PLAYER_SPEED 像素，左上角落在 [瓦片边界, 瓦片边界 + PLAYER_SPEED) 内即视为到达，
+        此时玩家的逻辑瓦片位置恰好是 target；剩余的几像素偏差由碰撞时的贴边归位消除。
+        Returns:
+            PlayerInput | None: 已经到达 target 时为 None。
+        """
+        speed = simulation.PLAYER_SPEED
+        offset_x = state.player_pixel_pos[0] - target[0] * TILE_SIZE
+        offset_y = state.player_pixel_pos[1] - target[1] * TILE_SIZE
+        aligned_x = 0 <= offset_x < speed
+        aligned_y = 0 <= offset_y < speed
+        if aligned_x and aligned_y:
+            return None
+        horizontal = target[0] != state.player_tile_pos[0]
+        if (horizontal and not aligned_y) or aligned_x:
+            return PlayerInput(0, -1 if offset_y > 0 else 1, False)
+        return PlayerInput(-1 if offset_x > 0 else 1, 0, False)
+
+    def _follow(self, route, state):
+        """沿 route 移动一帧，已经到达的瓦片从 route 中移除。"""
+        while route:
+            inputs = self._steer(state, route[0])
+            if inputs is not None:
+                return inputs
+            route.pop(0)
+        return NO_INPUT
+
+    def _entered_tile(self, state, inputs):
+        """
+        按 inputs 移动一帧后玩家所在的瓦片。玩家的瓦片位置由左上角像素决定，
+        对齐下一个路线瓦片时可能先经过一个不在路线上的瓦片，因此按像素位置推算而不是看路线。
+        """
+        speed = simulation.PLAYER_SPEED
+        return simulation.get_tile_at_pixel(state.player_pixel_pos[0] + inputs.dx * speed,
+                                            state.player_pixel_pos[1] + inputs.dy * speed)
+
+    def _snap(self, state, blocked_input):
+        """
+        沿 blocked_input 的方向被卡住 (通常是与瓦片错开了一两个像素) 时，朝垂直方向上的墙壁推一帧：
+        move_player_smooth 的贴墙归位会把玩家对齐到最近的瓦片。两侧都没有墙时返回 None。
+        """
+        speed = simulation.PLAYER_SPEED
+        pixel_x, pixel_y = state.player_pixel_pos
+        if blocked_input.dx:
+            candidates = ((0, -1), (0, 1))
+        else:
+            candidates = ((-1, 0), (1, 0))
+        for dx, dy in candidates:
+            if state.collision.blocked(pixel_x + dx * speed, pixel_y + dy * speed, TILE_SIZE, TILE_SIZE):
+                return PlayerInput(dx, dy, False)
+        return None
+
+    def act(self, state):
+        """决定本帧的输入。"""
+        pixel_pos = tuple(state.player_pixel_pos)
+        last = self.last_input
+        if pixel_pos == self.last_pixel_pos and (last.dx or last.dy): # 想移动却没有动
+            self.still_ticks += 1
+        else:
+            self.still_ticks = 0
+        self.last_pixel_pos = pixel_pos
+
+        inputs = None
+        if self.still_ticks and not self.snapped and self.wiggle == 0:
+            inputs = self._snap(state, last)
+        self.snapped = inputs is not None
+        if inputs is None:
+            inputs = self._decide(state)
+        self.last_input = inputs
+        return inputs
+
+    def _decide(self, state):
+        """不考虑被卡住时的对齐，按危险、路线和障碍物决定本帧的输入。"""
+        if self.wiggle > 0:
+            self.wiggle -= 1
+            return self.wiggle_input
+        if self.still_ticks >= STUCK_TICKS:
+            # 卡在墙角 (包括躲避时)：随机朝一个方向挪动几帧，再重新规划
+            self.still_ticks = 0
+            self.wiggle = WIGGLE_TICKS
+            self.wiggle_input = PlayerInput(*self.rng.choice(((1, 0), (-1, 0), (0, 1), (0, -1))), False)
+            self.route = []
+            return self.wiggle_input
+
+        here = tuple(state.player_tile_pos)
+        danger = self._danger(state)
+        seen, near = self._watched(state)
+        avoid = danger | seen | near
+        if here in avoid: # 躲开炸弹，或者守卫即将看到自己
+            inputs = self._follow(self._escape_route(state, avoid, seen), state)
+            entered = self._entered_tile(state, inputs)
+            return NO_INPUT if entered != here and entered in seen else inputs
+
+        if not self.route or state.tick >= self.replan_tick:
+            self._plan(state)
+        if not self.route:
+            return NO_INPUT
+
+        next_tile = self.route[0]
+        if state.maze.get(next_tile[0], next_tile[1]) == TILE_BOX:
+            if any(owner == 'player' for _, _, _, owner in state.bombs.values()):
+                return NO_INPUT # 等待自己的炸弹炸开障碍物
+            return PlayerInput(0, 0, True)
+        inputs = self._follow(self.route, state)
+        if next_tile in avoid or self._entered_tile(state, inputs) in avoid:
+            # 路线前方有守卫视野 (或即将爆炸)：绕路；绕不开时在视野外等守卫走开
+            detour = (here, avoid)
+            if detour == self.failed_detour or not self._plan(state, avoid):
+                self.failed_detour = detour
+                return NO_INPUT
+            if not self.route or self.route[0] in avoid:
+                return NO_INPUT
+            inputs = self._follow(self.route, state)
+            if self._entered_tile(state, inputs) in avoid:
+                return NO_INPUT
+        return inputs
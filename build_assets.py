@@ -0,0 +1,127 @@
+# build_assets.py - 美术资源打包脚本
+# 把 img/ 下分散的图片与精灵表中用到的每一帧裁剪、按 TILE_SIZE 缩放好，
+# 排成一张图集 img/atlas.png，并写出记录每帧位置的清单 img/atlas.json。
+# 游戏启动时只需解码这一张图片，再用 subsurface 切出各帧 (见 renderer.load_images)，
+# 所有精灵共用同一个源 Surface，运行时不再调用 pygame.transform.scale。
+#
+# 修改了 SPRITE_SOURCES 或 TILE_SIZE 之后重新运行：python build_assets.py
+
+import json
+import math
+import os
+
+import pygame
+
+from config import TILE_SIZE
+
+ATLAS_IMAGE = os.path.join("img", "atlas.png")
+ATLAS_MANIFEST = os.path.join("img", "atlas.json")
+ATLAS_COLUMNS = 16 # 图集每行的格子数
+
+DIRECTIONS = ("down", "left", "right", "up")
+
+
+def _sheet_row(path, row, frame_width, frame_height, count):
+    """精灵表中第 row 行的 count 帧。"""
+    return [(path, (col * frame_width, row * frame_height, frame_width, frame_height)) for col in range(count)]
+
+
+# 精灵名 -> 帧列表，每帧为 (图片路径, 裁剪区域)；裁剪区域为 None 表示整张图片。
+# 同一精灵的多帧按所有帧内容的并集裁掉透明边框，保证动画帧之间不会错位。
+SPRITE_SOURCES = {
+    'tile_grass': [("img/map/floor.png", None)],
+    'tile_wall': [("img/map/2.png", (0, 0, 32, 32))],       # 积木墙
+    'tile_box': [("img/map/2.png", (32, 64, 32, 32))],      # 木箱 (可炸开的障碍物)
+    'tile_treasure': _sheet_row("img/item/1.png", 0, 32, 48, 4),
+    'tile_exit': [("img/map/1.png", (32, 64, 32, 64))],     # 小屋
+    'bomb': _sheet_row("img/boom/1.png", 0, 32, 48, 4),
+    'explosion': [(f"img/boom/explode{i}.png", None) for i in (2, 1, 0)], # 火焰由大到小逐渐熄灭
+}
+# 玩家精灵表：每行一个朝向 (下、左、右、上)，每行 4 帧行走动画
+for _row, _direction in enumerate(DIRECTIONS):
+    SPRITE_SOURCES[f'player_{_direction}'] = _sheet_row("img/player/player1.png", _row, 100, 100, 4)
+# 守卫：三种外观，每个朝向一张图
+for _variant in (1, 2, 3):
+    for _direction in DIRECTIONS:
+        SPRITE_SOURCES[f'guard{_variant}_{_direction}'] = [(f"img/computer/{_variant}/{_direction}.png", None)]
+
+# 别名 -> 精灵名 (默认朝向的图片)
+SPRITE_ALIASES = {
+    'player': 'player_down',
+    'guard': 'guard1_down',
+}
+
+
+def _load_frames(frames, cache):
+    """读取并裁剪一个精灵的所有帧；任一源图片无法读取时返回 None。"""
+    surfaces = []
+    for path, area in frames:
+        sheet = cache.get(path)
+        if sheet is None:
+            try:
+                sheet = pygame.image.load(path)
+            except (pygame.error, FileNotFoundError) as e:
+                print(f"错误: 无法加载图片 '{path}'. 请确保文件存在且路径正确。错误信息: {e}")
+                return None
+            cache[path] = sheet
+        surface = pygame.Surface(area[2:] if area else sheet.get_size(), pygame.SRCALPHA)
+        surface.blit(sheet, (0, 0), area)
+        surfaces.append(surface)
+
+    # 所有帧共用同一个裁剪框 (内容并集)
+    bounds = surfaces[0].get_bounding_rect().unionall([s.get_bounding_rect() for s in surfaces[1:]])
+    if bounds.width == 0 or bounds.height == 0:
+        bounds = surfaces[0].get_rect()
+    return [s.subsurface(bounds) for s in surfaces]
+
+
+def _fit_to_tile(surface, tile_size):
+    """等比缩放到 tile_size 见方的格子内并居中，其余部分透明。"""
+    width, height = surface.get_size()
+    scale = min(tile_size / width, tile_size / height)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    scaled = surface if size == (width, height) else pygame.transform.smoothscale(surface, size)
+    cell = pygame.Surface((tile_size, tile_size), pygame.SRCALPHA)
+    cell.blit(scaled, ((tile_size - size[0]) // 2, (tile_size - size[1]) // 2))
+    return cell
+
+
+def build_atlas(tile_size=TILE_SIZE, sources=SPRITE_SOURCES, columns=ATLAS_COLUMNS):
+    """
+    裁剪、缩放所有帧并排入一张图集。
+    Returns:
+        tuple: (图集 Surface, 清单 dict)。清单的 "sprites" 为 {精灵名: [[x, y, w, h], ...]}。
+    """
+    cache = {}
+    cells = [] # (精灵名, 缩放后的帧)
+    for name, frames in sources.items():
+        loaded = _load_frames(frames, cache)
+        if loaded is None:
+            continue
+        for frame in loaded:
+            cells.append((name, _fit_to_tile(frame, tile_size)))
+
+    rows = max(1, math.ceil(len(cells) / columns))
+    atlas = pygame.Surface((columns * tile_size, rows * tile_size), pygame.SRCALPHA)
+    sprites = {}
+    for index, (name, cell) in enumerate(cells):
+        x, y = (index % columns) * tile_size, (index // columns) * tile_size
+        atlas.blit(cell, (x, y))
+        sprites.setdefault(name, []).append([x, y, tile_size, tile_size])
+
+    aliases = {alias: target for alias, target in SPRITE_ALIASES.items() if target in sprites}
+    manifest = {"tile_size": tile_size, "sprites": sprites, "aliases": aliases}
+    return atlas, manifest
+
+
+def main():
+    atlas, manifest = build_atlas()
+    pygame.image.save(atlas, ATLAS_IMAGE)
+    with open(ATLAS_MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    frame_count = sum(len(frames) for frames in manifest["sprites"].values())
+    print(f"已生成 {ATLAS_IMAGE} ({atlas.get_width()}x{atlas.get_height()}, {frame_count} 帧) 与 {ATLAS_MANIFEST}")
+
+
+if __name__ == "__main__":
+    main()
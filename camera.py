@@ -0,0 +1,48 @@
+# camera.py - 跟随玩家的视口摄像机
+# 地图可以远大于窗口，摄像机决定窗口显示地图的哪一部分 (世界像素坐标 -> 屏幕坐标)。
+
+import pygame
+
+from config import TILE_SIZE
+
+
+class Camera:
+    """
+    视口摄像机。x, y 为视口左上角在世界中的像素坐标 (整数)。
+    地图比视口小时，摄像机固定在 (0, 0)。
+    """
+
+    def __init__(self, view_width, view_height, world_width, world_height):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.world_width = world_width
+        self.world_height = world_height
+        self.x = 0
+        self.y = 0
+
+    @property
+    def offset(self):
+        """世界坐标减去 offset 即为屏幕坐标。"""
+        return self.x, self.y
+
+    def follow(self, pixel_x, pixel_y):
+        """
+        让视口中心对准一个瓦片大小的精灵 (左上角位于 pixel_x, pixel_y)，并限制在地图范围内。
+        Returns:
+            bool: 视口是否发生了移动。
+        """
+        target_x = int(pixel_x + TILE_SIZE / 2 - self.view_width / 2)
+        target_y = int(pixel_y + TILE_SIZE / 2 - self.view_height / 2)
+        new_x = max(0, min(target_x, self.world_width - self.view_width))
+        new_y = max(0, min(target_y, self.world_height - self.view_height))
+        moved = (new_x, new_y) != (self.x, self.y)
+        self.x, self.y = new_x, new_y
+        return moved
+
+    def view_rect(self):
+        """视口在世界中的像素矩形。"""
+        return pygame.Rect(self.x, self.y, self.view_width, self.view_height)
+
+    def to_screen(self, world_rect):
+        """把世界坐标矩形转换为屏幕坐标矩形。"""
+        return world_rect.move(-self.x, -self.y)
@@ -0,0 +1,145 @@
+# collision.py - 基于阻挡位掩码的碰撞检测与扫掠移动
+# 每一行地图的阻挡瓦片 (墙壁与可炸开障碍物) 压缩为一个 Python 整数，第 x 位对应第 x 列。
+# 检查一个矩形覆盖的若干列只需对每行做一次移位与按位与，不构造任何 pygame.Rect；
+# 障碍物被炸开时由地图监听器只修改一位。
+#
+# 扫掠移动：沿一个坐标轴移动任意距离时，一次性检查沿途进入的所有列 (或行)，停在第一个阻挡瓦片前并贴紧它，
+# 因此即使速度超过一个瓦片、或者时间步长变大，也不会穿墙。地图之外视为阻挡。
+
+import math
+
+from config import TILE_SIZE
+from tilegrid import BLOCKED_TABLE
+
+# bytes.translate 用的查找表：0/1 掩码 -> 字符 '0'/'1' (用于一次性把一行掩码转换为整数)
+_DIGITS = bytes([ord("0"), ord("1")]) + bytes(254)
+
+
+class CollisionMask:
+    """
+    阻挡位掩码。row_bits[y] 的第 x 位为 1 表示瓦片 (x, y) 阻挡移动。
+    注册为 GameState 的地图监听器后随地图自动更新。
+    矩形均以左上角像素坐标与宽高给出，像素坐标与 pygame.Rect 一样截断为整数。
+    """
+
+    __slots__ = ("cols", "rows", "row_bits")
+
+    def __init__(self, maze):
+        cols = self.cols = maze.cols
+        self.rows = maze.rows
+        digits = maze.blocked_mask().translate(_DIGITS)
+        # 整数的最低位在字符串末尾，因此每行反转后再解析
+        self.row_bits = [int(digits[start:start + cols][::-1], 2)
+                         for start in range(0, cols * maze.rows, cols)]
+
+    def on_tile_changed(self, x, y, old_tile, new_tile):
+        """地图监听器：瓦片的阻挡性改变时修改对应的一位。"""
+        if BLOCKED_TABLE[new_tile]:
+            self.row_bits[y] |= 1 << x
+        else:
+            self.row_bits[y] &= ~(1 << x)
+
+    def blocked(self, left, top, width, height):
+        """矩形是否与阻挡瓦片重叠 (只是相接不算)。"""
+        left, top = math.floor(left), math.floor(top)
+        start_col = left // TILE_SIZE
+        end_col = (left + width - 1) // TILE_SIZE
+        start_row = top // TILE_SIZE
+        end_row = (top + height - 1) // TILE_SIZE
+        if start_col < 0 or start_row < 0 or end_col >= self.cols or end_row >= self.rows:
+            return True
+        window = (1 << (end_col - start_col + 1)) - 1
+        row_bits = self.row_bits
+        for y in range(start_row, end_row + 1):
+            if (row_bits[y] >> start_col) & window:
+                return True
+        return False
+
+    def sweep_x(self, x, y, width, height, dx):
+        """
+        把左上角位于 (x, y) 的矩形沿水平方向移动 dx 像素 (任意大小)。
+        Returns:
+            float: 移动后的 x；途中遇到阻挡瓦片时贴紧它停下 (不会后退)。
+        """
+        target = x + dx
+        left = math.floor(x)
+        start_row = math.floor(y) // TILE_SIZE
+        end_row = (math.floor(y) + height - 1) // TILE_SIZE
+        if dx > 0:
+            first = (left + width - 1) // TILE_SIZE + 1 # 移动前尚未覆盖的第一列
+            last = (math.floor(target) + width - 1) // TILE_SIZE
+            if last < first:
+                return target
+            hit = self._first_blocked_column(start_row, end_row, first, last)
+            return target if hit is None else min(target, max(x, hit * TILE_SIZE - width))
+        if dx < 0:
+            first = left // TILE_SIZE - 1
+            last = math.floor(target) // TILE_SIZE
+            if last > first:
+                return target
+            hit = self._last_blocked_column(start_row, end_row, last, first)
+            return target if hit is None else max(target, min(x, (hit + 1) * TILE_SIZE))
+        return x
+
+    def sweep_y(self, x, y, width, height, dy):
+        """
+        把左上角位于 (x, y) 的矩形沿竖直方向移动 dy 像素 (任意大小)。
+        Returns:
+            float: 移动后的 y；途中遇到阻挡瓦片时贴紧它停下 (不会后退)。
+        """
+        target = y + dy
+        top = math.floor(y)
+        start_col = math.floor(x) // TILE_SIZE
+        end_col = (math.floor(x) + width - 1) // TILE_SIZE
+        if dy > 0:
+            first = (top + height - 1) // TILE_SIZE + 1
+            last = (math.floor(target) + height - 1) // TILE_SIZE
+            rows = range(first, last + 1)
+        elif dy < 0:
+            first = top // TILE_SIZE - 1
+            last = math.floor(target) // TILE_SIZE
+            rows = range(first, last - 1, -1)
+        else:
+            return y
+        for row in rows: # 沿移动方向逐行检查，第一个有阻挡的行即为停止位置
+            if self._row_blocked(row, start_col, end_col):
+                if dy > 0:
+                    return min(target, max(y, row * TILE_SIZE - height))
+                return max(target, min(y, (row + 1) * TILE_SIZE))
+        return target
+
+    # --- 内部查询 ---
+
+    def _row_blocked(self, row, start_col, end_col):
+        """第 row 行的 start_col..end_col 列中是否有阻挡瓦片 (地图之外视为阻挡)。"""
+        if not 0 <= row < self.rows or start_col < 0 or end_col >= self.cols:
+            return True
+        return (self.row_bits[row] >> start_col) & ((1 << (end_col - start_col + 1)) - 1) != 0
+
+    def _rows_union(self, start_row, end_row):
+        """start_row..end_row 行的阻挡位的并集 (地图之外的行视为全部阻挡)。"""
+        if start_row < 0 or end_row >= self.rows:
+            return (1 << self.cols) - 1
+        bits = 0
+        for y in range(start_row, end_row + 1):
+            bits |= self.row_bits[y]
+        return bits
+
+    def _first_blocked_column(self, start_row, end_row, first, last):
+        """first..last 列中最左边的阻挡列 (超出地图右边界时为 cols)；没有时返回 None。"""
+        bits = self._rows_union(start_row, end_row) >> first
+        span = min(last, self.cols - 1) - first + 1
+        if span > 0:
+            bits &= (1 << span) - 1
+            if bits:
+                return first + (bits & -bits).bit_length() - 1 # 最低的置位
+        return self.cols if last >= self.cols else None
+
+    def _last_blocked_column(self, start_row, end_row, last, first):
+        """last..first 列中最右边的阻挡列 (超出地图左边界时为 -1)；没有时返回 None。"""
+        low = max(last, 0)
+        if first >= low:
+            bits = (self._rows_union(start_row, end_row) >> low) & ((1 << (first - low + 1)) - 1)
+            if bits:
+                return low + bits.bit_length() - 1 # 最高的置位
+        return -1 if last < 0 else None
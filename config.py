@@ -0,0 +1,136 @@
+# config.py - 游戏配置常量
+# 所有模块（主程序、仿真核心、地图生成）共用的常量集中在这里，
+# 避免无窗口仿真时为了读取一个常量而导入 main.py。
+
+# --- 尺寸与速度 ---
+TILE_SIZE = 32  # 每个瓦片 32x32 像素
+PLAYER_SPEED = 3.0 # 玩家每帧移动的像素数 (用于平滑移动)
+GUARD_SPEED = 1.0 # 守卫每帧移动的像素数 (比玩家慢，用于平滑移动)
+
+COLS = 20       # 迷宫的默认列数 (可通过命令行参数指定更大的地图)
+ROWS = 10       # 迷宫的默认行数
+
+# 窗口 (视口) 大小与地图大小无关；地图比视口大时由摄像机跟随玩家滚动
+VIEW_COLS = 20  # 视口可见的列数
+VIEW_ROWS = 10  # 视口可见的行数
+
+WIDTH = VIEW_COLS * TILE_SIZE    # 游戏窗口宽度：20 * 32 = 640 像素
+HEIGHT = VIEW_ROWS * TILE_SIZE   # 游戏窗口高度：10 * 32 = 320 像素
+
+# 静态瓦片层按区块预渲染，只有出现在视口中的区块才会被绘制和缓存
+CHUNK_SIZE = 16          # 每个区块的边长 (瓦片数)
+MAX_CACHED_CHUNKS = 64   # 最多缓存的区块 Surface 数量，超出时淘汰最久未使用的区块
+
+# 精灵动画 (见 animation.py)：每隔多少仿真帧换一帧动画
+PLAYER_FRAME_TICKS = 8   # 玩家行走
+PLAYER_IDLE_TICKS = 6    # 玩家连续多少帧没有移动后回到站立姿势 (贴墙对齐时的短暂停顿不打断行走动画)
+GUARD_FRAME_TICKS = 12   # 守卫行走 (每个朝向只有一张图片时没有效果)
+BOMB_FRAME_TICKS = 10    # 炸弹引信闪烁
+BOMB_HURRY_TICKS = 30    # 引信最后这么多帧闪烁加快一倍
+
+# --- 固定时间步长 ---
+# 速度常量以 "每帧像素" 表示，这里的 TICK_RATE 就是这个 "帧" 的频率。
+# 仿真每次 step 推进 FIXED_DT 秒，与显示帧率无关。
+TICK_RATE = 60
+FIXED_DT = 1.0 / TICK_RATE
+MAX_FRAME_TIME = 0.25 # 单帧最多追赶的仿真时间，防止卡顿后出现 "死亡螺旋"
+
+# 颜色定义 (RGB 值) - 使用常量命名规范，提高可读性
+COLOR_BLACK = (0, 0, 0)
+COLOR_WHITE = (255, 255, 255)
+COLOR_GRAY = (100, 100, 100)
+COLOR_GREEN = (0, 255, 0)
+COLOR_RED = (255, 0, 0)
+COLOR_BLUE = (0, 100, 255)
+COLOR_YELLOW = (255, 255, 0)
+COLOR_LIGHT_RED = (255, 200, 200)
+COLOR_ORANGE = (255, 165, 0)
+COLOR_BROWN = (139, 69, 19) # 棕色 (用于可炸开的障碍物)
+COLOR_HEALTH_GREEN = (0, 200, 0) # 血量条绿色
+COLOR_HEALTH_RED = (200, 0, 0)   # 血量条红色背景
+
+# 瓦片类型：
+#   0: 可通行路径 (例如，草地)
+#   1: 墙壁 (不可通行，不可被爆炸摧毁，例如，房子、树)
+#   2: 宝藏 (例如，金币)
+#   3: 出口 (例如，蓝色传送门)
+#   4: 可炸开的障碍物 (例如，木箱、砖块)
+#   9: 特殊标记 (目前行为与 '0' 相同，建议统一为 '0' 或为其赋予明确游戏意义)
+TILE_FLOOR = 0
+TILE_WALL = 1
+TILE_TREASURE = 2
+TILE_EXIT = 3
+TILE_BOX = 4
+TILE_MARK = 9
+
+# --- 角色与炸弹参数 ---
+PLAYER_MAX_HP = 3
+GUARD_MAX_HP = 2
+GUARD_BOMB_COOLDOWN = 5 # 守卫两次放置炸弹之间的最短间隔 (秒)
+GUARD_SIGHT_RANGE = 3   # 守卫视线的最远格数
+GUARD_SIGHT_SPREAD = 0.5 # 视野扇形的张开程度：前方第 d 格处两侧各能看到 int(d * 该值) 格 (0 为一条直线)
+
+# --- 守卫寻路 ---
+BOX_PATH_COST = 4        # 寻路时穿过可炸开障碍物的额外代价 (相当于绕路的格数)
+FLOW_FIELD_RADIUS = 30   # 追踪玩家的距离场最多计算到的代价
+GUARD_CHASE_RANGE = 12   # 玩家在距离场中的代价不超过该值时，守卫放弃巡逻转而追踪
+GUARD_PATROL_RADIUS = 8  # 守卫巡逻点离出生点的最大距离 (格)
+GUARD_START_CLEARANCE = GUARD_SIGHT_RANGE + 2 # 守卫出生点与玩家起点在横、纵方向上至少相距的格数 (开局不会立刻看到玩家)
+GUARD_TILES_PER_GUARD = 1000 # 每多少个瓦片放置一个守卫 (至少一个；20x10 为 1 个，500x500 为 250 个)
+GUARD_REPLANS_PER_TICK = 16 # 每帧最多为多少个守卫重新规划巡逻路线 (其余守卫等到下一帧)
+PATH_SEARCH_LIMIT = 4096 # A* 最多展开的节点数
+
+EXPLOSION_RANGE = 2 # 炸弹爆炸范围常量
+BOMB_FUSE_TIME = 2      # 炸弹从放置到爆炸的时间 (秒)
+EXPLOSION_DURATION = 1  # 爆炸火焰持续显示的时间 (秒)
+# 定时器按仿真帧号计时 (见 timers.TimerQueue)
+BOMB_FUSE_TICKS = round(BOMB_FUSE_TIME * TICK_RATE)
+EXPLOSION_TICKS = round(EXPLOSION_DURATION * TICK_RATE)
+
+TREASURE_COUNT = 3 # 每张地图放置的宝藏数量
+
+# --- 地图生成 ---
+MAZE_ALGORITHM = "scatter" # 默认生成算法: scatter / backtracker / kruskal / cellular
+MAX_LEVEL_ATTEMPTS = 50    # 生成可解地图的最大重试次数
+MAX_LEVEL_BOMBS = None     # 到达每个宝藏和出口最多需要炸开的障碍物数量，None 表示不限制
+
+# --- 关卡难度与后台预生成 (见 levels.py) ---
+LEVEL_PREFETCH = 2              # 当前关卡进行时在后台预先生成的后续关卡数
+LEVEL_GUARD_GROWTH = 0.25       # 每过一关守卫数量增加的比例 (相对第一关)
+LEVEL_MIN_TILES_PER_GUARD = 50  # 守卫数量的上限：每个守卫至少对应多少个瓦片
+LEVEL_BOX_DENSITY_STEP = 0.02   # 每过一关可炸开障碍物比例的增量
+MAX_LEVEL_BOX_DENSITY = 0.30    # 可炸开障碍物比例的上限
+
+# --- 界面文字与血量条 (见 hud.py) ---
+HUD_FONT_FILE = "fonts/hud.ttf" # 随游戏附带的中文字体子集 (只含界面所用字符)，不存在时在系统字体中查找
+HUD_SYSTEM_FONTS = "notosanscjksc,notosanssc,sourcehansanssc,wenquanyimicrohei,wenquanyizenhei,microsoftyahei,simhei,pingfangsc,hiraginosansgb"
+HUD_FONT_SIZE = 18        # HUD 中宝藏计数的字号
+END_FONT_SIZE = 48        # 游戏结束画面的字号
+TEXT_CACHE_SIZE = 128     # 文字图片缓存的最大条目数，超出时淘汰最久未用的
+HEALTH_BAR_WIDTH = 100
+HEALTH_BAR_HEIGHT = 15
+
+# --- 音频 ---
+SFX_CHANNELS = 8   # 专门播放音效的声道数
+SFX_VOLUME = 0.5
+MAX_PENDING_EVENTS = 256 # 仿真事件队列 (音效等) 的最大长度，无人读取时丢弃最旧的事件
+
+# --- 录像 ---
+REPLAY_DIR = "replays" # 每局游戏结束后保存录像的目录 (用 python replay.py 文件 回放)
+
+# --- 存档 ---
+SAVE_DIR = "saves"            # 自动存档与快速存档 (F5 保存、F9 读取) 的目录
+AUTOSAVE_INTERVAL = 5.0       # 自动存档的间隔 (仿真秒数)
+SNAPSHOT_COMPRESS_LEVEL = None # 快照的 zlib 压缩级别 (1-9)，None 为不压缩 (最快)
+
+# --- 联机 (python server.py / python netclient.py) ---
+NET_HOST = "127.0.0.1"
+NET_PORT = 8765
+NET_SEND_TICKS = 2                # 每隔多少个仿真帧向客户端发送一次增量快照 (2 即每秒 30 次)
+NET_MAX_WRITE_BUFFER = 256 * 1024 # 发往一个客户端的数据积压超过该字节数时断开它 (防止慢客户端占用内存)
+NET_STATS_INTERVAL = 5.0          # 服务器打印房间数与每帧耗时的间隔 (秒)
+
+# --- 性能剖析 (python main.py --profile) ---
+PROFILE_WINDOW = 600          # 统计分位数时保留的最近帧数
+PROFILE_TRACE_EVENTS = 200000 # Chrome trace 中保留的最近调用记录数
+PROFILE_DIR = "profiles"      # 退出时保存 CSV 与 trace 的目录
@@ -0,0 +1,109 @@
+# connectivity.py - 迷宫连通性检查
+# 计算玩家能够到达的区域，maze.place_game_elements 只在该区域内放置守卫、宝藏和出口，
+# 因此地图一定可解。可炸开障碍物 (4) 视为可通过 (代价为一颗炸弹)，墙壁 (1) 永远不可通过；
+# bomb_region 计算最多炸开几个障碍物能够到达的区域，用于限制到达每个目标需要的炸弹数 (MAX_LEVEL_BOMBS)。
+#
+# reachable_region 借助 pygame.mask 在 C 层完成整图泛洪填充：pygame 的连通分量是
+# 8 邻接的，而游戏中只能上下左右移动，所以先把每个瓦片放大成 3x3 像素中的一个
+# "十" 字形 —— 相邻瓦片的十字臂彼此相接，而对角瓦片之间至少隔一个像素，
+# 8 邻接的连通分量因此恰好等于原网格的 4 邻接连通分量。
+
+import pygame
+
+from config import TILE_BOX
+from tilegrid import make_tile_table
+
+# 连通性检查中可以通过的瓦片 (障碍物可以被炸开)
+TRAVERSABLE_TABLE = make_tile_table((0, 2, 3, 4, 9))
+FLOOR_TABLE = make_tile_table((0, 2, 3, 9)) # 不需要炸弹就能通过的瓦片
+BOX_TABLE = make_tile_table((TILE_BOX,))
+
+_corner_masks = {} # (cols, rows) -> 擦除每个 3x3 块四个角的掩码，按地图尺寸缓存
+
+
+def _corner_mask(cols, rows):
+    """构造 (并缓存) 覆盖每个 3x3 块四个角像素的掩码。"""
+    key = (cols, rows)
+    mask = _corner_masks.get(key)
+    if mask is None:
+        corner_row = b'\x01\x00\x01' * cols
+        empty_row = bytes(3 * cols)
+        pattern = pygame.image.frombuffer((corner_row + empty_row + corner_row) * rows, (cols * 3, rows * 3), 'P')
+        pattern.set_colorkey(0)
+        mask = pygame.mask.from_surface(pattern)
+        _corner_masks[key] = mask
+    return mask
+
+
+class ReachableRegion:
+    """
+    从某个起点出发能够到达的全部瓦片 (4 邻接，障碍物可通过)。
+    """
+
+    def __init__(self, mask, start):
+        self.mask = mask
+        self.start = start
+
+    def __contains__(self, pos):
+        return bool(self.mask.get_at((3 * pos[0] + 1, 3 * pos[1] + 1)))
+
+    def __len__(self):
+        # 每个瓦片在放大后的掩码中占 5 个像素 (十字形)
+        return self.mask.count() // 5
+
+
+def _cross_mask(grid, table):
+    """把 table 中为真的瓦片放大成十字形，得到 3 倍大小的掩码。"""
+    cols, rows = grid.cols, grid.rows
+    passable = pygame.image.frombuffer(grid.cells.translate(table), (cols, rows), 'P')
+    scaled = pygame.transform.scale(passable, (cols * 3, rows * 3)) # 最近邻放大，每个瓦片变成 3x3 块
+    scaled.set_colorkey(0)
+    mask = pygame.mask.from_surface(scaled)
+    mask.erase(_corner_mask(cols, rows), (0, 0)) # 只保留十字形
+    return mask
+
+
+def reachable_region(grid, start, table=TRAVERSABLE_TABLE):
+    """
+    计算从 start 出发可以到达的区域。
+    Args:
+        grid (TileGrid): 迷宫。
+        start (tuple): 起点瓦片坐标 (x, y)。
+        table (bytes): 可通过瓦片的查找表，默认允许穿过可炸开障碍物。
+    Returns:
+        ReachableRegion: 支持 `pos in region` 与 len(region)。
+    """
+    mask = _cross_mask(grid, table)
+    return ReachableRegion(mask.connected_component((3 * start[0] + 1, 3 * start[1] + 1)), start)
+
+
+def bomb_region(grid, start, max_bombs):
+    """
+    计算从 start 出发、最多炸开 max_bombs 个障碍物能够到达的区域。
+    按层进行的 0-1 广度优先搜索：走进通路代价为 0，走进可炸开障碍物代价为 1。
+    第 k 层是 "通路 + 前 k 层用到的障碍物" 中起点所在的连通分量，代价为 0 的移动由一次掩码泛洪完成；
+    与这一层相邻的障碍物 (把十字形掩码上下左右平移 3 个像素，即一个瓦片) 加入下一层。
+    每层都是整图的 C 层运算，总时间与 max_bombs 成正比，与路径长度无关。
+    Args:
+        grid (TileGrid): 迷宫。
+        start (tuple): 起点瓦片坐标 (x, y)，应为通路。
+        max_bombs (int): 最多炸开的障碍物数量。
+    Returns:
+        ReachableRegion: 支持 `pos in region` 与 len(region)。
+    """
+    start_pixel = (3 * start[0] + 1, 3 * start[1] + 1)
+    allowed = _cross_mask(grid, FLOOR_TABLE)
+    boxes = _cross_mask(grid, BOX_TABLE)
+    region = allowed.connected_component(start_pixel)
+    for _ in range(max_bombs):
+        border = pygame.mask.Mask(region.get_size())
+        for offset in ((3, 0), (-3, 0), (0, 3), (0, -3)):
+            border.draw(region, offset)
+        reached_boxes = border.overlap_mask(boxes, (0, 0))
+        if not reached_boxes.count():
+            break # 没有新的障碍物可炸，区域不会再变大
+        allowed.draw(reached_boxes, (0, 0))
+        boxes.erase(reached_boxes, (0, 0))
+        region = allowed.connected_component(start_pixel)
+    return ReachableRegion(region, start)
+
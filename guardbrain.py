@@ -0,0 +1,387 @@
+# guardbrain.py - 守卫的炸弹决策与躲避
+# 爆炸范围 (explode 的四条射线) 只取决于炸弹所在瓦片和附近的地图，因此按瓦片缓存为"爆炸足迹"，
+# 所有炸弹、守卫和机器人共用；某个瓦片的类型 (墙壁 / 障碍物 / 其他) 改变时，
+# 只丢弃同行同列 EXPLOSION_RANGE 格内的缓存项。
+#
+# 所有未爆炸弹的足迹合并为一张爆炸时间表 (BlastTimeline)：瓦片 -> 最早被炸到的帧号 (含连锁引爆)，
+# 炸弹放置或爆炸时增量更新，守卫和机器人查询某个瓦片是否危险、还有几帧爆炸都是 O(1)。
+# 守卫的决策因此只是几次字典查询：
+#   - 躲避：站在危险瓦片上的守卫沿最短路线 (广度优先搜索) 走到安全瓦片，路线按守卫的速度
+#     避开它经过时恰好爆炸的瓦片；下一步会走进危险瓦片时原地等待。
+#   - 放置炸弹：每帧把玩家附近、停在瓦片中心的守卫一起处理 (plan_attacks)，以每个守卫所在的瓦片
+#     和能走进去的相邻瓦片为候选，按足迹是否真的 (穿过墙壁的遮挡) 炸到玩家、是否炸开挡路的障碍物、
+#     会不会炸到其他守卫打分。足迹缓存了瓦片下标，打分时直接查询本帧的空间哈希 (玩家与守卫占据的瓦片)。
+#     得分最高的是相邻瓦片时守卫先走过去；是所在瓦片、得分为正且在引信燃尽前有撤离路线时才放置。
+# 取代原先只在撞上障碍物时才判断、按曼哈顿距离或抛硬币决定的做法。
+
+from collections import deque
+
+from config import TILE_WALL, TILE_BOX
+from spatial import PLAYER
+from tilegrid import BLOCKED_TABLE
+
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+# 炸弹得分
+SCORE_PLAYER = 2   # 足迹覆盖玩家 (一个实体可能跨越两个瓦片，只计一次)
+SCORE_BOX = 1      # 足迹覆盖挡路的可炸开障碍物
+SCORE_GUARD = -2   # 足迹覆盖另一个未被炸晕的守卫 (每个守卫)
+
+
+def _blast_class(tile):
+    """瓦片对爆炸的影响：0 穿过，1 阻挡 (墙壁)，2 被炸到但阻挡后面的瓦片 (障碍物)。"""
+    if tile == TILE_WALL:
+        return 1
+    if tile == TILE_BOX:
+        return 2
+    return 0
+
+
+class BlastMasks:
+    """
+    (x, y) -> 炸弹在该瓦片爆炸时波及的瓦片 (tuple，首项为中心)，同时缓存这些瓦片的下标 (y * cols + x)，
+    打分时直接用下标查询空间哈希的桶。注册为地图监听器后自动局部失效。
+    """
+
+    def __init__(self, maze, blast_range):
+        self.maze = maze
+        self.blast_range = blast_range
+        self.cache = {} # (x, y) -> (瓦片坐标 tuple, 瓦片下标 tuple)
+
+    def footprint(self, x, y):
+        entry = self.cache.get((x, y))
+        if entry is None:
+            entry = self._trace(x, y)
+        return entry[0]
+
+    def footprint_keys(self, x, y):
+        """与 footprint 相同的瓦片，以瓦片下标表示。"""
+        entry = self.cache.get((x, y))
+        if entry is None:
+            entry = self._trace(x, y)
+        return entry[1]
+
+    def _trace(self, x, y):
+        cells = self.maze.cells
+        cols, rows = self.maze.cols, self.maze.rows
+        tiles = [(x, y)]
+        for dx, dy in DIRECTIONS:
+            for i in range(1, self.blast_range + 1):
+                nx, ny = x + dx * i, y + dy * i
+                if not (0 <= nx < cols and 0 <= ny < rows):
+                    break
+                kind = _blast_class(cells[ny * cols + nx])
+                if kind == 1:
+                    break
+                tiles.append((nx, ny))
+                if kind == 2:
+                    break
+        entry = self.cache[(x, y)] = (tuple(tiles), tuple(ty * cols + tx for tx, ty in tiles))
+        return entry
+
+    def on_tile_changed(self, x, y, old_tile, new_tile):
+        """地图监听器：瓦片对爆炸的影响改变时，丢弃射线经过它的足迹。"""
+        if _blast_class(old_tile) == _blast_class(new_tile) or not self.cache:
+            return
+        cache = self.cache
+        for d in range(1, self.blast_range + 1):
+            cache.pop((x - d, y), None)
+            cache.pop((x + d, y), None)
+            cache.pop((x, y - d), None)
+            cache.pop((x, y + d), None)
+
+
+class BlastTimeline:
+    """
+    未爆炸弹的爆炸时间表。blast_tick 为 {(x, y): 该瓦片最早被炸到的帧号}，不在其中的瓦片是安全的。
+    炸弹在放置帧号 + fuse_ticks 帧爆炸；位于另一颗更早爆炸的炸弹足迹内时被连锁引爆，按那一帧计算。
+
+    增量更新，开销只与变化的炸弹有关：
+      - add：放置炸弹时合并它的足迹，并提前被它连锁引爆的炸弹的爆炸帧号；
+      - remove：炸弹爆炸后只重算它们足迹内的瓦片；
+      - 地图监听器：只重算射线经过变化瓦片的炸弹的足迹 (障碍物被炸开后爆炸范围变大)。
+    足迹变小等不能增量处理的情况 (正常游戏中不会出现) 整体重建。
+    不经过 place_bomb / detonate 直接修改 state.bombs 的地方 (快照恢复、联机增量) 之后调用 sync。
+    """
+
+    def __init__(self, state, fuse_ticks):
+        self.blasts = state.blasts
+        self.blast_range = state.blasts.blast_range
+        self.fuse_ticks = fuse_ticks
+        self.blast_tick = {}  # 瓦片 -> 最早被炸到的帧号
+        self.fuse = {}        # 炸弹坐标 -> 实际爆炸帧号 (含连锁)
+        self.footprints = {}  # 炸弹坐标 -> 登记时的足迹
+        self.covers = {}      # 瓦片 -> 足迹覆盖它的炸弹坐标集合
+        self.known_bombs = {} # 已登记的炸弹 (与 state.bombs 相同的格式)
+        state.add_tile_listener(self.on_tile_changed)
+
+    def on_tile_changed(self, x, y, old_tile, new_tile):
+        """地图监听器：重算射线经过该瓦片的炸弹的足迹。"""
+        if _blast_class(old_tile) == _blast_class(new_tile) or not self.footprints:
+            return
+        footprints = self.footprints
+        for d in range(1, self.blast_range + 1):
+            for pos in ((x - d, y), (x + d, y), (x, y - d), (x, y + d)):
+                if pos in footprints and not self._refresh(pos):
+                    self.rebuild(self.known_bombs)
+                    return
+
+    def ticks_until(self, x, y, tick):
+        """
+        Returns:
+            int | None: 从第 tick 帧起瓦片 (x, y) 还有几帧被炸到；没有未爆炸弹会炸到它时为 None。
+        """
+        hit = self.blast_tick.get((x, y))
+        return None if hit is None else hit - tick
+
+    def add(self, bomb):
+        """登记一颗新放置的炸弹 bomb = (x, y, 放置帧号, 放置者)。"""
+        pos = (bomb[0], bomb[1])
+        if pos in self.known_bombs:
+            self.remove([pos])
+        self.known_bombs[pos] = bomb
+        self._add(pos, bomb[2] + self.fuse_ticks)
+
+    def remove(self, positions):
+        """移除已经爆炸 (或被替换) 的炸弹。"""
+        known = self.known_bombs
+        removed = [pos for pos in positions if known.pop(pos, None) is not None]
+        if removed and not self._remove(removed):
+            self.rebuild(known)
+
+    def sync(self, state):
+        """与 state.bombs 比较，登记新增的炸弹、移除消失的炸弹。两者相同时只做一次字典比较。"""
+        bombs = state.bombs
+        known = self.known_bombs
+        if bombs == known:
+            return
+        self.remove([pos for pos, bomb in known.items() if bombs.get(pos) != bomb])
+        for pos, bomb in bombs.items():
+            if pos not in known:
+                self.add(bomb)
+
+    def rebuild(self, bombs):
+        """丢弃全部数据，按 bombs ({(x, y): 炸弹}) 重新登记。"""
+        bombs = list(bombs.values())
+        self.blast_tick.clear()
+        self.fuse.clear()
+        self.footprints.clear()
+        self.covers.clear()
+        self.known_bombs = {}
+        for bomb in bombs:
+            self.add(bomb)
+
+    def _add(self, pos, tick):
+        footprint = self.blasts.footprint(pos[0], pos[1])
+        self.footprints[pos] = footprint
+        covers = self.covers
+        for tile in footprint:
+            covers.setdefault(tile, set()).add(pos)
+        # 被已有炸弹的足迹覆盖时，随它们中最早的一颗一起爆炸
+        hit = self.blast_tick.get(pos)
+        self._lower(pos, tick if hit is None or tick < hit else hit)
+
+    def _lower(self, pos, tick):
+        """炸弹 pos 的爆炸帧号提前到 tick，并沿足迹传递给被它连锁引爆的炸弹。"""
+        blast_tick = self.blast_tick
+        fuse = self.fuse
+        fuse[pos] = tick
+        stack = [pos]
+        while stack:
+            bomb = stack.pop()
+            tick = fuse[bomb]
+            for tile in self.footprints[bomb]:
+                hit = blast_tick.get(tile)
+                if hit is not None and hit <= tick:
+                    continue
+                blast_tick[tile] = tick
+                if tile != bomb and fuse.get(tile, tick) > tick:
+                    fuse[tile] = tick
+                    stack.append(tile)
+
+    def _remove(self, removed):
+        """
+        移除已经爆炸的炸弹，重算它们足迹内的瓦片。
+        Returns:
+            bool: 是否成功；剩下的炸弹的爆炸帧号可能来自被移除的炸弹时返回 False (需要整体重建)。
+        """
+        fuse, footprints, covers, blast_tick = self.fuse, self.footprints, self.covers, self.blast_tick
+        tiles = set()
+        for pos in removed:
+            del fuse[pos]
+            tiles.update(footprints.pop(pos))
+        for tile in tiles:
+            if tile in fuse and covers[tile].intersection(removed):
+                return False # 被移除的炸弹本该连锁引爆它
+            bombs = covers[tile]
+            bombs.difference_update(removed)
+            if bombs:
+                blast_tick[tile] = min(fuse[bomb] for bomb in bombs)
+            else:
+                del covers[tile]
+                del blast_tick[tile]
+        return True
+
+    def _refresh(self, pos):
+        """
+        地图变化后重算炸弹 pos 的足迹。
+        Returns:
+            bool: 是否成功；足迹变小时返回 False (需要整体重建)。
+        """
+        old = self.footprints[pos]
+        new = self.blasts.footprint(pos[0], pos[1])
+        if new == old:
+            return True
+        if not set(old).issubset(new):
+            return False
+        self.footprints[pos] = new
+        for tile in new:
+            self.covers.setdefault(tile, set()).add(pos)
+        self._lower(pos, self.fuse[pos])
+        return True
+
+
+class GuardBrain:
+    """
+    所有守卫共用的决策数据。danger 即爆炸时间表的 blast_tick (同一个字典)，放置炸弹后立即包含它的足迹。
+    step_ticks 为守卫走过一个瓦片所需的帧数，用于判断撤离路线上的瓦片会不会在守卫经过时爆炸。
+    """
+
+    def __init__(self, state, step_ticks):
+        self.blasts = state.blasts
+        self.timeline = state.blast_timeline
+        self.danger = self.timeline.blast_tick
+        self.step_ticks = step_ticks
+
+    def escape_route(self, state, start, extra=(), extra_tick=None):
+        """
+        从 start 出发走到安全瓦片 (没有炸弹会炸到，也不在 extra 中) 的最短路线。
+        按守卫的速度推算经过每个瓦片的时间：守卫占据某个瓦片期间爆炸的瓦片不能经过，
+        守卫到达之前已经炸过的瓦片可以经过 (火焰不造成伤害)。
+        extra 为尚未放置的炸弹的足迹，它在第 extra_tick 帧爆炸。
+        Returns:
+            list | None: 依次经过的瓦片 (不含起点)；start 本身安全时为空列表，来不及离开或无路可逃时为 None。
+        """
+        blast_tick = self.danger
+
+        def hit_at(pos):
+            hit = blast_tick.get(pos)
+            if pos in extra and (hit is None or extra_tick < hit):
+                return extra_tick
+            return hit
+
+        hit = hit_at(start)
+        if hit is None:
+            return []
+        now = state.tick
+        step_ticks = self.step_ticks
+        if hit <= now + step_ticks + 1: # 走出当前瓦片之前就会爆炸
+            return None
+        cells = state.maze.cells
+        cols, rows = state.cols, state.rows
+        came_from = {start: None}
+        queue = deque([(start, 0)])
+        while queue:
+            pos, depth = queue.popleft()
+            x, y = pos
+            depth += 1
+            # 守卫在 (出发后) 这段时间内与第 depth 步的瓦片重叠 (多留一帧余量)
+            enter = now + (depth - 1) * step_ticks - 1
+            leave = now + (depth + 1) * step_ticks + 1
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                next_pos = (nx, ny)
+                if not (0 <= nx < cols and 0 <= ny < rows) or next_pos in came_from \
+                        or BLOCKED_TABLE[cells[ny * cols + nx]]:
+                    continue
+                hit = hit_at(next_pos)
+                if hit is not None and enter <= hit <= leave:
+                    continue
+                came_from[next_pos] = pos
+                if hit is None:
+                    route = []
+                    while next_pos != start:
+                        route.append(next_pos)
+                        next_pos = came_from[next_pos]
+                    route.reverse()
+                    return route
+                queue.append((next_pos, depth))
+        return None
+
+    def bomb_score(self, state, i, tile, blocking=None):
+        """
+        第 i 个守卫在 tile 放置炸弹的得分。blocking 为挡住去路的障碍物瓦片 (没有时为 None)。
+        足迹的每个瓦片下标直接查询本帧的空间哈希 (玩家与未被炸晕的守卫所在的瓦片桶)，
+        大多数瓦片上没有实体，只有炸到守卫时才用集合去掉跨越两个瓦片的重复计数。
+        """
+        score = 0
+        if blocking is not None and blocking in self.blasts.footprint(tile[0], tile[1]):
+            score = SCORE_BOX
+        buckets = state.spatial.buckets
+        hit_player = False
+        hit_guards = None
+        for key in self.blasts.footprint_keys(tile[0], tile[1]):
+            bucket = buckets.get(key)
+            if bucket is None:
+                continue
+            for entity in bucket:
+                if entity == PLAYER:
+                    hit_player = True
+                elif entity != i:
+                    if hit_guards is None:
+                        hit_guards = set()
+                    hit_guards.add(entity)
+        if hit_player:
+            score += SCORE_PLAYER
+        if hit_guards:
+            score += SCORE_GUARD * len(hit_guards)
+        return score
+
+    def plan_attacks(self, state, ready):
+        """
+        为一批停在瓦片中心、准备行动的守卫 (ready 为守卫编号列表) 同时挑选放置炸弹的瓦片。
+        候选瓦片是守卫所在的瓦片和能走进去的相邻瓦片 (不阻挡、没有炸弹、不在爆炸时间表中)，
+        全部候选都按 bomb_score 对本帧的空间哈希打分。
+        Returns:
+            dict: 守卫编号 -> 得分最高且为正的候选瓦片 (并列时优先所在瓦片)；没有值得放置的瓦片的守卫不在其中。
+        """
+        guards = state.guards
+        cells = state.maze.cells
+        cols, rows = state.cols, state.rows
+        bombs = state.bombs
+        danger = self.danger
+        targets = {}
+        for i in ready:
+            here = (guards.tile_x[i], guards.tile_y[i])
+            best = None
+            best_score = 0
+            if here not in bombs:
+                best_score = self.bomb_score(state, i, here)
+                if best_score > 0:
+                    best = here
+            for dx, dy in DIRECTIONS:
+                nx, ny = here[0] + dx, here[1] + dy
+                tile = (nx, ny)
+                if not (0 <= nx < cols and 0 <= ny < rows) or BLOCKED_TABLE[cells[ny * cols + nx]] \
+                        or tile in bombs or tile in danger:
+                    continue
+                score = self.bomb_score(state, i, tile)
+                if score > best_score:
+                    best, best_score = tile, score
+            if best is not None:
+                targets[i] = best
+        return targets
+
+    def plan_bomb(self, state, i, blocking=None):
+        """
+        决定第 i 个守卫是否在所在瓦片放置炸弹。
+        Returns:
+            list | None: 应当放置时为撤离路线 (放置后沿它离开所有爆炸范围)，否则为 None。
+        """
+        guards = state.guards
+        tile = (guards.tile_x[i], guards.tile_y[i])
+        if tile in state.bombs or self.bomb_score(state, i, tile, blocking) <= 0:
+            return None
+        footprint = self.blasts.footprint(tile[0], tile[1])
+        route = self.escape_route(state, tile, footprint, state.tick + self.timeline.fuse_ticks)
+        return route or None # 没有撤离路线 (或者炸弹炸不到自己，不可能发生) 时不放置
@@ -0,0 +1,94 @@
+# guards.py - 守卫的结构数组 (struct-of-arrays) 存储
+# 所有守卫的同一项属性保存在同一个 array 中 (第 i 个守卫即各数组的第 i 项)，
+# 取代原先每项一个的 guard_* 字段。批量更新时只需遍历几个连续的数值数组，
+# 不必为每个守卫创建对象或做属性查找；路线、足迹等长度不定的数据放在普通列表中。
+
+from array import array
+
+from config import TILE_SIZE, GUARD_MAX_HP, GUARD_BOMB_COOLDOWN
+from visibility import FACING_DOWN
+
+
+class Guards:
+    """
+    N 个守卫的状态。
+    数值属性 (array)：
+        tile_x, tile_y      逻辑瓦片位置 (守卫中心所在的瓦片)
+        pixel_x, pixel_y    左上角像素位置
+        speed_x, speed_y    本帧速度
+        hp                  血量，降到 0 即被炸晕，不再移动和观察
+        facing              朝向编号 (见 visibility.FACINGS)，随移动方向改变，决定视野
+        path_index          当前前往的巡逻点
+        last_bomb_time      上次放置炸弹的仿真时间
+        wait_until          在此仿真时间之前原地等待炸弹爆炸
+    列表属性：
+        paths       巡逻点列表
+        routes      A* 规划出的、通往当前巡逻点的剩余瓦片
+        next_tiles  正在走向的相邻瓦片 (None 表示停在瓦片上)
+        retreats    撤离炸弹爆炸范围时依次经过的瓦片 (见 guardbrain)
+    """
+
+    __slots__ = (
+        "tile_x", "tile_y", "pixel_x", "pixel_y", "speed_x", "speed_y", "hp", "facing",
+        "path_index", "last_bomb_time", "wait_until",
+        "paths", "routes", "next_tiles", "retreats",
+    )
+
+    def __init__(self):
+        self.tile_x = array('i')
+        self.tile_y = array('i')
+        self.pixel_x = array('d')
+        self.pixel_y = array('d')
+        self.speed_x = array('d')
+        self.speed_y = array('d')
+        self.hp = array('i')
+        self.facing = array('b')
+        self.path_index = array('i')
+        self.last_bomb_time = array('d')
+        self.wait_until = array('d')
+        self.paths = []
+        self.routes = []
+        self.next_tiles = []
+        self.retreats = []
+
+    def add(self, start, path):
+        """
+        在 start 处加入一个守卫，path 为巡逻点列表。
+        Returns:
+            int: 新守卫的编号。
+        """
+        self.tile_x.append(start[0])
+        self.tile_y.append(start[1])
+        self.pixel_x.append(start[0] * TILE_SIZE)
+        self.pixel_y.append(start[1] * TILE_SIZE)
+        self.speed_x.append(0.0)
+        self.speed_y.append(0.0)
+        self.hp.append(GUARD_MAX_HP)
+        self.facing.append(FACING_DOWN) # 开局面朝下方
+        self.path_index.append(0)
+        self.last_bomb_time.append(-GUARD_BOMB_COOLDOWN) # 开局即可放置炸弹
+        self.wait_until.append(0.0)
+        self.paths.append(list(path))
+        self.routes.append([])
+        self.next_tiles.append(None)
+        self.retreats.append([])
+        return len(self.hp) - 1
+
+    def __len__(self):
+        return len(self.hp)
+
+    def active(self):
+        """仍未被炸晕的守卫编号。"""
+        return [i for i, hp in enumerate(self.hp) if hp > 0]
+
+    def total_hp(self):
+        """所有守卫的剩余血量之和 (血量条显示用)。"""
+        return sum(hp for hp in self.hp if hp > 0)
+
+    def all_stunned(self):
+        """是否所有守卫都已被炸晕。"""
+        return not self.hp or max(self.hp) <= 0
+
+    def tile_of(self, i):
+        """第 i 个守卫所在的瓦片坐标。"""
+        return self.tile_x[i], self.tile_y[i]
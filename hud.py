@@ -0,0 +1,173 @@
+# hud.py - 界面文字与血量条 (HUD)
+# 字体只加载一次：优先使用随游戏附带的 HUD_FONT_FILE，其次在系统字体中查找支持中文的字体，
+# 都没有时退回 pygame 自带字体 (中文会显示为方框)。每个字号只创建一个 Font 对象。
+# 渲染好的文字图片按 (文字, 字号, 颜色) 缓存在 TextCache 中 (LRU 淘汰)，结束画面等固定文字只渲染一次。
+# 血量条按填充宽度 (0 .. HEALTH_BAR_WIDTH 像素) 预先绘制好，血量变化时只换一张图片。
+# Hud 把玩家血量条、守卫血量条与宝藏计数合成到一张 Surface 上，只有这些数值变化时才重新合成，
+# 每帧只需把它贴到屏幕上 (一次 Surface.blits)。各部分都是不透明的 (文字带黑色底)，
+# 脏矩形渲染器每帧直接覆盖即可，不必先擦除 (半透明的抗锯齿边缘反复叠加会越来越深)。
+
+import os
+from collections import OrderedDict
+
+import pygame
+
+from config import (
+    HUD_FONT_FILE, HUD_SYSTEM_FONTS, HUD_FONT_SIZE, END_FONT_SIZE, TEXT_CACHE_SIZE,
+    HEALTH_BAR_WIDTH, HEALTH_BAR_HEIGHT, PLAYER_MAX_HP, GUARD_MAX_HP,
+    COLOR_BLACK, COLOR_WHITE, COLOR_HEALTH_GREEN, COLOR_HEALTH_RED,
+)
+
+HUD_MARGIN = 5            # HUD 元素与屏幕边缘的距离 (像素)
+END_OVERLAY_ALPHA = 170   # 结束画面文字背后半透明底板的不透明度
+END_OVERLAY_PADDING = 20
+
+_FONT_PATH = False # 尚未查找；查找后为字体文件路径，没有可用的中文字体时为 None
+_FONTS = {}        # 字号 -> pygame.font.Font
+_HEALTH_BARS = []  # 填充宽度 -> 血量条图片
+
+
+def font_path():
+    """
+    HUD 使用的字体文件 (只查找一次，pygame.font.match_font 会扫描系统字体目录，较慢)。
+    Returns:
+        str | None: 字体文件路径；None 表示使用 pygame 自带字体。
+    """
+    global _FONT_PATH
+    if _FONT_PATH is False:
+        bundled = os.path.join(os.path.dirname(os.path.abspath(__file__)), HUD_FONT_FILE)
+        if os.path.exists(bundled):
+            _FONT_PATH = bundled
+        else:
+            _FONT_PATH = pygame.font.match_font(HUD_SYSTEM_FONTS)
+            if _FONT_PATH is None:
+                print(f"警告: 未找到中文字体 (可将 TTF 字体放在 {HUD_FONT_FILE})，界面中文可能无法显示")
+    return _FONT_PATH
+
+
+def get_font(size):
+    """字号为 size 的共享 Font 对象。"""
+    font = _FONTS.get(size)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = _FONTS[size] = pygame.font.Font(font_path(), size)
+    return font
+
+
+class TextCache:
+    """
+    (文字, 字号, 颜色, 背景色) -> 渲染好的文字 Surface (也保存由文字合成的图片，如结束画面)，
+    最多保存 max_entries 条，超出时淘汰最久未使用的。
+    """
+
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+
+    def get(self, key, make):
+        """取出 key 对应的图片，没有时调用 make() 生成并放入缓存。"""
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        surface = self.surfaces[key] = make()
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def render(self, text, size, color, background=None):
+        """background 不为 None 时渲染为不透明图片 (抗锯齿边缘与背景色混合)。"""
+        return self.get((text, size, color, background),
+                        lambda: get_font(size).render(text, True, color, background))
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+TEXT_CACHE = TextCache() # 所有画面共用
+
+
+def health_bar(current_hp, max_hp):
+    """
+    血量为 current_hp / max_hp 时的血量条图片 (红色底、绿色填充、白色边框)。
+    所有可能的填充宽度在第一次调用时一起绘制好，之后只是列表索引。
+    """
+    if not _HEALTH_BARS:
+        for fill_width in range(HEALTH_BAR_WIDTH + 1):
+            bar = pygame.Surface((HEALTH_BAR_WIDTH, HEALTH_BAR_HEIGHT))
+            bar.fill(COLOR_HEALTH_RED)
+            bar.fill(COLOR_HEALTH_GREEN, (0, 0, fill_width, HEALTH_BAR_HEIGHT))
+            pygame.draw.rect(bar, COLOR_WHITE, bar.get_rect(), 1)
+            _HEALTH_BARS.append(bar)
+    if max_hp <= 0:
+        return _HEALTH_BARS[0]
+    fill_width = int(max(0, min(current_hp, max_hp)) * HEALTH_BAR_WIDTH / max_hp)
+    return _HEALTH_BARS[fill_width]
+
+
+class Hud:
+    """
+    固定在屏幕顶部的 HUD：左上角玩家血量条，右上角守卫血量条 (所有守卫血量之和)，中间为宝藏计数。
+    update() 在数值变化时重新合成，draw() 把合成好的图片贴到屏幕上。
+    """
+
+    def __init__(self, screen_width, text_cache=TEXT_CACHE):
+        self.screen_width = screen_width
+        self.text_cache = text_cache
+        self.height = max(HEALTH_BAR_HEIGHT, get_font(HUD_FONT_SIZE).get_height()) + 2 * HUD_MARGIN
+        self.surface = pygame.Surface((screen_width, self.height))
+        self.key = None
+        self.rects = [] # 合成图片中有内容的区域 (同时也是屏幕坐标)
+        self.blit_list = []
+
+    def update(self, state):
+        """
+        Returns:
+            list[pygame.Rect]: 内容变化时为新旧内容所在的屏幕矩形 (调用者需先擦除旧内容，例如变短的文字)，
+            否则为空列表。
+        """
+        guards = state.guards
+        key = (state.player_hp, guards.total_hp(), len(guards), state.got_treasures, state.total_treasures)
+        if key == self.key:
+            return []
+        self.key = key
+        old_rects = self.rects
+        self._compose(*key)
+        return old_rects + self.rects
+
+    def _compose(self, player_hp, guard_hp, guard_count, got_treasures, total_treasures):
+        surface = self.surface
+        player_bar = pygame.Rect(HUD_MARGIN, HUD_MARGIN, HEALTH_BAR_WIDTH, HEALTH_BAR_HEIGHT)
+        guard_bar = player_bar.move(self.screen_width - HEALTH_BAR_WIDTH - 2 * HUD_MARGIN, 0)
+        text = self.text_cache.render(f"宝藏 {got_treasures}/{total_treasures}", HUD_FONT_SIZE, COLOR_WHITE,
+                                      COLOR_BLACK)
+        text_rect = text.get_rect(midtop=(self.screen_width // 2, HUD_MARGIN))
+        surface.blit(health_bar(player_hp, PLAYER_MAX_HP), player_bar)
+        surface.blit(health_bar(guard_hp, GUARD_MAX_HP * guard_count), guard_bar)
+        surface.blit(text, text_rect)
+        self.rects = [player_bar, guard_bar, text_rect]
+        self.blit_list = [(surface, rect.topleft, rect) for rect in self.rects]
+
+    def draw(self, screen):
+        screen.blits(self.blit_list, False)
+
+
+def end_screen_overlay(message, color, text_cache=TEXT_CACHE):
+    """
+    游戏结束画面：文字与背后的半透明黑色底板合成的一张图片，按 (文字, 颜色) 缓存在 text_cache 中。
+    """
+    def make():
+        text = text_cache.render(message, END_FONT_SIZE, color)
+        overlay = pygame.Surface((text.get_width() + 2 * END_OVERLAY_PADDING,
+                                  text.get_height() + 2 * END_OVERLAY_PADDING), pygame.SRCALPHA)
+        overlay.fill(COLOR_BLACK + (END_OVERLAY_ALPHA,))
+        overlay.blit(text, (END_OVERLAY_PADDING, END_OVERLAY_PADDING))
+        return overlay
+    return text_cache.get(("overlay", message, color), make)
+
+
+def prerender_end_screens(messages, text_cache=TEXT_CACHE):
+    """启动时预先渲染所有结束画面 ((文字, 颜色) 的序列)，游戏结束时不再加载字体、渲染文字。"""
+    for message, color in messages:
+        end_screen_overlay(message, color, text_cache)
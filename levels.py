@@ -0,0 +1,204 @@
+# levels.py - 关卡流水线：难度递增与后台预生成
+# 当前关卡进行时，后续 LEVEL_PREFETCH 关已经在另一个进程中生成并验证完毕 (generate_level 保证可解)，
+# 以快照 (snapshot.dumps) 的形式传回主进程；主循环每帧再顺便预先绘制一个下一关开局视口的瓦片区块。
+# 过关时只需从快照恢复 GameState (500x500 的地图约 3 毫秒)，不再在两关之间同步生成地图。
+# 失败重玩同一关时直接再次读取同一份快照。
+#
+# 关卡难度：第 n 关的守卫数量与可炸开障碍物比例随 n 增加 (见 level_params)。
+# 每关的种子由本次游戏的基础种子与关卡序号决定，录像中记录种子与生成参数，仍可无窗口回放。
+
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from config import (
+    TILE_SIZE, LEVEL_PREFETCH, LEVEL_GUARD_GROWTH, LEVEL_MIN_TILES_PER_GUARD,
+    LEVEL_BOX_DENSITY_STEP, MAX_LEVEL_BOX_DENSITY,
+)
+from camera import Camera
+from maze import guard_count_for
+from mazegen import BOX_DENSITY
+from renderer import MazeLayer
+from replay import Replay
+from simulation import new_game_state
+from snapshot import dumps, loads
+
+
+def level_params(number, rows, cols):
+    """
+    第 number 关 (从 1 开始) 的难度参数。
+    Returns:
+        tuple: (守卫数量, maze_options)。
+    """
+    base_guards = guard_count_for(cols, rows)
+    max_guards = max(base_guards, cols * rows // LEVEL_MIN_TILES_PER_GUARD)
+    guard_count = min(max_guards, round(base_guards * (1 + LEVEL_GUARD_GROWTH * (number - 1))))
+    box_density = min(MAX_LEVEL_BOX_DENSITY, BOX_DENSITY + LEVEL_BOX_DENSITY_STEP * (number - 1))
+    return guard_count, {"box_density": round(box_density, 4)}
+
+
+def build_level(rows, cols, seed, algorithm, guard_count, maze_options):
+    """在工作进程中生成一关，返回快照数据 (bytes 可以直接传回主进程)。"""
+    return dumps(new_game_state(rows, cols, seed, algorithm, guard_count, maze_options))
+
+
+class Level:
+    """
+    一个已经生成好的关卡：生成参数、开局状态的快照，以及开局视口的预绘制区块。
+    """
+
+    def __init__(self, number, rows, cols, seed, algorithm, guard_count, maze_options, data):
+        self.number = number
+        self.rows = rows
+        self.cols = cols
+        self.seed = seed
+        self.algorithm = algorithm
+        self.guard_count = guard_count
+        self.maze_options = maze_options
+        self.data = data
+        self.layer = None         # 只用于预绘制的瓦片层 (绑定一份不会被修改的开局状态)
+        self.pending_chunks = None # 尚未绘制的开局视口区块
+
+    def prerender_step(self, view_width, view_height):
+        """
+        绘制一个开局视口中的瓦片区块 (主线程中调用，每次只做一小块工作)。
+        Returns:
+            bool: 是否还有区块没有绘制。
+        """
+        if self.layer is None:
+            state = loads(self.data)
+            self.layer = MazeLayer(state)
+            camera = Camera(view_width, view_height, self.cols * TILE_SIZE, self.rows * TILE_SIZE)
+            camera.follow(state.player_pixel_pos[0], state.player_pixel_pos[1])
+            self.pending_chunks = self.layer.chunk_keys(camera.view_rect())
+            return bool(self.pending_chunks)
+        if self.pending_chunks:
+            self.layer.get_chunk(*self.pending_chunks.pop())
+        return bool(self.pending_chunks)
+
+    def start(self):
+        """
+        开始 (或重新开始) 这一关。
+        Returns:
+            tuple: (GameState, 预绘制区块的副本)。区块会随地图被炸开而修改，因此每次开始都复制一份。
+        """
+        chunks = OrderedDict()
+        if self.layer is not None:
+            chunks = OrderedDict((key, surface.copy()) for key, surface in self.layer.chunks.items())
+        return loads(self.data), chunks
+
+    def replay(self):
+        """这一关的空白录像 (记录种子与生成参数，回放时重新生成同一张地图)。"""
+        return Replay(self.seed, self.rows, self.cols, self.algorithm, self.guard_count,
+                      maze_options=self.maze_options)
+
+
+class LevelPipeline:
+    """
+    关卡流水线。get(n) 返回第 n 关，并确保第 n+1 .. n+prefetch 关正在后台生成；
+    主循环每帧调用一次 update() 收取生成完毕的关卡并预绘制一个区块。
+    无法启动工作进程时退化为在 get() 中同步生成。
+    """
+
+    def __init__(self, rows, cols, algorithm, seed=None, prefetch=LEVEL_PREFETCH, view_size=None):
+        self.rows = rows
+        self.cols = cols
+        self.algorithm = algorithm
+        self.seed = seed if seed is not None else int.from_bytes(os.urandom(8), "little")
+        self.prefetch = prefetch
+        self.view_size = view_size
+        self.futures = {} # 关卡序号 -> (Future, 守卫数量, maze_options, 种子)
+        self.levels = {}  # 关卡序号 -> Level
+        try:
+            self.executor = ProcessPoolExecutor(max_workers=1)
+        except (OSError, NotImplementedError) as e:
+            print(f"错误: 无法启动关卡生成进程，将在两关之间同步生成地图。错误信息: {e}")
+            self.executor = None
+
+    def level_seed(self, number):
+        return (self.seed + number) % (1 << 64)
+
+    def _submit(self, number):
+        if number in self.levels or number in self.futures or self.executor is None:
+            return
+        guard_count, maze_options = level_params(number, self.rows, self.cols)
+        seed = self.level_seed(number)
+        try:
+            future = self.executor.submit(build_level, self.rows, self.cols, seed, self.algorithm,
+                                          guard_count, maze_options)
+        except (BrokenProcessPool, RuntimeError):
+            self.executor = None
+            return
+        self.futures[number] = (future, guard_count, maze_options, seed)
+
+    def _collect(self, number, wait):
+        """把第 number 关的后台结果转为 Level；wait 为 False 时尚未完成就返回 None。"""
+        future, guard_count, maze_options, seed = self.futures[number]
+        if not wait and not future.done():
+            return None
+        del self.futures[number]
+        try:
+            data = future.result()
+        except BrokenProcessPool:
+            self.executor = None
+            return None
+        except Exception as e: # 生成失败 (例如 generate_level 的 ValueError)：get() 会在主进程中重新生成
+            print(f"错误: 后台生成第 {number} 关失败，将在需要时同步生成。错误信息: {e}")
+            return None
+        return self._add_level(number, seed, guard_count, maze_options, data)
+
+    def _add_level(self, number, seed, guard_count, maze_options, data):
+        level = self.levels[number] = Level(number, self.rows, self.cols, seed, self.algorithm,
+                                            guard_count, maze_options, data)
+        return level
+
+    def get(self, number):
+        """
+        取得第 number 关 (已经预生成时立即返回，否则等待或同步生成)，并丢弃之前的关卡。
+        Returns:
+            Level
+        """
+        for old in [n for n in self.levels if n < number]:
+            del self.levels[old]
+        for old in [n for n in self.futures if n < number]:
+            self.futures.pop(old)[0].cancel()
+
+        level = self.levels.get(number)
+        if level is None and number in self.futures:
+            level = self._collect(number, wait=True)
+        if level is None: # 没有工作进程，工作进程意外退出，或后台生成失败
+            guard_count, maze_options = level_params(number, self.rows, self.cols)
+            seed = self.level_seed(number)
+            data = build_level(self.rows, self.cols, seed, self.algorithm, guard_count, maze_options)
+            level = self._add_level(number, seed, guard_count, maze_options, data)
+        self.prefetch_after(number)
+        return level
+
+    def prefetch_after(self, number):
+        """开始在后台生成第 number+1 .. number+prefetch 关。"""
+        for upcoming in range(number + 1, number + 1 + self.prefetch):
+            self._submit(upcoming)
+
+    def update(self):
+        """
+        每帧调用一次：收取已经生成完毕的关卡，并为最近的一个尚未预绘制完的关卡绘制一个区块。
+        """
+        for number in sorted(self.futures):
+            self._collect(number, wait=False)
+        if self.view_size is None:
+            return
+        for number in sorted(self.levels):
+            level = self.levels[number]
+            if level.pending_chunks is None or level.pending_chunks:
+                level.prerender_step(*self.view_size)
+                return
+
+    def close(self):
+        """结束工作进程 (不等待尚未完成的关卡)。"""
+        for future, _, _, _ in self.futures.values():
+            future.cancel()
+        self.futures.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
@@ -0,0 +1,164 @@
+# maze.py - 迷宫生成与元素放置
+
+import random
+
+from config import (
+    TREASURE_COUNT, MAZE_ALGORITHM, MAX_LEVEL_ATTEMPTS, MAX_LEVEL_BOMBS, GUARD_PATROL_RADIUS,
+    GUARD_TILES_PER_GUARD, GUARD_START_CLEARANCE,
+)
+from connectivity import bomb_region, reachable_region
+from mazegen import ALGORITHMS
+from tilegrid import make_tile_table
+
+# 可以放置玩家、守卫、宝藏和出口的瓦片：通路 (0) 或可炸开障碍物 (4)
+PLACEABLE_TABLE = make_tile_table((0, 4))
+
+# 每张地图至少需要的互不重叠的位置：玩家、一个守卫、宝藏和出口
+REQUIRED_TILES = TREASURE_COUNT + 3
+
+
+def generate_maze(rows, cols, rng=random, algorithm=MAZE_ALGORITHM, options=None):
+    """
+    用指定的算法生成一个迷宫 (可选算法见 mazegen.ALGORITHMS)。
+    rng 为随机数来源，传入带种子的 random.Random 可复现同一张地图。
+    options 为传给生成算法的额外参数，如 {"wall_density": 0.2, "box_density": 0.05}。
+    Returns:
+        TileGrid: 新生成的迷宫。
+    """
+    try:
+        generator = ALGORITHMS[algorithm]
+    except KeyError:
+        raise ValueError(f"未知的迷宫生成算法 '{algorithm}'，可选: {', '.join(ALGORITHMS)}") from None
+    return generator(cols, rows, rng, **(options or {}))
+
+
+def pick_tiles(current_maze, rng, count, region=None, exclude=(), bounds=None):
+    """
+    随机挑选 count 个互不相同的可放置瓦片 (0 或 4)。
+    region 不为 None 时只在该可到达区域内挑选；bounds=(x0, y0, x1, y1) 限定挑选的矩形范围 (含边界)。
+    先做随机采样 (与地图大小无关)，可放置区域很小导致采样失败时，再退回到枚举全部候选瓦片。
+    """
+    cols, rows = current_maze.cols, current_maze.rows
+    cells = current_maze.cells
+    taken = set(exclude)
+    chosen = []
+    x0, y0, x1, y1 = bounds if bounds is not None else (1, 1, cols - 2, rows - 2)
+    x0, y0, x1, y1 = max(1, x0), max(1, y0), min(cols - 2, x1), min(rows - 2, y1)
+
+    for _ in range(64 * count + 256):
+        if len(chosen) == count:
+            return chosen
+        pos = (rng.randint(x0, x1), rng.randint(y0, y1))
+        if pos in taken or not PLACEABLE_TABLE[cells[pos[1] * cols + pos[0]]]:
+            continue
+        if region is not None and pos not in region:
+            continue
+        chosen.append(pos)
+        taken.add(pos)
+
+    candidates = []
+    for r in range(y0, y1 + 1):
+        for c in range(x0, x1 + 1):
+            if PLACEABLE_TABLE[cells[r * cols + c]] and (c, r) not in taken and (region is None or (c, r) in region):
+                candidates.append((c, r))
+    rng.shuffle(candidates)
+    chosen.extend(candidates[:count - len(chosen)])
+    return chosen
+
+
+def guard_count_for(cols, rows):
+    """按地图面积决定守卫数量：每 GUARD_TILES_PER_GUARD 个瓦片一个，至少一个。"""
+    return max(1, cols * rows // GUARD_TILES_PER_GUARD)
+
+
+def place_game_elements(current_maze, rng=random, guard_count=1, max_bombs=None):
+    """
+    在当前生成的迷宫上放置玩家、守卫、宝藏和出口。
+    确保这些元素放置在可通行或可炸开的区域，并且不会彼此重叠。
+    守卫、宝藏和出口都只放在玩家能够到达的区域内 (允许炸开障碍物)，所以地图一定可解。
+    守卫出生点与玩家起点在横、纵方向上至少相距 GUARD_START_CLEARANCE 格。
+    Args:
+        current_maze (TileGrid): 刚生成的迷宫，会被原地修改。
+        guard_count (int): 守卫数量。
+        max_bombs (int | None): 若给出，所有元素只放在最多炸开 max_bombs 个障碍物就能到达的区域内
+            (connectivity.bomb_region)。
+    Returns:
+        tuple | None: (迷宫, 宝藏数量, 玩家起点, 守卫起点列表, 守卫巡逻路径列表)；
+        玩家所在的区域放不下所有元素时返回 None，由调用者重新生成地图。
+    """
+    # 放置玩家
+    picked = pick_tiles(current_maze, rng, 1)
+    if not picked:
+        return None
+    player_start = picked[0]
+
+    required = REQUIRED_TILES - 1 + guard_count
+    current_maze.set(player_start[0], player_start[1], 0) # 确保玩家起点是通路
+    if max_bombs is None:
+        region = reachable_region(current_maze, player_start)
+    else:
+        region = bomb_region(current_maze, player_start, max_bombs)
+    if len(region) < required:
+        return None
+
+    # 放置守卫、宝藏和出口 (都在玩家可到达的区域内)
+    picked = pick_tiles(current_maze, rng, required - 1, region, exclude=[player_start])
+    if len(picked) < required - 1:
+        return None
+    guard_starts = picked[:guard_count]
+    treasure_coords = picked[guard_count:-1]
+    exit_pos = picked[-1]
+
+    # 离玩家起点太近的守卫 (开局就能看到玩家) 改到 GUARD_START_CLEARANCE 以外重新挑选；
+    # 其余位置保持不变，没有守卫太近的地图与按同一种子生成的旧地图完全相同
+    px, py = player_start
+    too_close = [i for i, (gx, gy) in enumerate(guard_starts)
+                 if max(abs(gx - px), abs(gy - py)) < GUARD_START_CLEARANCE]
+    if too_close:
+        near = [(x, y) for y in range(py - GUARD_START_CLEARANCE + 1, py + GUARD_START_CLEARANCE)
+                for x in range(px - GUARD_START_CLEARANCE + 1, px + GUARD_START_CLEARANCE)]
+        replacements = pick_tiles(current_maze, rng, len(too_close), region, exclude=near + picked)
+        if len(replacements) < len(too_close):
+            return None
+        for i, pos in zip(too_close, replacements):
+            guard_starts[i] = pos
+
+    # 守卫所在区域至少包含玩家和守卫两个瓦片，因此守卫一定有可通行或可炸开的邻居
+    guard_paths = []
+    for guard_start in guard_starts:
+        current_maze.set(guard_start[0], guard_start[1], 0) # 确保守卫起点是通路
+
+        # 简化守卫路径：当前位置和附近随机选择的另一个可到达位置作为巡逻点 (守卫用 A* 在两点间往返)
+        guard_path = [guard_start]
+        gx, gy = guard_start
+        patrol_bounds = (gx - GUARD_PATROL_RADIUS, gy - GUARD_PATROL_RADIUS, gx + GUARD_PATROL_RADIUS, gy + GUARD_PATROL_RADIUS)
+        waypoint = pick_tiles(current_maze, rng, 1, region, exclude=[guard_start], bounds=patrol_bounds)
+        guard_path.extend(waypoint)
+        guard_paths.append(guard_path)
+
+    # 放置宝藏与出口
+    for tx, ty in treasure_coords:
+        current_maze.set(tx, ty, 2) # 放置宝藏
+    current_maze.set(exit_pos[0], exit_pos[1], 3)
+
+    return current_maze, len(treasure_coords), player_start, guard_starts, guard_paths
+
+
+def generate_level(rows, cols, rng=random, algorithm=MAZE_ALGORITHM, max_attempts=MAX_LEVEL_ATTEMPTS,
+                   guard_count=None, maze_options=None, max_bombs=MAX_LEVEL_BOMBS):
+    """
+    生成地图并放置元素，得到一张保证可解的关卡。
+    玩家所在的连通区域太小时丢弃整张地图并重新生成 (拒绝采样)。
+    guard_count 为 None 时按地图面积决定守卫数量 (见 guard_count_for)。
+    maze_options 原样传给 generate_maze；max_bombs 见 place_game_elements。
+    Returns:
+        tuple: 与 place_game_elements 相同。
+    """
+    if guard_count is None:
+        guard_count = guard_count_for(cols, rows)
+    for _ in range(max_attempts):
+        placed = place_game_elements(generate_maze(rows, cols, rng, algorithm, maze_options), rng, guard_count,
+                                     max_bombs)
+        if placed is not None:
+            return placed
+    raise ValueError(f"尝试 {max_attempts} 次仍无法生成 {cols}x{rows} 的可解地图，请增大地图尺寸")
@@ -0,0 +1,228 @@
+# mazegen.py - 迷宫生成算法
+# 每个算法都接受 (cols, rows, rng) 并返回一个四周为墙壁的 TileGrid。
+# 迷宫是否可解由 maze.place_game_elements 借助 connectivity 模块保证：
+# 所有元素都只放在玩家能够到达的区域内。
+#
+# 生成速度 (1000x1000，generate_maze)：scatter 约 6 毫秒、cellular 约 0.2 秒，两者都是整图运算；
+# 加障碍物 (add_loops / add_boxes) 也是整图运算。backtracker 约 0.7 秒、kruskal 约 0.9 秒：
+# 深度优先搜索与并查集只能逐个格点进行，循环里已只剩下标运算，仍需要接近一秒，
+# 大地图需要快速生成时应使用 scatter 或 cellular。
+
+import random
+
+from config import TILE_FLOOR, TILE_WALL, TILE_BOX
+from tilegrid import TileGrid, make_tile_table
+
+WALL_DENSITY = 0.15 # scatter 算法的墙壁比例
+BOX_DENSITY = 0.10  # 可炸开障碍物比例
+LOOP_DENSITY = 0.05 # 迷宫算法中把隔墙改为障碍物 (形成需要炸弹的捷径) 的比例
+
+_FLOOR_TABLE = make_tile_table((TILE_FLOOR,))
+_WALL_TABLE = make_tile_table((TILE_WALL,))
+
+
+def add_border(grid):
+    """把地图最外一圈设为墙壁。"""
+    cols, rows = grid.cols, grid.rows
+    cells = grid.cells
+    grid.fill_rect(0, 0, cols, 1, TILE_WALL)
+    grid.fill_rect(0, rows - 1, cols, 1, TILE_WALL)
+    cells[0::cols] = bytes([TILE_WALL]) * rows
+    cells[cols - 1::cols] = bytes([TILE_WALL]) * rows
+
+
+def scatter(cols, rows, rng=random, wall_density=WALL_DENSITY, box_density=BOX_DENSITY):
+    """
+    随机散布墙壁和可炸开障碍物 (原 generate_maze 的做法)。
+    每个瓦片取一个随机字节，再用 256 字节查找表一次性映射为瓦片类型，
+    整张地图的生成都在 C 层完成，1000x1000 也只需几毫秒。
+    """
+    wall_cut = int(256 * wall_density)
+    box_cut = wall_cut + int(256 * box_density)
+    table = bytes(TILE_WALL if value < wall_cut else TILE_BOX if value < box_cut else TILE_FLOOR
+                  for value in range(256))
+    grid = TileGrid(cols, rows, cells=rng.randbytes(cols * rows).translate(table))
+    add_border(grid)
+    return grid
+
+
+def _cell_grid(cols, rows):
+    """
+    迷宫算法共用的初始网格：全部为墙壁，奇数坐标上的格点 (共 cell_cols x cell_rows 个) 挖成通路。
+    每行格点用一次切片赋值完成。
+    Returns:
+        tuple: (grid, cell_cols, cell_rows)。
+    """
+    grid = TileGrid(cols, rows, fill=TILE_WALL)
+    cells = grid.cells
+    cell_cols = (cols - 1) // 2
+    cell_rows = (rows - 1) // 2
+    if cell_cols > 0:
+        row_floor = bytes([TILE_FLOOR]) * cell_cols
+        for cell_y in range(cell_rows):
+            start = (2 * cell_y + 1) * cols + 1
+            cells[start:start + 2 * cell_cols:2] = row_floor
+    return grid, cell_cols, cell_rows
+
+
+def recursive_backtracker(cols, rows, rng=random, box_density=BOX_DENSITY, loop_density=LOOP_DENSITY):
+    """
+    递归回溯 (深度优先) 迷宫：奇数坐标上的瓦片是格点，生成一棵覆盖所有格点的随机生成树，
+    得到走廊长而曲折的 "完美迷宫"。使用显式栈，避免大地图上的递归深度限制。
+    深度优先搜索只能逐格进行，循环里只做瓦片下标的加减：格点之间相距 2 个瓦片，隔墙在两者正中间。
+    """
+    grid, cell_cols, cell_rows = _cell_grid(cols, rows)
+    cells = grid.cells
+    if cell_cols <= 0 or cell_rows <= 0:
+        return grid
+
+    # unvisited[pad + 瓦片下标] 为 1 表示尚未访问的格点 (此时只有格点是通路)；
+    # 前后各留两行 0，越过地图上下边缘的邻居下标也不会越界
+    pad = 2 * cols
+    unvisited = bytearray(pad) + cells.translate(_FLOOR_TABLE) + bytearray(pad)
+    steps = (-2, 2, -2 * cols, 2 * cols) # 左、右、上、下
+    choice = rng.choice
+
+    start_x, start_y = rng.randrange(cell_cols), rng.randrange(cell_rows)
+    start = (2 * start_y + 1) * cols + 2 * start_x + 1
+    unvisited[pad + start] = 0
+    stack = [start]
+    while stack:
+        index = stack[-1]
+        at = pad + index
+        neighbors = [step for step in steps if unvisited[at + step]]
+        if not neighbors:
+            stack.pop()
+            continue
+        step = choice(neighbors)
+        unvisited[at + step] = 0
+        cells[index + step // 2] = TILE_FLOOR # 挖开隔墙
+        stack.append(index + step)
+
+    add_loops(grid, rng, loop_density)
+    add_boxes(grid, rng, box_density)
+    return grid
+
+
+def kruskal(cols, rows, rng=random, box_density=BOX_DENSITY, loop_density=LOOP_DENSITY):
+    """
+    随机 Kruskal 迷宫：把格点之间的所有隔墙随机排序，用并查集只挖开连接两个
+    不同连通分量的隔墙。与回溯法相比分岔更多、死路更短。
+    隔墙用瓦片下标表示 (左右两个格点之间的为正数，上下之间的取负数)，并查集直接以格点的瓦片下标为节点。
+    """
+    grid, cell_cols, cell_rows = _cell_grid(cols, rows)
+    cells = grid.cells
+    if cell_cols <= 0 or cell_rows <= 0:
+        return grid
+
+    parent = list(range(cols * rows))
+
+    # 按格点逐行排列：每个格点右边的隔墙在前、下面的隔墙在后 (最后一列没有右边，最后一行没有下面)
+    edges = []
+    for cell_y in range(cell_rows):
+        row = (2 * cell_y + 1) * cols
+        walls = []
+        for cell_x in range(cell_cols):
+            walls.append(row + 2 * cell_x + 2)
+            walls.append(-(row + cols + 2 * cell_x + 1))
+        if cell_y == cell_rows - 1:
+            del walls[1::2] # 最后一行
+            del walls[-1]   # 最后一列
+        else:
+            del walls[-2]   # 最后一列
+        edges.extend(walls)
+    rng.shuffle(edges)
+
+    for wall in edges:
+        if wall > 0:
+            root_a, root_b = wall - 1, wall + 1
+        else:
+            root_a, root_b = -wall - cols, -wall + cols
+        # 查找两个格点的根 (路径减半)；每条隔墙都要查找两次，这里展开成循环而不调用函数
+        while parent[root_a] != root_a:
+            parent[root_a] = root_a = parent[parent[root_a]]
+        while parent[root_b] != root_b:
+            parent[root_b] = root_b = parent[parent[root_b]]
+        if root_a != root_b:
+            parent[root_a] = root_b
+            cells[abs(wall)] = TILE_FLOOR
+
+    add_loops(grid, rng, loop_density)
+    add_boxes(grid, rng, box_density)
+    return grid
+
+
+def cellular_automata(cols, rows, rng=random, fill_ratio=0.45, steps=4, box_density=BOX_DENSITY):
+    """
+    元胞自动机洞穴：随机填充墙壁后反复平滑 (周围 8 格中墙壁不少于 5 个则成为墙壁)。
+    洞穴之间不一定连通，元素只会放在玩家所在的洞穴中。
+    """
+    grid = TileGrid(cols, rows)
+    cells = grid.cells
+    random_value = rng.random
+    cells[:] = bytes([TILE_WALL if random_value() < fill_ratio else TILE_FLOOR for _ in range(cols * rows)])
+    add_border(grid)
+
+    # 每个瓦片占一个字节 (墙壁为 1，通路为 0)，整张地图看作一个大整数：
+    # 把它左右移动 1 个字节、上下移动一行后相加，每个字节就是该瓦片周围 8 格中的墙壁数 (最多 8，不会进位)。
+    # 再给每个字节加 3，墙壁数不少于 5 的字节第 3 位为 1。全部运算在 C 中完成，不必逐格循环。
+    size = cols * rows
+    ones = int.from_bytes(b'\x01' * size, 'little')
+    threes = 3 * ones
+    row_shift = 8 * cols
+    for _ in range(steps):
+        value = int.from_bytes(cells, 'little')
+        vertical = value + (value << row_shift) + (value >> row_shift) # 本格与上下两格
+        walls = (vertical << 8) + (vertical >> 8) + (value << row_shift) + (value >> row_shift)
+        cells[:] = ((((walls + threes) >> 3) & ones)).to_bytes(size, 'little')
+        add_border(grid) # 最外一圈的计算结果跨越了行首行尾，直接恢复为墙壁
+
+    add_boxes(grid, rng, box_density)
+    return grid
+
+
+def _chance_table(density):
+    """把随机字节映射为 0/1 的查找表：每个字节为 1 的概率约为 density (精度 1/256)。"""
+    cut = int(256 * density)
+    return bytes(1 if value < cut else 0 for value in range(256))
+
+
+def add_loops(grid, rng, density):
+    """
+    把一部分分隔两条走廊的隔墙改为可炸开障碍物，给完美迷宫加上需要炸弹的捷径。
+    与 cellular_automata 的平滑相同，用一个字节一个瓦片的大整数整图计算：
+    左右 (平移 1 个字节) 或上下 (平移一行) 两边都是通路的墙壁为候选，再与随机字节的掩码按位与。
+    """
+    cols, rows = grid.cols, grid.rows
+    cells = grid.cells
+    size = cols * rows
+    floor = int.from_bytes(cells.translate(_FLOOR_TABLE), 'little')
+    walls = int.from_bytes(cells.translate(_WALL_TABLE), 'little')
+    chosen = int.from_bytes(rng.randbytes(size).translate(_chance_table(density)), 'little')
+    row_shift = 8 * cols
+    between = ((floor << 8) & (floor >> 8)) | ((floor << row_shift) & (floor >> row_shift))
+    # 墙壁 (1) 加上 3 成为障碍物 (4)，各字节之间不会进位
+    value = int.from_bytes(cells, 'little') + (TILE_BOX - TILE_WALL) * (walls & between & chosen)
+    cells[:] = value.to_bytes(size, 'little')
+
+
+def add_boxes(grid, rng, density):
+    """
+    把一部分通路改为可炸开障碍物 (每个通路瓦片的概率为 density)。
+    障碍物在连通性检查中可以通过，因此不会破坏可解性。地图边缘都是墙壁，不会被选中。
+    """
+    size = grid.cols * grid.rows
+    cells = grid.cells
+    floor = int.from_bytes(cells.translate(_FLOOR_TABLE), 'little')
+    chosen = int.from_bytes(rng.randbytes(size).translate(_chance_table(density)), 'little')
+    value = int.from_bytes(cells, 'little') + TILE_BOX * (floor & chosen)
+    cells[:] = value.to_bytes(size, 'little')
+
+
+# 算法名 -> 生成函数
+ALGORITHMS = {
+    "scatter": scatter,
+    "backtracker": recursive_backtracker,
+    "kruskal": kruskal,
+    "cellular": cellular_automata,
+}
@@ -0,0 +1,122 @@
+# netclient.py - 联机客户端与无窗口机器人客户端
+# NetClient 保存服务器权威状态的一份镜像 GameState：加入房间时读取完整快照，此后逐条应用增量，
+# 本地不运行仿真。机器人客户端在每条增量之后让 ThiefBot 根据镜像状态决定输入，
+# 输入变化时才发给服务器 (服务器保持上一次的输入)。
+#
+# 用法：先运行 python server.py，再运行 python netclient.py --bots 300
+# 在同一进程中启动 300 个机器人，各自新建一个房间，结束后打印结果与流量统计。
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+from config import NET_HOST, NET_PORT, TICK_RATE
+from bots import ThiefBot
+from netproto import (
+    MSG_INPUT, MSG_WELCOME, MSG_SNAPSHOT, MSG_DELTA, HEADER_SIZE,
+    apply_delta, pack_join, pack_message, read_message, unpack_welcome,
+)
+from replay import encode_input
+from snapshot import loads
+
+DEFAULT_MAX_TIME = 120.0 # 机器人单局最长游戏时间 (秒)，超时后断开
+
+
+class NetClient:
+    """一个联机连接与它的镜像状态。"""
+
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.room_id = None
+        self.role = None
+        self.state = None
+        self.bytes_received = 0
+        self.last_input = None
+
+    async def connect(self, host=NET_HOST, port=NET_PORT, room_id=0):
+        """连接服务器并加入房间 (0 表示新建)，等到收到完整快照为止。"""
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.writer.write(pack_join(room_id))
+        while self.state is None:
+            await self.receive()
+
+    async def receive(self):
+        """
+        读取并处理一条消息。
+        Returns:
+            int: 消息类型。
+        """
+        kind, payload = await read_message(self.reader)
+        self.bytes_received += len(payload) + HEADER_SIZE
+        if kind == MSG_DELTA:
+            apply_delta(self.state, payload)
+        elif kind == MSG_SNAPSHOT:
+            self.state = loads(payload)
+        elif kind == MSG_WELCOME:
+            self.room_id, self.role = unpack_welcome(payload)
+        return kind
+
+    def send_input(self, inputs):
+        """发送输入 (与上一次相同且不放置炸弹时省略)。"""
+        input_byte = encode_input(inputs)
+        if input_byte != self.last_input or inputs.place_bomb:
+            self.writer.write(pack_message(MSG_INPUT, bytes([input_byte])))
+            self.last_input = input_byte
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def run_bot(host, port, seed, max_time=DEFAULT_MAX_TIME):
+    """
+    一个机器人客户端：新建房间并一直玩到分出胜负、超时或被服务器断开。
+    Returns:
+        tuple: (结束原因或 "timeout" / "disconnected", 房间帧号, 收到的字节数)。
+    """
+    client = NetClient()
+    try:
+        await client.connect(host, port)
+        bot = ThiefBot(client.state, random.Random(seed))
+        state = client.state
+        while state.result is None and state.tick < max_time * TICK_RATE:
+            if await client.receive() == MSG_DELTA and state.result is None:
+                client.send_input(bot.act(state))
+        outcome = state.end_reason or "timeout"
+    except (asyncio.IncompleteReadError, ConnectionError):
+        outcome = "disconnected"
+    finally:
+        await client.close()
+    return outcome, client.state.tick if client.state is not None else 0, client.bytes_received
+
+
+async def run_bots(count, host, port, max_time=DEFAULT_MAX_TIME, seed=0):
+    """同时运行 count 个机器人客户端并打印汇总。"""
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_bot(host, port, seed + i, max_time) for i in range(count)))
+    elapsed = time.perf_counter() - start
+    outcomes = Counter(outcome for outcome, _, _ in results)
+    ticks = sum(tick for _, tick, _ in results)
+    received = sum(size for _, _, size in results)
+    print(f"{count} 个机器人，用时 {elapsed:.1f} 秒: " + "，".join(f"{k} {v}" for k, v in outcomes.most_common()))
+    if ticks:
+        print(f"平均每个房间每秒收到 {received / ticks * TICK_RATE:.0f} 字节 (含完整快照)")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="无窗口机器人联机客户端")
+    parser.add_argument("--host", default=NET_HOST)
+    parser.add_argument("--port", type=int, default=NET_PORT)
+    parser.add_argument("--bots", type=int, default=1, help="同时运行的机器人数量 (每个机器人一个房间)")
+    parser.add_argument("--max-time", type=float, default=DEFAULT_MAX_TIME, help="单局最长游戏时间 (秒)")
+    parser.add_argument("--seed", type=int, default=0, help="第一个机器人的随机种子")
+    args = parser.parse_args()
+    asyncio.run(run_bots(args.bots, args.host, args.port, args.max_time, args.seed))
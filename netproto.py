@@ -0,0 +1,205 @@
+# netproto.py - 联机协议：消息分帧与增量快照
+# 服务器 (server.py) 运行权威仿真，客户端 (netclient.py) 只保存一份镜像 GameState。
+# 加入房间时服务器先发送一份完整快照 (snapshot.dumps)，此后每 NET_SEND_TICKS 帧发送一条增量：
+# 只包含被炸开或被拾取的瓦片、移动过 (或血量、朝向变化) 的守卫、新放置 / 已消失的炸弹与爆炸火焰，
+# 以及玩家的位置和进度。TCP 保证消息按序到达，增量总是相对于上一条消息，无需确认与重传。
+# 增量中的每一项都是新值而不是差值，重复应用无害，因此中途加入的客户端收到完整快照后可以直接应用下一条增量。
+#
+# 消息格式 (小端)：负载长度 (u32)、消息类型 (u8)、负载
+#   MSG_JOIN      客户端 -> 服务器  房间号 (u32，0 表示自动分配)
+#   MSG_INPUT     客户端 -> 服务器  一个输入字节 (replay.encode_input)，服务器保持到下一次输入为止
+#   MSG_WELCOME   服务器 -> 客户端  房间号 (u32)、角色 (ROLE_THIEF / ROLE_SPECTATOR)
+#   MSG_SNAPSHOT  服务器 -> 客户端  完整快照
+#   MSG_DELTA     服务器 -> 客户端  增量快照 (见 DeltaEncoder)
+
+import struct
+from array import array
+
+from simulation import END_REASONS
+
+MSG_JOIN = 1
+MSG_INPUT = 2
+MSG_WELCOME = 3
+MSG_SNAPSHOT = 4
+MSG_DELTA = 5
+
+ROLE_THIEF = 0
+ROLE_SPECTATOR = 1
+
+_FRAME = struct.Struct("<IB")
+HEADER_SIZE = _FRAME.size
+_ROOM = struct.Struct("<I")
+_WELCOME = struct.Struct("<IB")
+# 帧号、玩家像素位置、玩家瓦片位置、玩家血量、已收集宝藏数、胜负结果、结束原因、
+# 变化的瓦片 / 守卫数量、新增 / 消失的炸弹数量、新增 / 消失的爆炸火焰数量
+_DELTA = struct.Struct("<IddiiiiBBIIIIII")
+_TILE = struct.Struct("<iiB")
+_GUARD = struct.Struct("<Iddiiibii") # 编号、像素位置、瓦片位置、血量、朝向、正在走向的瓦片 (没有时为 -1, -1)
+_BOMB = struct.Struct("<iiIB")
+_EXPLOSION = struct.Struct("<iiI")
+_POS = struct.Struct("<ii")
+
+RESULTS = (None, "won", "lost")
+REASONS = (None,) + tuple(END_REASONS)
+OWNERS = ("player", "guard")
+
+
+def pack_message(kind, payload=b""):
+    """给负载加上长度与类型。"""
+    return _FRAME.pack(len(payload), kind) + payload
+
+
+async def read_message(reader):
+    """
+    从 asyncio.StreamReader 读取一条消息。
+    Returns:
+        tuple: (消息类型, 负载 bytes)。连接关闭时抛出 asyncio.IncompleteReadError。
+    """
+    length, kind = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+    payload = await reader.readexactly(length) if length else b""
+    return kind, payload
+
+
+def pack_join(room_id=0):
+    return pack_message(MSG_JOIN, _ROOM.pack(room_id))
+
+def unpack_join(payload):
+    return _ROOM.unpack(payload)[0]
+
+def pack_welcome(room_id, role):
+    return pack_message(MSG_WELCOME, _WELCOME.pack(room_id, role))
+
+def unpack_welcome(payload):
+    return _WELCOME.unpack(payload)
+
+
+def _dict_changes(current, sent):
+    """
+    Returns:
+        tuple: (新增或值改变的键, 消失的键)。同一瓦片上的炸弹 (或火焰) 在两条消息之间消失又出现时，
+        放置帧号不同，作为新增发送。
+    """
+    if current == sent: # 大多数帧没有炸弹变化
+        return (), ()
+    return ([key for key, value in current.items() if sent.get(key) != value],
+            [key for key in sent if key not in current])
+
+
+class DeltaEncoder:
+    """
+    服务器端：记录自上一条消息以来的变化，encode() 生成增量并以当前状态作为新的基准。
+    瓦片变化来自地图监听器；守卫、炸弹、爆炸与上一次发送的副本比较。
+    """
+
+    def __init__(self, state):
+        self.state = state
+        self.changed_tiles = {} # (x, y) -> 新瓦片
+        self._remember()
+        state.add_tile_listener(self.on_tile_changed)
+
+    def on_tile_changed(self, x, y, old_tile, new_tile):
+        self.changed_tiles[(x, y)] = new_tile
+
+    def _remember(self):
+        state = self.state
+        guards = state.guards
+        self.sent_guards = (array('d', guards.pixel_x), array('d', guards.pixel_y),
+                            array('i', guards.hp), array('b', guards.facing), list(guards.next_tiles))
+        self.sent_bombs = dict(state.bombs)
+        self.sent_explosions = dict(state.explosions)
+
+    def _changed_guards(self):
+        """位置、血量、朝向或正在走向的瓦片与上次发送时不同的守卫编号。"""
+        guards = self.state.guards
+        current = (guards.pixel_x, guards.pixel_y, guards.hp, guards.facing, guards.next_tiles)
+        if current == self.sent_guards: # array 的比较在 C 中完成，有变化时才逐个比较
+            return []
+        return [i for i, (new, old) in enumerate(zip(zip(*current), zip(*self.sent_guards))) if new != old]
+
+    def encode(self):
+        """
+        Returns:
+            bytes: 一条完整的 MSG_DELTA 消息。
+        """
+        state = self.state
+        guards = state.guards
+        moved = self._changed_guards()
+        bombs = state.bombs
+        explosions = state.explosions
+        added_bombs, removed_bombs = _dict_changes(bombs, self.sent_bombs)
+        added_explosions, removed_explosions = _dict_changes(explosions, self.sent_explosions)
+
+        out = bytearray(_DELTA.pack(
+            state.tick, state.player_pixel_pos[0], state.player_pixel_pos[1],
+            state.player_tile_pos[0], state.player_tile_pos[1], state.player_hp, state.got_treasures,
+            RESULTS.index(state.result), REASONS.index(state.end_reason),
+            len(self.changed_tiles), len(moved), len(added_bombs), len(removed_bombs),
+            len(added_explosions), len(removed_explosions)))
+        for (x, y), tile in self.changed_tiles.items():
+            out += _TILE.pack(x, y, tile)
+        next_tiles = guards.next_tiles
+        for i in moved:
+            next_x, next_y = next_tiles[i] or (-1, -1)
+            out += _GUARD.pack(i, guards.pixel_x[i], guards.pixel_y[i], guards.tile_x[i], guards.tile_y[i],
+                               guards.hp[i], guards.facing[i], next_x, next_y)
+        for pos in added_bombs:
+            x, y, placed_tick, owner = bombs[pos]
+            out += _BOMB.pack(x, y, placed_tick, OWNERS.index(owner))
+        for x, y in removed_bombs:
+            out += _POS.pack(x, y)
+        for pos in added_explosions:
+            out += _EXPLOSION.pack(pos[0], pos[1], explosions[pos])
+        for x, y in removed_explosions:
+            out += _POS.pack(x, y)
+
+        self.changed_tiles = {}
+        self._remember()
+        return pack_message(MSG_DELTA, bytes(out))
+
+
+def apply_delta(state, payload):
+    """
+    客户端：把增量应用到镜像状态上。瓦片经 set_tile 修改，碰撞掩码、视野缓存、瓦片层等监听器随之更新。
+    """
+    (tick, pixel_x, pixel_y, tile_x, tile_y, player_hp, got_treasures, result, reason,
+     tile_count, guard_count, bombs_added, bombs_removed, explosions_added,
+     explosions_removed) = _DELTA.unpack_from(payload, 0)
+    pos = _DELTA.size
+    state.tick = tick
+    state.player_pixel_pos[:] = [pixel_x, pixel_y]
+    state.player_tile_pos[:] = [tile_x, tile_y]
+    state.player_hp = player_hp
+    state.got_treasures = got_treasures
+    state.result = RESULTS[result]
+    state.end_reason = REASONS[reason]
+
+    for _ in range(tile_count):
+        x, y, tile = _TILE.unpack_from(payload, pos)
+        pos += _TILE.size
+        state.set_tile(x, y, tile)
+    guards = state.guards
+    for _ in range(guard_count):
+        i, guard_x, guard_y, guard_tile_x, guard_tile_y, hp, facing, next_x, next_y = _GUARD.unpack_from(payload, pos)
+        pos += _GUARD.size
+        guards.pixel_x[i] = guard_x
+        guards.pixel_y[i] = guard_y
+        guards.tile_x[i] = guard_tile_x
+        guards.tile_y[i] = guard_tile_y
+        guards.hp[i] = hp
+        guards.facing[i] = facing
+        guards.next_tiles[i] = (next_x, next_y) if next_x >= 0 else None
+    for _ in range(bombs_added):
+        x, y, placed_tick, owner = _BOMB.unpack_from(payload, pos)
+        pos += _BOMB.size
+        state.bombs[(x, y)] = (x, y, placed_tick, OWNERS[owner])
+    for _ in range(bombs_removed):
+        state.bombs.pop(_POS.unpack_from(payload, pos), None)
+        pos += _POS.size
+    for _ in range(explosions_added):
+        x, y, start_tick = _EXPLOSION.unpack_from(payload, pos)
+        pos += _EXPLOSION.size
+        state.explosions[(x, y)] = start_tick
+    for _ in range(explosions_removed):
+        state.explosions.pop(_POS.unpack_from(payload, pos), None)
+        pos += _POS.size
+    state.blast_timeline.sync(state) # 炸弹不经过 place_bomb / detonate 修改，按差异更新爆炸时间表
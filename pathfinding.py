@@ -0,0 +1,196 @@
+# pathfinding.py - 守卫寻路
+# astar: 基于二叉堆的 A* 寻路，用于守卫在巡逻点之间移动。
+# FlowField: 以玩家所在瓦片为终点的 Dijkstra 距离场，每次玩家换格或地图变化时更新一次，
+# 所有守卫共用；守卫每帧只需比较四个邻居的距离即可决定下一步 (O(1))。
+# 可炸开障碍物 (4) 可以通过，但要额外付出 BOX_PATH_COST 的代价 (守卫需要先炸开它)。
+
+import heapq
+
+from config import BOX_PATH_COST, FLOW_FIELD_RADIUS, PATH_SEARCH_LIMIT, TILE_BOX, TILE_WALL
+
+
+def make_cost_table(box_cost=BOX_PATH_COST):
+    """
+    构造进入每种瓦片的移动代价表：墙壁为 0 (表示不可通过)，障碍物为 1 + box_cost，其余为 1。
+    """
+    table = [1] * 256
+    table[TILE_WALL] = 0
+    table[TILE_BOX] = 1 + box_cost
+    return table
+
+MOVE_COSTS = make_cost_table()
+
+
+def astar(grid, start, goal, costs=MOVE_COSTS, max_nodes=PATH_SEARCH_LIMIT, avoid=()):
+    """
+    A* 寻路 (4 邻接，曼哈顿距离启发)。
+    Args:
+        grid (TileGrid): 迷宫。
+        start, goal (tuple): 起点与终点瓦片坐标。
+        costs (list): 进入每种瓦片的代价表，0 表示不可通过。
+        max_nodes (int): 最多展开的节点数，超过则视为找不到路径。
+        avoid (set): 额外视为不可通过的瓦片 (例如小偷机器人要绕开的守卫视野)。
+    Returns:
+        list | None: 从起点的下一格到终点的瓦片列表 (起点即终点时为空列表)；找不到路径时为 None。
+    """
+    cols, rows = grid.cols, grid.rows
+    cells = grid.cells
+    start_index = start[1] * cols + start[0]
+    goal_index = goal[1] * cols + goal[0]
+    goal_x, goal_y = goal
+    if start_index == goal_index:
+        return []
+    if not costs[cells[goal_index]]:
+        return None
+
+    g_score = {start_index: 0}
+    came_from = {}
+    open_heap = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), 0, start_index)]
+    expanded = 0
+
+    while open_heap:
+        _, g, index = heapq.heappop(open_heap)
+        if index == goal_index:
+            path = []
+            while index != start_index:
+                path.append((index % cols, index // cols))
+                index = came_from[index]
+            path.reverse()
+            return path
+        if g > g_score[index]:
+            continue # 堆中过期的条目
+        expanded += 1
+        if expanded > max_nodes:
+            return None
+
+        x, y = index % cols, index // cols
+        for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if not (0 <= nx < cols and 0 <= ny < rows):
+                continue
+            neighbor = ny * cols + nx
+            step_cost = costs[cells[neighbor]]
+            if not step_cost or (avoid and (nx, ny) in avoid):
+                continue
+            new_g = g + step_cost
+            if new_g < g_score.get(neighbor, new_g + 1):
+                g_score[neighbor] = new_g
+                came_from[neighbor] = index
+                heapq.heappush(open_heap, (new_g + abs(nx - goal_x) + abs(ny - goal_y), new_g, neighbor))
+    return None
+
+
+class FlowField:
+    """
+    以 target 为终点的距离场：distances[下标] 为从该瓦片走到终点的最小代价。
+    只计算到 radius 为止，因此重建开销与地图大小无关。
+    注册为 GameState 的地图监听器后，障碍物被炸开时会增量修复，而不是整张重算。
+    """
+
+    def __init__(self, grid, radius=FLOW_FIELD_RADIUS, costs=MOVE_COSTS):
+        self.grid = grid
+        self.radius = radius
+        self.costs = costs
+        self.target = None
+        self.distances = {}
+        self.dirty = False # 某个瓦片变得更难通过时，下一次 retarget 需要整张重建
+
+    def retarget(self, x, y):
+        """把终点设为 (x, y)；终点未变且距离场有效时什么也不做。"""
+        if (x, y) != self.target or self.dirty:
+            self.target = (x, y)
+            self.rebuild()
+
+    def rebuild(self):
+        """从终点出发做一次有半径限制的 Dijkstra。"""
+        grid = self.grid
+        target_index = self.target[1] * grid.cols + self.target[0]
+        self.distances = {target_index: 0}
+        self.dirty = False
+        self._propagate([(0, target_index)])
+
+    def _propagate(self, heap):
+        """从堆中的节点继续 Dijkstra 松弛 (重建与增量修复共用)。"""
+        grid = self.grid
+        cols, rows = grid.cols, grid.rows
+        cells = grid.cells
+        costs = self.costs
+        radius = self.radius
+        distances = self.distances
+        heapq.heapify(heap)
+        while heap:
+            dist, index = heapq.heappop(heap)
+            if dist > distances.get(index, dist):
+                continue
+            step_cost = costs[cells[index]]
+            if not step_cost:
+                continue
+            new_dist = dist + step_cost # 邻居走进本瓦片的代价
+            if new_dist > radius:
+                continue
+            x, y = index % cols, index // cols
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if not (0 <= nx < cols and 0 <= ny < rows):
+                    continue
+                neighbor = ny * cols + nx
+                if costs[cells[neighbor]] and new_dist < distances.get(neighbor, new_dist + 1):
+                    distances[neighbor] = new_dist
+                    heapq.heappush(heap, (new_dist, neighbor))
+
+    def on_tile_changed(self, x, y, old_tile, new_tile):
+        """
+        地图变化监听器。瓦片变得更容易通过 (障碍物被炸开) 时，只从该瓦片出发做递减松弛；
+        变得更难通过时标记为需要整张重建。
+        """
+        old_cost = self.costs[old_tile]
+        new_cost = self.costs[new_tile]
+        if old_cost == new_cost or self.target is None:
+            return
+        if not new_cost or (old_cost and new_cost > old_cost):
+            self.dirty = True
+            return
+
+        grid = self.grid
+        cols, rows = grid.cols, grid.rows
+        cells = grid.cells
+        distances = self.distances
+        index = y * cols + x
+        # 原先不可通过的瓦片此时才有距离
+        for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if 0 <= nx < cols and 0 <= ny < rows:
+                neighbor = ny * cols + nx
+                if neighbor in distances:
+                    candidate = distances[neighbor] + self.costs[cells[neighbor]]
+                    if candidate <= self.radius and candidate < distances.get(index, candidate + 1):
+                        distances[index] = candidate
+        if index in distances:
+            self._propagate([(distances[index], index)])
+
+    def distance(self, x, y):
+        """从 (x, y) 走到终点的代价；超出半径或不可到达时为 None。"""
+        return self.distances.get(y * self.grid.cols + x)
+
+    def next_step(self, x, y):
+        """
+        从 (x, y) 朝终点走的下一格；已经在终点或不在距离场内时返回 None。
+        """
+        grid = self.grid
+        cols, rows = grid.cols, grid.rows
+        cells = grid.cells
+        distances = self.distances
+        best = None
+        best_cost = None
+        for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if not (0 <= nx < cols and 0 <= ny < rows):
+                continue
+            neighbor = ny * cols + nx
+            dist = distances.get(neighbor)
+            if dist is None:
+                continue
+            total = dist + self.costs[cells[neighbor]]
+            if best_cost is None or total < best_cost:
+                best = (nx, ny)
+                best_cost = total
+        current = distances.get(y * cols + x)
+        if best is None or current == 0:
+            return None
+        return best
@@ -0,0 +1,249 @@
+# profiler.py - 可选的逐帧性能剖析
+# 用 time.perf_counter_ns 统计每一帧中各个阶段 (事件处理、仿真、炸弹结算、玩家与守卫移动、
+# 瓦片层与精灵绘制、屏幕更新等) 花费的时间，保留最近 PROFILE_WINDOW 帧，
+# 给出 p50 / p95 / p99，可在屏幕上叠加显示，并导出为 CSV 或 Chrome trace (chrome://tracing、Perfetto)。
+#
+# 仿真和渲染函数中没有任何计时代码：启用时 instrument() 把要统计的模块函数、类方法替换成计时包装，
+# 退出时 restore() 换回原函数。未启用时主循环使用什么也不做的 NULL_PROFILER，每帧只多几次空调用。
+# 用法：python main.py --profile，游戏中按 F3 显示/隐藏叠加层，退出时结果保存在 PROFILE_DIR 下。
+
+import csv
+import functools
+import json
+import os
+import time
+from collections import deque
+
+import pygame
+
+from config import PROFILE_WINDOW, PROFILE_TRACE_EVENTS, PROFILE_DIR, COLOR_WHITE, COLOR_BLACK
+
+FRAME = "frame" # 整帧耗时 (两次 end_frame 之间)
+
+OVERLAY_REFRESH_FRAMES = 30 # 叠加层文字每隔多少帧重新生成一次
+OVERLAY_MARGIN = 5
+
+
+def percentile(sorted_values, fraction):
+    """已排序序列的分位数 (最近秩法)。"""
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+class _Phase:
+    """with 语句用的计时区段，可重复使用 (见 FrameProfiler.phase)。"""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.add(self.name, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+
+class _NullPhase:
+    """未启用剖析时的计时区段：什么也不做。"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+
+class NullProfiler:
+    """
+    未启用剖析时使用的替身，接口与 FrameProfiler 的逐帧部分相同，所有方法什么也不做，
+    主循环因此不必到处判断是否启用了剖析。
+    """
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def end_frame(self):
+        pass
+
+    def toggle_overlay(self):
+        pass
+
+    def draw_overlay(self, screen):
+        return None
+
+NULL_PROFILER = NullProfiler()
+
+
+class FrameProfiler:
+    """
+    逐帧统计各阶段耗时。一个阶段在一帧中被调用多次 (例如一帧推进了两次 step) 时累加。
+    """
+
+    def __init__(self, window=PROFILE_WINDOW, trace_events=PROFILE_TRACE_EVENTS):
+        self.names = [FRAME]
+        self.totals = {FRAME: 0}         # 阶段名 -> 本帧累计纳秒
+        self.history = {FRAME: deque(maxlen=window)} # 阶段名 -> 最近每帧的耗时 (纳秒)
+        self.frame_numbers = deque(maxlen=window)
+        self.trace = deque(maxlen=trace_events) # (阶段名, 开始纳秒, 持续纳秒)
+        self.patched = []                # (对象, 属性名, 原函数)
+        self.phases = {}
+        self.origin = time.perf_counter_ns()
+        self.frame_start = self.origin
+        self.frame = 0
+        self.overlay = None              # 缓存的叠加层 Surface
+        self.overlay_visible = True
+        self.font = None
+
+    # --- 采集 ---
+
+    def _register(self, name):
+        if name not in self.totals:
+            self.names.append(name)
+            self.totals[name] = 0
+            self.history[name] = deque([0] * len(self.frame_numbers), maxlen=self.history[FRAME].maxlen)
+
+    def add(self, name, start_ns, duration_ns):
+        """记录一次耗时 duration_ns 的调用。"""
+        self.totals[name] += duration_ns
+        self.trace.append((name, start_ns, duration_ns))
+
+    def phase(self, name):
+        """返回一个计时区段，用法：with profiler.phase("events"): ..."""
+        phase = self.phases.get(name)
+        if phase is None:
+            self._register(name)
+            phase = self.phases[name] = _Phase(self, name)
+        return phase
+
+    def instrument(self, owner, attribute, name=None):
+        """把 owner (模块或类) 上的函数 attribute 替换为计时包装。"""
+        name = name or attribute
+        self._register(name)
+        func = getattr(owner, attribute)
+        add = self.add
+        clock = time.perf_counter_ns
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add(name, start, clock() - start)
+
+        self.patched.append((owner, attribute, func))
+        setattr(owner, attribute, timed)
+
+    def restore(self):
+        """换回所有被替换的函数。"""
+        for owner, attribute, func in reversed(self.patched):
+            setattr(owner, attribute, func)
+        self.patched = []
+
+    def end_frame(self):
+        """一帧结束：把各阶段本帧的累计耗时存入历史，并开始新的一帧。"""
+        now = time.perf_counter_ns()
+        totals = self.totals
+        totals[FRAME] = now - self.frame_start
+        self.trace.append((FRAME, self.frame_start, totals[FRAME]))
+        history = self.history
+        for name in self.names:
+            history[name].append(totals[name])
+            totals[name] = 0
+        self.frame_numbers.append(self.frame)
+        self.frame += 1
+        self.frame_start = now
+
+    # --- 统计与导出 ---
+
+    def summary(self):
+        """
+        Returns:
+            list[tuple]: 每个阶段的 (阶段名, p50, p95, p99, 最大值)，单位为毫秒。
+        """
+        rows = []
+        for name in self.names:
+            values = sorted(self.history[name])
+            rows.append((name, percentile(values, 0.50) / 1e6, percentile(values, 0.95) / 1e6,
+                         percentile(values, 0.99) / 1e6, (values[-1] if values else 0) / 1e6))
+        return rows
+
+    def save_csv(self, path):
+        """保存最近 PROFILE_WINDOW 帧的逐帧耗时：每帧一行，每个阶段一列 (毫秒)。"""
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + self.names)
+            columns = [self.history[name] for name in self.names]
+            for row in zip(self.frame_numbers, *columns):
+                writer.writerow([row[0]] + [f"{value / 1e6:.4f}" for value in row[1:]])
+
+    def save_chrome_trace(self, path):
+        """保存最近的调用记录为 Chrome trace 格式 (时间单位为微秒)。"""
+        origin = self.origin
+        events = [{"name": name, "ph": "X", "pid": 1, "tid": 0 if name == FRAME else 1,
+                   "ts": (start - origin) / 1000, "dur": duration / 1000}
+                  for name, start, duration in self.trace]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def save(self, directory=PROFILE_DIR):
+        """
+        把 CSV 与 Chrome trace 保存到 directory 中，并在控制台打印各阶段的分位数。
+        Returns:
+            tuple: (CSV 路径, trace 路径)。
+        """
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, time.strftime("profile-%Y%m%d-%H%M%S"))
+        self.save_csv(stem + ".csv")
+        self.save_chrome_trace(stem + ".json")
+        print(f"{'阶段':<20}{'p50':>9}{'p95':>9}{'p99':>9}{'最大':>9}  (毫秒，最近 {len(self.frame_numbers)} 帧)")
+        for name, p50, p95, p99, worst in self.summary():
+            print(f"{name:<22}{p50:>9.3f}{p95:>9.3f}{p99:>9.3f}{worst:>9.3f}")
+        return stem + ".csv", stem + ".json"
+
+    # --- 屏幕叠加层 ---
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+
+    def _render_overlay(self):
+        """重新生成叠加层：每个阶段一行 p50 / p95 / p99。"""
+        if self.font is None:
+            self.font = pygame.font.Font(None, 16)
+        lines = [f"{'phase':<20} {'p50':>6} {'p95':>6} {'p99':>6} ms"]
+        lines += [f"{name:<20} {p50:6.2f} {p95:6.2f} {p99:6.2f}" for name, p50, p95, p99, _ in self.summary()]
+        surfaces = [self.font.render(line, True, COLOR_WHITE) for line in lines]
+        width = max(surface.get_width() for surface in surfaces) + 2 * OVERLAY_MARGIN
+        line_height = self.font.get_linesize()
+        overlay = pygame.Surface((width, line_height * len(lines) + 2 * OVERLAY_MARGIN))
+        overlay.fill(COLOR_BLACK)
+        overlay.set_alpha(200)
+        overlay.blits([(surface, (OVERLAY_MARGIN, OVERLAY_MARGIN + i * line_height))
+                       for i, surface in enumerate(surfaces)], doreturn=False)
+        self.overlay = overlay
+
+    def draw_overlay(self, screen):
+        """
+        在屏幕左下角绘制叠加层 (文字每 OVERLAY_REFRESH_FRAMES 帧才重新生成)。
+        Returns:
+            pygame.Rect | None: 叠加层占据的屏幕矩形；隐藏时为 None。
+        """
+        if not self.overlay_visible:
+            return None
+        if self.overlay is None or self.frame % OVERLAY_REFRESH_FRAMES == 0:
+            self._render_overlay()
+        rect = self.overlay.get_rect(bottomleft=(OVERLAY_MARGIN, screen.get_height() - OVERLAY_MARGIN))
+        screen.blit(self.overlay, rect)
+        return rect
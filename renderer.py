@@ -0,0 +1,409 @@
+# renderer.py - 绘图函数与脏矩形渲染器
+# 迷宫的静态瓦片层按区块预先绘制到离屏 Surface 上，只有被 set_tile 修改过的瓦片才会重绘；
+# 摄像机不动时，每帧只把精灵、爆炸、视线和 HUD (血量条、宝藏计数) 所在的矩形推送给 pygame.display.update。
+# 所有绘图函数都接受 offset (摄像机偏移)，世界像素坐标减去 offset 即为屏幕坐标。
+# 精灵按图层 (守卫、玩家、炸弹、爆炸火焰) 收集当前动画帧与位置，每层调用一次 Surface.blits (见 animation.py)。
+
+import json
+from collections import OrderedDict
+
+import pygame
+
+from config import (
+    TILE_SIZE, CHUNK_SIZE, MAX_CACHED_CHUNKS, GUARD_SIGHT_RANGE,
+    COLOR_BLACK, COLOR_GRAY, COLOR_GREEN, COLOR_RED, COLOR_BLUE,
+    COLOR_YELLOW, COLOR_LIGHT_RED, COLOR_ORANGE, COLOR_BROWN,
+)
+from simulation import guard_sight_tiles
+from camera import Camera
+from hud import Hud
+from animation import FrameCache, SpriteAnimator, guard_frame, bomb_frames, explosion_frames
+from build_assets import ATLAS_IMAGE, ATLAS_MANIFEST, SPRITE_SOURCES, SPRITE_ALIASES, build_atlas
+
+# 游戏图片来自 build_assets.py 生成的图集 (img/atlas.png + img/atlas.json)
+GAME_IMAGES = {} # 精灵名 -> 第一帧 (图集的 subsurface)
+ANIMATIONS = {}  # 精灵名 -> 所有帧 (朝向、动画帧)
+FRAMES = FrameCache() # (精灵, 朝向, 帧号) -> 帧，所有画面共用
+
+# 瓦片类型 -> (图片键, 备用颜色)
+TILE_STYLES = {
+    0: ('tile_grass', COLOR_BLACK),    # 可通行路径
+    9: ('tile_grass', COLOR_BLACK),
+    1: ('tile_wall', COLOR_GRAY),      # 墙壁
+    2: ('tile_treasure', COLOR_YELLOW), # 宝藏
+    3: ('tile_exit', COLOR_BLUE),      # 出口
+    4: ('tile_box', COLOR_BROWN),      # 可炸开的障碍物
+}
+
+
+def load_images(atlas_path=ATLAS_IMAGE, manifest_path=ATLAS_MANIFEST):
+    """
+    加载所有游戏图片资源：解码一张已缩放好的图集，再按清单切出各帧的 subsurface。
+    图集不存在或与当前 TILE_SIZE 不符时，改为在内存中从原始图片构建 (较慢)。
+    缺失的图片对应的键为 None，绘图时使用备用颜色。
+    """
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("tile_size") != TILE_SIZE:
+            raise ValueError(f"图集按 {manifest.get('tile_size')} 像素生成，当前 TILE_SIZE 为 {TILE_SIZE}")
+        atlas = pygame.image.load(atlas_path)
+    except (pygame.error, OSError, ValueError) as e:
+        print(f"错误: 无法使用图集 '{atlas_path}'，改为从原始图片构建 (可运行 python build_assets.py 生成)。错误信息: {e}")
+        atlas, manifest = build_atlas()
+    atlas = atlas.convert_alpha()
+
+    GAME_IMAGES.clear()
+    ANIMATIONS.clear()
+    for name, rects in manifest["sprites"].items():
+        ANIMATIONS[name] = [atlas.subsurface(rect) for rect in rects]
+    for alias, target in manifest.get("aliases", {}).items():
+        ANIMATIONS[alias] = ANIMATIONS[target]
+    for name in set(SPRITE_SOURCES) | set(SPRITE_ALIASES):
+        frames = ANIMATIONS.get(name)
+        GAME_IMAGES[name] = frames[0] if frames else None
+    FRAMES.reset(ANIMATIONS)
+
+def draw_tile(surface, x, y, tile_type, offset=(0, 0)):
+    """
+    绘制单个瓦片。如果图片加载失败，则使用颜色作为备用。
+    """
+    rect = pygame.Rect(x * TILE_SIZE - offset[0], y * TILE_SIZE - offset[1], TILE_SIZE, TILE_SIZE)
+    style = TILE_STYLES.get(tile_type)
+    if style is None:
+        pygame.draw.rect(surface, COLOR_BLACK, rect)
+        return
+
+    image_key, color_to_draw = style
+    image_to_draw = GAME_IMAGES.get(image_key)
+    if image_to_draw:
+        # 图片可能带透明通道，先铺底色，避免缓存层上残留上一种瓦片
+        pygame.draw.rect(surface, COLOR_BLACK, rect)
+        surface.blit(image_to_draw, rect)
+    else:
+        pygame.draw.rect(surface, color_to_draw, rect)
+
+def draw_maze(screen, state, offset=(0, 0)):
+    """
+    在 Pygame 屏幕上逐个绘制迷宫中落在屏幕内的瓦片 (不使用缓存的完整重绘)。
+    """
+    cells = state.maze.cells
+    cols = state.cols
+    start_col = max(0, offset[0] // TILE_SIZE)
+    start_row = max(0, offset[1] // TILE_SIZE)
+    end_col = min(state.cols, -(-(offset[0] + screen.get_width()) // TILE_SIZE))
+    end_row = min(state.rows, -(-(offset[1] + screen.get_height()) // TILE_SIZE))
+    for y in range(start_row, end_row):
+        row_start = y * cols
+        for x in range(start_col, end_col):
+            draw_tile(screen, x, y, cells[row_start + x], offset)
+
+
+_SOLID_TILES = {} # 颜色 -> 一个瓦片大小的纯色 Surface (视线等纯色方块也按图层一次 blits)
+
+
+def _solid_tile(color):
+    tile = _SOLID_TILES.get(color)
+    if tile is None:
+        tile = _SOLID_TILES[color] = pygame.Surface((TILE_SIZE, TILE_SIZE))
+        tile.fill(color)
+    return tile
+
+
+def _blit_layer(screen, sprites, fallback_color):
+    """
+    一次 Surface.blits 绘制一个图层。sprites 为 (帧, 屏幕位置) 列表，帧为 None (图片缺失) 的用备用颜色方块代替。
+    """
+    missing = [pos for image, pos in sprites if image is None]
+    if missing:
+        sprites = [sprite for sprite in sprites if sprite[0] is not None]
+        for screen_x, screen_y in missing:
+            pygame.draw.rect(screen, fallback_color, pygame.Rect(screen_x, screen_y, TILE_SIZE, TILE_SIZE))
+    if sprites:
+        screen.blits(sprites, doreturn=False)
+
+
+def draw_player(screen, state, offset=(0, 0), animator=None):
+    """
+    在屏幕上绘制玩家角色 (朝向移动方向，移动时播放行走动画)。
+    使用 player_pixel_pos 进行绘制，实现平滑移动。
+    """
+    if animator is None:
+        animator = SpriteAnimator(FRAMES)
+        animator.update(state)
+    position = (state.player_pixel_pos[0] - offset[0], state.player_pixel_pos[1] - offset[1])
+    _blit_layer(screen, [(animator.player.frame(animator.frames, state), position)], COLOR_GREEN)
+
+
+def visible_guards(state, world_rect):
+    """
+    返回像素矩形 (或视野) 与 world_rect 相交的、未被炸晕的守卫编号。
+    视野可以朝向任意方向、最远 GUARD_SIGHT_RANGE 格，因此守卫在视口外不远处时也算可见。
+    """
+    guards = state.guards
+    pixel_y = guards.pixel_y
+    hp = guards.hp
+    margin = TILE_SIZE * (GUARD_SIGHT_RANGE + 1)
+    left = world_rect.left - margin
+    right = world_rect.right + margin - TILE_SIZE
+    top = world_rect.top - margin
+    bottom = world_rect.bottom + margin - TILE_SIZE
+    return [i for i, x in enumerate(guards.pixel_x)
+            if hp[i] > 0 and left < x < right and top < pixel_y[i] < bottom]
+
+
+def draw_guard(screen, state, offset=(0, 0), animator=None):
+    """
+    在屏幕上绘制视口内的所有守卫及其视野。
+    守卫本体按外观、朝向和行走帧取图 (所有守卫用 Surface.blits 一次提交)，视野为浅红色方块。
+    视野覆盖的瓦片来自仿真核心的 guard_sight_tiles (按瓦片和朝向缓存)，与胜负判定是同一个集合。
+    """
+    frames = animator.frames if animator is not None else FRAMES
+    guards = state.guards
+    view = pygame.Rect(offset[0], offset[1], screen.get_width(), screen.get_height())
+    indices = visible_guards(state, view)
+
+    # 先绘制视线，再绘制守卫本体，避免相邻守卫的视线盖住守卫
+    sight_tile = _solid_tile(COLOR_LIGHT_RED)
+    offset_x, offset_y = offset
+    screen.blits([(sight_tile, (sight_x * TILE_SIZE - offset_x, sight_y * TILE_SIZE - offset_y))
+                  for i in indices for sight_x, sight_y in guard_sight_tiles(state, i)], doreturn=False)
+
+    pixel_x, pixel_y = guards.pixel_x, guards.pixel_y
+    _blit_layer(screen, [(guard_frame(frames, state, i), (pixel_x[i] - offset[0], pixel_y[i] - offset[1]))
+                         for i in indices], COLOR_RED)
+
+
+def draw_bombs(screen, state, offset=(0, 0), animator=None):
+    """
+    在屏幕上绘制所有激活的炸弹 (引信动画，快爆炸时闪烁加快)。
+    """
+    table = bomb_frames(animator.frames if animator is not None else FRAMES)
+    last = len(table) - 1
+    tick = state.tick
+    _blit_layer(screen, [(table[min(last, tick - placed_tick)],
+                          (bomb_x * TILE_SIZE - offset[0], bomb_y * TILE_SIZE - offset[1]))
+                         for bomb_x, bomb_y, placed_tick, _ in state.bombs.values()], COLOR_ORANGE)
+
+
+def draw_explosions(screen, state, offset=(0, 0), animator=None):
+    """
+    在屏幕上绘制所有激活的爆炸区域 (火焰由大到小逐渐熄灭)。
+    """
+    table = explosion_frames(animator.frames if animator is not None else FRAMES)
+    last = len(table) - 1
+    tick = state.tick
+    _blit_layer(screen, [(table[min(last, tick - start_tick)],
+                          (exp_x * TILE_SIZE - offset[0], exp_y * TILE_SIZE - offset[1]))
+                         for (exp_x, exp_y), start_tick in state.explosions.items()], COLOR_YELLOW)
+
+
+def draw_sprites(screen, state, offset=(0, 0), animator=None, hud=None):
+    """
+    绘制所有会移动或闪现的元素：守卫及视线、玩家、炸弹、爆炸和 HUD。
+    animator 为跨帧保存的动画状态 (SpriteAnimator)，为 None 时按本帧的状态临时推出。
+    hud 为调用者本帧已经 update 过的 Hud，为 None 时临时合成一个。HUD 固定在屏幕上，不受摄像机偏移影响。
+    """
+    if animator is None:
+        animator = SpriteAnimator(FRAMES)
+    animator.update(state)
+    draw_guard(screen, state, offset, animator)
+    draw_player(screen, state, offset, animator)
+    draw_bombs(screen, state, offset, animator)
+    draw_explosions(screen, state, offset, animator)
+
+    if hud is None:
+        hud = Hud(screen.get_width())
+        hud.update(state)
+    hud.draw(screen)
+
+def draw_frame(screen, state, offset=(0, 0), animator=None):
+    """
+    根据当前游戏状态完整绘制一帧 (不使用缓存，供截图与对比测试使用)。
+    animator 同 draw_sprites；对比测试传入 DirtyRectRenderer.animator，使玩家的行走帧一致。
+    """
+    screen.fill(COLOR_BLACK)
+    draw_maze(screen, state, offset)
+    draw_sprites(screen, state, offset, animator)
+
+
+class MazeLayer:
+    """
+    迷宫静态瓦片层的离屏缓存，按 CHUNK_SIZE x CHUNK_SIZE 瓦片分块。
+    区块在第一次进入视口时才绘制，最多缓存 MAX_CACHED_CHUNKS 个 (LRU 淘汰)，
+    因此内存与绘制开销只取决于视口大小，与地图大小无关。
+    之后只重绘通过 GameState.set_tile 修改过的瓦片。
+    chunks 为事先按 state 当前地图绘制好的区块 (见 levels.Level.prerender_step)，会被直接使用和修改。
+    """
+
+    def __init__(self, state, chunk_size=CHUNK_SIZE, max_chunks=MAX_CACHED_CHUNKS, chunks=None):
+        self.state = state
+        self.chunk_size = chunk_size
+        self.chunk_pixels = chunk_size * TILE_SIZE
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict(chunks or ()) # (区块列, 区块行) -> Surface，按最近使用排序
+        self.dirty_tiles = set()
+        state.add_tile_listener(self.on_tile_changed)
+
+    def on_tile_changed(self, x, y, old_tile, new_tile):
+        """地图变化监听器：记下需要重绘的瓦片。"""
+        self.dirty_tiles.add((x, y))
+
+    def _bake_chunk(self, chunk_x, chunk_y):
+        """绘制一个区块的全部瓦片到新的 Surface 上。"""
+        state = self.state
+        start_col = chunk_x * self.chunk_size
+        start_row = chunk_y * self.chunk_size
+        end_col = min(state.cols, start_col + self.chunk_size)
+        end_row = min(state.rows, start_row + self.chunk_size)
+        surface = pygame.Surface(((end_col - start_col) * TILE_SIZE, (end_row - start_row) * TILE_SIZE))
+        offset = (start_col * TILE_SIZE, start_row * TILE_SIZE)
+        cells = state.maze.cells
+        cols = state.cols
+        for y in range(start_row, end_row):
+            row_start = y * cols
+            for x in range(start_col, end_col):
+                draw_tile(surface, x, y, cells[row_start + x], offset)
+        return surface
+
+    def get_chunk(self, chunk_x, chunk_y):
+        """取得区块 Surface，未缓存时立即绘制，并按需淘汰最久未使用的区块。"""
+        key = (chunk_x, chunk_y)
+        surface = self.chunks.get(key)
+        if surface is not None:
+            self.chunks.move_to_end(key)
+            return surface
+        surface = self._bake_chunk(chunk_x, chunk_y)
+        self.chunks[key] = surface
+        while len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return surface
+
+    def refresh(self):
+        """
+        重绘已缓存区块中所有失效的瓦片 (未缓存的区块在绘制时自然读取最新地图)。
+        Returns:
+            list[pygame.Rect]: 发生变化的瓦片在世界中的像素矩形。
+        """
+        rects = []
+        maze = self.state.maze
+        for x, y in self.dirty_tiles:
+            chunk = self.chunks.get((x // self.chunk_size, y // self.chunk_size))
+            if chunk is not None:
+                chunk_offset = ((x // self.chunk_size) * self.chunk_pixels, (y // self.chunk_size) * self.chunk_pixels)
+                draw_tile(chunk, x, y, maze.get(x, y), chunk_offset)
+            rects.append(pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+        self.dirty_tiles.clear()
+        return rects
+
+    def chunk_keys(self, world_rect):
+        """world_rect (世界像素坐标) 覆盖的所有区块 (区块列, 区块行)。"""
+        world_rect = world_rect.clip(pygame.Rect(0, 0, self.state.cols * TILE_SIZE, self.state.rows * TILE_SIZE))
+        if world_rect.width <= 0 or world_rect.height <= 0:
+            return []
+        pixels = self.chunk_pixels
+        return [(chunk_x, chunk_y)
+                for chunk_y in range(world_rect.top // pixels, (world_rect.bottom - 1) // pixels + 1)
+                for chunk_x in range(world_rect.left // pixels, (world_rect.right - 1) // pixels + 1)]
+
+    def blit_region(self, screen, world_rect, offset):
+        """
+        把静态层中 world_rect (世界像素坐标) 覆盖的部分绘制到屏幕上。
+        """
+        world_rect = world_rect.clip(pygame.Rect(0, 0, self.state.cols * TILE_SIZE, self.state.rows * TILE_SIZE))
+        if world_rect.width <= 0 or world_rect.height <= 0:
+            return
+        pixels = self.chunk_pixels
+        for chunk_y in range(world_rect.top // pixels, (world_rect.bottom - 1) // pixels + 1):
+            for chunk_x in range(world_rect.left // pixels, (world_rect.right - 1) // pixels + 1):
+                chunk = self.get_chunk(chunk_x, chunk_y)
+                chunk_left = chunk_x * pixels
+                chunk_top = chunk_y * pixels
+                area = world_rect.clip(pygame.Rect(chunk_left, chunk_top, chunk.get_width(), chunk.get_height()))
+                screen.blit(chunk, (area.left - offset[0], area.top - offset[1]),
+                            area.move(-chunk_left, -chunk_top))
+
+
+def sprite_rects(state, view_rect=None):
+    """
+    返回本帧所有精灵、视线和爆炸在世界中占据的像素矩形。
+    给出 view_rect 时只考虑视口附近的守卫 (守卫数量可能上百个)。
+    """
+    guards = state.guards
+    rects = [
+        pygame.Rect(int(state.player_pixel_pos[0]), int(state.player_pixel_pos[1]), TILE_SIZE, TILE_SIZE),
+    ]
+    indices = visible_guards(state, view_rect) if view_rect is not None else guards.active()
+    for i in indices:
+        rects.append(pygame.Rect(int(guards.pixel_x[i]), int(guards.pixel_y[i]), TILE_SIZE, TILE_SIZE))
+        for sight_x, sight_y in guard_sight_tiles(state, i):
+            rects.append(pygame.Rect(sight_x * TILE_SIZE, sight_y * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+    for bomb_x, bomb_y in state.bombs:
+        rects.append(pygame.Rect(bomb_x * TILE_SIZE, bomb_y * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+    for exp_x, exp_y in state.explosions:
+        rects.append(pygame.Rect(exp_x * TILE_SIZE, exp_y * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+    return rects
+
+
+class DirtyRectRenderer:
+    """
+    带摄像机的脏矩形渲染器。
+    摄像机跟随玩家；视口移动时整屏从区块缓存重绘，否则只用缓存的瓦片层覆盖上一帧和
+    本帧精灵所在的矩形以及被修改的瓦片，再重绘精灵，
+    并返回需要交给 pygame.display.update 的矩形列表。
+    chunks 为预先绘制好的区块 (传给 MazeLayer)，关卡开始的第一帧因此不必现场绘制。
+    """
+
+    def __init__(self, screen, state, chunks=None):
+        self.screen = screen
+        self.state = state
+        self.layer = MazeLayer(state, chunks=chunks)
+        self.camera = Camera(screen.get_width(), screen.get_height(),
+                             state.cols * TILE_SIZE, state.rows * TILE_SIZE)
+        self.previous_rects = []
+        self.full_redraw = True # 首帧需要整屏绘制
+        self.animator = SpriteAnimator(FRAMES)
+        self.hud = Hud(screen.get_width())
+
+    def add_overlay(self, screen_rect):
+        """
+        调用者在本帧画面上另外绘制了 screen_rect 范围的内容 (例如性能剖析叠加层)，
+        下一帧先用瓦片层把它擦除。
+        """
+        self.previous_rects.append(screen_rect.move(self.camera.offset))
+
+    def draw(self):
+        """
+        绘制一帧。
+        Returns:
+            list[pygame.Rect]: 本帧屏幕上发生变化的区域。
+        """
+        screen = self.screen
+        camera = self.camera
+        if camera.follow(self.state.player_pixel_pos[0], self.state.player_pixel_pos[1]):
+            self.full_redraw = True
+        offset = camera.offset
+        view_rect = camera.view_rect()
+
+        changed_tiles = self.layer.refresh()
+        current_rects = [rect for rect in sprite_rects(self.state, view_rect) if rect.colliderect(view_rect)]
+        # HUD 内容变化时 (例如文字变短) 先擦除新旧内容所在的区域
+        hud_rects = [rect.move(offset) for rect in self.hud.update(self.state)]
+
+        if self.full_redraw:
+            screen.fill(COLOR_BLACK)
+            self.layer.blit_region(screen, view_rect, offset)
+            dirty_rects = [screen.get_rect()]
+            self.full_redraw = False
+        else:
+            dirty_rects = []
+            # 用缓存的静态层擦除精灵旧位置 (以及还原被修改的瓦片)
+            for rect in self.previous_rects + current_rects + changed_tiles + hud_rects:
+                if rect.colliderect(view_rect):
+                    self.layer.blit_region(screen, rect, offset)
+                    dirty_rects.append(camera.to_screen(rect))
+            dirty_rects.extend(self.hud.rects)
+
+        draw_sprites(screen, self.state, offset, self.animator, self.hud)
+        self.previous_rects = current_rects
+        return dirty_rects
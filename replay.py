@@ -0,0 +1,250 @@
+# replay.py - 确定性录像与快速回放
+# 一局游戏完全由 (种子, 地图参数, 每帧的 PlayerInput) 决定：地图生成、守卫的随机决策都来自
+# GameState.rng，炸弹与爆炸按仿真帧号计时。因此只需记录这些数据即可在无窗口环境下重放整局。
+#
+# 录像文件格式 (小端)：
+#   文件头   MAGIC、版本、种子、列数、行数、守卫数量、TICK_RATE，随后是长度前缀的生成算法名，
+#            以及长度前缀 (u16) 的生成算法参数 maze_options (JSON)
+#   输入     帧数 (u32)、游程编码数据长度 (u32)，游程编码为若干个 (输入字节, 重复帧数 varint)
+#   校验     每帧结束后的状态哈希 (u32 x 帧数)，回放时逐帧比对，定位第一次出现分歧的帧
+#
+# 用法：python replay.py 录像文件 [--no-verify]
+
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+from config import FIXED_DT, TICK_RATE, REPLAY_DIR
+from simulation import PlayerInput, new_game_state, step
+
+MAGIC = b"TMRP"
+VERSION = 2
+
+_HEADER = struct.Struct("<4sBQIIIH")
+_COUNTS = struct.Struct("<II")
+_OPTIONS_LENGTH = struct.Struct("<H")
+_STATE = struct.Struct("<IddiiiiI")
+_TILE_CHANGE = struct.Struct("<iiB")
+
+
+def encode_input(inputs):
+    """把一帧输入压缩成一个字节：低 2 位 dx+1，接着 2 位 dy+1，第 4 位为放置炸弹。"""
+    return (inputs.dx + 1) | ((inputs.dy + 1) << 2) | (0x10 if inputs.place_bomb else 0)
+
+# 输入字节 -> PlayerInput (回放时查表，不必每帧构造新对象)
+INPUT_TABLE = [PlayerInput((byte & 3) - 1, ((byte >> 2) & 3) - 1, bool(byte & 0x10)) for byte in range(32)]
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class StateHasher:
+    """
+    每帧状态的快速哈希 (CRC32)。覆盖帧号、玩家、所有守卫、炸弹与爆炸数量、宝藏进度；
+    地图本身不整张哈希，而是作为地图监听器把每次瓦片修改累积进一个滚动哈希中。
+    """
+
+    def __init__(self, state):
+        self.state = state
+        self.tiles = 0
+        state.add_tile_listener(self.on_tile_changed)
+
+    def on_tile_changed(self, x, y, old_tile, new_tile):
+        self.tiles = zlib.crc32(_TILE_CHANGE.pack(x, y, new_tile), self.tiles)
+
+    def digest(self):
+        state = self.state
+        guards = state.guards
+        value = zlib.crc32(_STATE.pack(
+            state.tick, state.player_pixel_pos[0], state.player_pixel_pos[1], state.player_hp,
+            state.got_treasures, len(state.bombs), len(state.explosions), self.tiles))
+        value = zlib.crc32(guards.pixel_x, value)
+        value = zlib.crc32(guards.pixel_y, value)
+        return zlib.crc32(guards.hp, value)
+
+
+class Replay:
+    """一局游戏的录像：地图参数、逐帧输入 (游程编码) 与逐帧状态哈希。"""
+
+    def __init__(self, seed, rows, cols, algorithm, guard_count, tick_rate=TICK_RATE, maze_options=None):
+        self.seed = seed
+        self.rows = rows
+        self.cols = cols
+        self.algorithm = algorithm
+        self.guard_count = guard_count
+        self.tick_rate = tick_rate
+        self.maze_options = maze_options or {} # 生成算法的额外参数 (关卡难度，见 levels.py)
+        self.runs = []          # [[输入字节, 帧数], ...]
+        self.hashes = array('I')
+        self.tick_count = 0
+
+    def append(self, input_byte, state_hash):
+        """追加一帧。"""
+        runs = self.runs
+        if runs and runs[-1][0] == input_byte:
+            runs[-1][1] += 1
+        else:
+            runs.append([input_byte, 1])
+        self.hashes.append(state_hash)
+        self.tick_count += 1
+
+    def inputs(self):
+        """按帧依次产生 PlayerInput。"""
+        for input_byte, count in self.runs:
+            inputs = INPUT_TABLE[input_byte]
+            for _ in range(count):
+                yield inputs
+
+    def to_bytes(self):
+        algorithm = self.algorithm.encode("ascii")
+        out = bytearray(_HEADER.pack(MAGIC, VERSION, self.seed, self.cols, self.rows,
+                                     self.guard_count, self.tick_rate))
+        out.append(len(algorithm))
+        out += algorithm
+        options = json.dumps(self.maze_options, sort_keys=True).encode("utf-8")
+        out += _OPTIONS_LENGTH.pack(len(options))
+        out += options
+        encoded = bytearray()
+        for input_byte, count in self.runs:
+            encoded.append(input_byte)
+            _write_varint(encoded, count)
+        out += _COUNTS.pack(self.tick_count, len(encoded))
+        out += encoded
+        hashes = array('I', self.hashes)
+        if sys.byteorder == "big":
+            hashes.byteswap()
+        out += hashes.tobytes()
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed, cols, rows, guard_count, tick_rate = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"不是可识别的录像文件 (标识 {magic!r}，版本 {version})")
+        pos = _HEADER.size
+        length = data[pos]
+        algorithm = data[pos + 1:pos + 1 + length].decode("ascii")
+        pos += 1 + length
+        (length,) = _OPTIONS_LENGTH.unpack_from(data, pos)
+        pos += _OPTIONS_LENGTH.size
+        maze_options = json.loads(data[pos:pos + length].decode("utf-8"))
+        pos += length
+        tick_count, encoded_length = _COUNTS.unpack_from(data, pos)
+        pos += _COUNTS.size
+
+        replay = cls(seed, rows, cols, algorithm, guard_count, tick_rate, maze_options)
+        end = pos + encoded_length
+        while pos < end:
+            input_byte = data[pos]
+            count, pos = _read_varint(data, pos + 1)
+            replay.runs.append([input_byte, count])
+        replay.hashes.frombytes(data[end:end + 4 * tick_count])
+        if sys.byteorder == "big":
+            replay.hashes.byteswap()
+        replay.tick_count = tick_count
+        return replay
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class ReplayRecorder:
+    """
+    录制一局游戏。用 start() 创建带种子的新局 (或者为预先生成的关卡自行构造 Replay)，
+    此后每调用一次 step 就调用一次 record。
+    """
+
+    def __init__(self, state, replay):
+        self.state = state
+        self.replay = replay
+        self.hasher = StateHasher(state)
+
+    @classmethod
+    def start(cls, rows, cols, algorithm, seed=None, guard_count=None, maze_options=None):
+        """
+        生成一局新游戏并开始录制。seed 为 None 时随机选择一个种子。
+        Returns:
+            tuple: (GameState, ReplayRecorder)
+        """
+        if seed is None:
+            seed = int.from_bytes(os.urandom(8), "little")
+        state = new_game_state(rows, cols, seed, algorithm, guard_count, maze_options)
+        replay = Replay(seed, rows, cols, algorithm, len(state.guards), maze_options=maze_options)
+        return state, cls(state, replay)
+
+    def record(self, inputs):
+        """记录刚刚执行过的一帧的输入，以及执行后的状态哈希。"""
+        self.replay.append(encode_input(inputs), self.hasher.digest())
+
+    def save(self, directory=REPLAY_DIR):
+        """把录像保存到 directory 中，文件名包含时间与种子。Returns: str: 文件路径。"""
+        os.makedirs(directory, exist_ok=True)
+        name = time.strftime("%Y%m%d-%H%M%S") + f"-{self.replay.seed:016x}.replay"
+        path = os.path.join(directory, name)
+        self.replay.save(path)
+        return path
+
+
+def run_replay(replay, verify=True):
+    """
+    在无窗口环境下以最快速度重放一局游戏。
+    Args:
+        replay (Replay): 录像。
+        verify (bool): 是否逐帧比对状态哈希。
+    Returns:
+        tuple: (GameState, 第一次出现分歧的帧序号或 None)。
+    """
+    if replay.tick_rate != TICK_RATE:
+        raise ValueError(f"录像使用 TICK_RATE={replay.tick_rate}，当前为 {TICK_RATE}")
+    state = new_game_state(replay.rows, replay.cols, replay.seed, replay.algorithm, replay.guard_count,
+                           replay.maze_options)
+    hasher = StateHasher(state) if verify else None
+    hashes = replay.hashes
+    for tick, inputs in enumerate(replay.inputs()):
+        step(state, inputs, FIXED_DT)
+        if hasher is not None and hasher.digest() != hashes[tick]:
+            return state, tick
+    return state, None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python replay.py 录像文件 [--no-verify]")
+        sys.exit(2)
+    replay = Replay.load(sys.argv[1])
+    verify = "--no-verify" not in sys.argv[2:]
+    start_time = time.perf_counter()
+    final_state, mismatch = run_replay(replay, verify)
+    elapsed = time.perf_counter() - start_time
+    print(f"回放 {replay.tick_count} 帧 ({replay.tick_count / TICK_RATE:.1f} 秒游戏时间)，"
+          f"用时 {elapsed:.3f} 秒，结果: {final_state.end_reason or '未结束'}")
+    if mismatch is not None:
+        print(f"校验失败: 第 {mismatch} 帧的状态与录制时不一致")
+        sys.exit(1)
+    if verify:
+        print("校验通过: 每一帧的状态都与录制时一致")
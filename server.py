@@ -0,0 +1,243 @@
+# server.py - 多房间权威联机服务器 (asyncio)
+# 每个房间是一局独立的游戏 (一个 GameState)：仿真核心只有一个玩家，因此每个房间有一个小偷，
+# 之后加入同一房间的客户端作为观战者。所有房间在同一个进程、同一个定时任务中
+# 以固定时间步长逐个调用 simulation.step，客户端只发送输入、接收增量快照 (见 netproto.py)。
+# 仿真不等待网络：输入消息随到随存，发送只是写入缓冲区，积压过多的客户端直接断开。
+# 新房间的地图在工作进程中生成，不会让其他房间卡顿。
+#
+# 用法：python server.py [--host 地址] [--port 端口] [--cols 列数 --rows 行数 --algorithm 算法]
+# 用 python netclient.py --bots 300 在本机启动一批机器人客户端进行测试。
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import (
+    ROWS, COLS, MAZE_ALGORITHM, FIXED_DT, MAX_FRAME_TIME,
+    NET_HOST, NET_PORT, NET_SEND_TICKS, NET_MAX_WRITE_BUFFER, NET_STATS_INTERVAL,
+)
+from levels import build_level
+from mazegen import ALGORITHMS
+from netproto import (
+    MSG_JOIN, MSG_INPUT, MSG_SNAPSHOT, ROLE_THIEF, ROLE_SPECTATOR,
+    DeltaEncoder, pack_message, pack_welcome, read_message, unpack_join,
+)
+from replay import INPUT_TABLE
+from simulation import NO_INPUT, step
+from snapshot import dumps, loads
+
+
+class Room:
+    """一个房间：一局游戏、它的增量编码器、小偷与观战者的连接，以及小偷当前按住的输入。"""
+
+    def __init__(self, room_id, state, thief):
+        self.id = room_id
+        self.state = state
+        self.encoder = DeltaEncoder(state)
+        self.thief = thief     # asyncio.StreamWriter
+        self.spectators = []
+        self.input = NO_INPUT
+        self.bomb_requested = False
+
+    def clients(self):
+        return [self.thief] + self.spectators
+
+    def set_input(self, input_byte):
+        """小偷的输入一直保持到下一条输入消息；放置炸弹只在下一帧生效一次。"""
+        inputs = INPUT_TABLE[input_byte & 0x1F]
+        if inputs.place_bomb:
+            self.bomb_requested = True
+            inputs = inputs._replace(place_bomb=False)
+        self.input = inputs
+
+    def tick(self):
+        """推进一帧。"""
+        inputs = self.input
+        if self.bomb_requested:
+            inputs = inputs._replace(place_bomb=True)
+            self.bomb_requested = False
+        step(self.state, inputs, FIXED_DT)
+        self.state.events.clear() # 服务器不播放音效
+
+    def broadcast(self, message):
+        """
+        把 message 写入所有客户端的发送缓冲区。
+        Returns:
+            int: 写出的字节数。
+        """
+        sent = 0
+        for writer in self.clients():
+            if writer.is_closing():
+                continue
+            if writer.transport.get_write_buffer_size() > NET_MAX_WRITE_BUFFER:
+                writer.close() # 客户端读得太慢，之后的增量无法再接上
+                continue
+            writer.write(message)
+            sent += len(message)
+        return sent
+
+    def close(self):
+        for writer in self.clients():
+            writer.close()
+
+
+class GameServer:
+    """
+    管理所有房间与连接，并以固定时间步长推进所有房间。
+    加入房间号为 0 (或不存在的房间号) 时新建房间并成为小偷；加入已有房间则成为观战者。
+    小偷断开或一局结束时，发送最后一条增量后关闭房间。
+    """
+
+    def __init__(self, rows=ROWS, cols=COLS, algorithm=MAZE_ALGORITHM, send_ticks=NET_SEND_TICKS):
+        self.rows = rows
+        self.cols = cols
+        self.algorithm = algorithm
+        self.send_ticks = send_ticks
+        self.rooms = {}
+        self.next_room_id = 1
+        self.executor = ProcessPoolExecutor(max_workers=1)
+        self.tick = 0
+        # 统计 (每 NET_STATS_INTERVAL 秒打印并清零)
+        self.tick_seconds = 0.0
+        self.ticks_run = 0
+        self.bytes_sent = 0
+
+    # --- 连接 ---
+
+    def _allocate_room_id(self, wanted):
+        if wanted and wanted not in self.rooms:
+            return wanted
+        while self.next_room_id in self.rooms:
+            self.next_room_id += 1
+        room_id = self.next_room_id
+        self.next_room_id += 1
+        return room_id
+
+    async def _join(self, room_id, writer):
+        """
+        把连接加入房间，发送欢迎消息与完整快照。
+        Returns:
+            tuple: (Room, 角色)。
+        """
+        room = self.rooms.get(room_id)
+        if room is not None:
+            room.spectators.append(writer)
+            role = ROLE_SPECTATOR
+        else:
+            room_id = self._allocate_room_id(room_id)
+            self.rooms[room_id] = None # 占住房间号，地图生成期间不会分配给别人
+            loop = asyncio.get_running_loop()
+            try:
+                data = await loop.run_in_executor(self.executor, build_level, self.rows, self.cols, None,
+                                                  self.algorithm, None, None)
+            except BaseException:
+                del self.rooms[room_id]
+                raise
+            room = self.rooms[room_id] = Room(room_id, loads(data), writer)
+            role = ROLE_THIEF
+        writer.write(pack_welcome(room.id, role))
+        writer.write(pack_message(MSG_SNAPSHOT, dumps(room.state)))
+        return room, role
+
+    def _leave(self, room, writer):
+        if self.rooms.get(room.id) is not room:
+            return
+        if writer is room.thief:
+            del self.rooms[room.id]
+            room.broadcast(room.encoder.encode())
+            room.close()
+        elif writer in room.spectators:
+            room.spectators.remove(writer)
+
+    async def handle_client(self, reader, writer):
+        """一个客户端连接：先等待 MSG_JOIN，之后处理输入消息直到断开。"""
+        room = None
+        try:
+            kind, payload = await read_message(reader)
+            if kind != MSG_JOIN:
+                return
+            room, role = await self._join(unpack_join(payload), writer)
+            while True:
+                kind, payload = await read_message(reader)
+                if kind == MSG_INPUT and role == ROLE_THIEF and payload:
+                    room.set_input(payload[0])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if room is not None:
+                self._leave(room, writer)
+            writer.close()
+
+    # --- 仿真 ---
+
+    def step_rooms(self):
+        """所有房间推进一帧，每 send_ticks 帧广播一次增量；结束的房间发送最后一条增量后关闭。"""
+        self.tick += 1
+        send = self.tick % self.send_ticks == 0
+        finished = []
+        for room in self.rooms.values():
+            if room is None: # 正在生成地图
+                continue
+            room.tick()
+            if room.state.result is not None:
+                finished.append(room)
+            elif send:
+                self.bytes_sent += room.broadcast(room.encoder.encode())
+        for room in finished:
+            self.bytes_sent += room.broadcast(room.encoder.encode())
+            room.close()
+            del self.rooms[room.id]
+
+    async def run(self):
+        """固定时间步长的主循环：落后时最多追赶 MAX_FRAME_TIME 秒，再多就丢弃。"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        next_stats = next_tick + NET_STATS_INTERVAL
+        while True:
+            now = loop.time()
+            if now - next_tick > MAX_FRAME_TIME:
+                next_tick = now - MAX_FRAME_TIME
+            while next_tick <= now:
+                start = time.perf_counter()
+                self.step_rooms()
+                self.tick_seconds += time.perf_counter() - start
+                self.ticks_run += 1
+                next_tick += FIXED_DT
+            if now >= next_stats:
+                self.print_stats(now - next_stats + NET_STATS_INTERVAL)
+                next_stats = now + NET_STATS_INTERVAL
+            await asyncio.sleep(next_tick - loop.time())
+
+    def print_stats(self, elapsed):
+        rooms = [room for room in self.rooms.values() if room is not None]
+        clients = sum(1 + len(room.spectators) for room in rooms)
+        tick_ms = 1000 * self.tick_seconds / max(1, self.ticks_run)
+        print(f"房间 {len(rooms)}，连接 {clients}，每帧 {tick_ms:.2f} 毫秒 (预算 {1000 * FIXED_DT:.1f})，"
+              f"发送 {self.bytes_sent / elapsed / 1024:.1f} KB/秒")
+        self.tick_seconds = 0.0
+        self.ticks_run = 0
+        self.bytes_sent = 0
+
+    async def serve(self, host=NET_HOST, port=NET_PORT):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"服务器已启动: {host}:{port}，地图 {self.cols}x{self.rows} ({self.algorithm})")
+        try:
+            async with server:
+                await self.run()
+        finally:
+            self.executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="多房间权威联机服务器")
+    parser.add_argument("--host", default=NET_HOST)
+    parser.add_argument("--port", type=int, default=NET_PORT)
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--cols", type=int, default=COLS)
+    parser.add_argument("--algorithm", default=MAZE_ALGORITHM, choices=list(ALGORITHMS))
+    args = parser.parse_args()
+    try:
+        asyncio.run(GameServer(args.rows, args.cols, args.algorithm).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("服务器已停止。")
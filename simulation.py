@@ -0,0 +1,578 @@
+# simulation.py - 与渲染解耦的游戏仿真核心
+# GameState 保存一局游戏的全部可变状态，step() 以固定时间步长推进一帧逻辑。
+# 本模块不创建窗口、不读取键盘、不调用 time.time()，因此可以在无显示环境下
+# 以远高于 60 FPS 的速度运行 (机器人对战、回放、参数扫描)。
+
+import random
+from collections import deque, namedtuple
+
+from config import (
+    TILE_SIZE, PLAYER_SPEED, GUARD_SPEED, COLS, ROWS, TICK_RATE,
+    PLAYER_MAX_HP, GUARD_BOMB_COOLDOWN, GUARD_SIGHT_RANGE, GUARD_SIGHT_SPREAD,
+    EXPLOSION_RANGE, BOMB_FUSE_TIME, BOMB_FUSE_TICKS, EXPLOSION_TICKS, MAZE_ALGORITHM, GUARD_CHASE_RANGE,
+    GUARD_REPLANS_PER_TICK, MAX_PENDING_EVENTS,
+)
+from maze import generate_level
+from collision import CollisionMask
+from guardbrain import BlastMasks, BlastTimeline, GuardBrain
+from pathfinding import FlowField, astar
+from guards import Guards
+from spatial import SpatialHash, PLAYER
+from timers import TimerQueue
+from visibility import GuardVision, facing_of
+
+# 一帧的玩家输入：dx/dy 取值 -1、0、1，place_bomb 表示本帧是否按下了空格
+PlayerInput = namedtuple("PlayerInput", ["dx", "dy", "place_bomb"])
+NO_INPUT = PlayerInput(0, 0, False)
+
+# 结束原因 -> 胜负结果
+END_REASONS = {
+    "bombed": "lost",        # 玩家被炸弹炸死
+    "spotted": "lost",       # 玩家被守卫发现
+    "guard_stunned": "won",  # 所有守卫都被炸晕
+    "escaped": "won",        # 收集全部宝藏后到达出口
+}
+
+
+class GameState:
+    """
+    一局游戏的全部状态 (原先散落在 main.py 中的模块级全局变量)。
+    守卫可以有任意多个，保存在结构数组 self.guards 中。
+    bombs 为 {(x, y): (x, y, 放置帧号, 放置者)}，explosions 为 {(x, y): 开始帧号}，
+    两者的到期都由定时器队列 self.timers 按仿真帧号 self.tick 驱动，而非墙上时钟。
+    """
+
+    def __init__(self, maze, total_treasures, player_start, guard_starts, guard_paths, rng=None):
+        self.maze = maze # TileGrid
+        self.rows = maze.rows
+        self.cols = maze.cols
+        self.rng = rng if rng is not None else random.Random()
+
+        # 玩家的逻辑瓦片位置和像素位置
+        self.player_tile_pos = [player_start[0], player_start[1]]
+        self.player_pixel_pos = [player_start[0] * TILE_SIZE, player_start[1] * TILE_SIZE]
+        self.player_current_speed_x = 0
+        self.player_current_speed_y = 0
+        self.player_hp = PLAYER_MAX_HP
+
+        # 所有守卫 (结构数组存储，见 guards.Guards)
+        self.guards = Guards()
+        for guard_start, guard_path in zip(guard_starts, guard_paths):
+            self.guards.add(guard_start, guard_path)
+        self.guard_replans_left = 0 # 本帧还能做几次 A* 规划，避免上百个守卫同时规划造成卡顿
+
+        # 玩家和守卫按瓦片分桶的空间索引，每帧开始时重建
+        self.spatial = SpatialHash(self.cols)
+
+        self.bombs = {}
+        self.explosions = {}
+        self.timers = TimerQueue() # 炸弹引信与爆炸火焰的到期事件
+        # 供表现层 (音效等) 读取的仿真事件，如 ("bomb_placed", x, y, 放置者)、("explosion", 瓦片数)；
+        # 读取者自行 popleft 取走，无人读取时只保留最近 MAX_PENDING_EVENTS 个
+        self.events = deque(maxlen=MAX_PENDING_EVENTS)
+
+        self.got_treasures = 0
+        self.total_treasures = total_treasures
+
+        # 地图变化监听器 (渲染缓存等)，每次 set_tile 修改瓦片后调用
+        self.tile_listeners = []
+
+        # 按行压缩的阻挡位掩码，玩家移动的碰撞检测只查询它；障碍物被炸开时只修改一位
+        self.collision = CollisionMask(maze)
+        self.add_tile_listener(self.collision.on_tile_changed)
+
+        # 所有守卫共用的、以玩家为终点的距离场；障碍物被炸开时增量修复
+        self.flow_field = FlowField(maze)
+        self.add_tile_listener(self.flow_field.on_tile_changed)
+
+        # 守卫视野按 (瓦片, 朝向) 缓存，胜负判定与渲染共用；视线经过的瓦片被炸开时局部失效
+        self.vision = GuardVision(maze, GUARD_SIGHT_RANGE, GUARD_SIGHT_SPREAD)
+        self.add_tile_listener(self.vision.on_tile_changed)
+
+        # 爆炸足迹按瓦片缓存 (explode、守卫与机器人共用)；所有未爆炸弹合并为瓦片 -> 爆炸帧号的时间表，
+        # 由 place_bomb 与 detonate 增量更新
+        self.blasts = BlastMasks(maze, EXPLOSION_RANGE)
+        self.add_tile_listener(self.blasts.on_tile_changed)
+        self.blast_timeline = BlastTimeline(self, BOMB_FUSE_TICKS)
+        self.guard_brain = GuardBrain(self, TILE_SIZE / GUARD_SPEED)
+
+        self.time = 0.0 # 已经过的仿真时间 (秒)
+        self.tick = 0   # 已执行的 step 次数
+        self.result = None      # None / "won" / "lost"
+        self.end_reason = None  # END_REASONS 中的键
+
+    def add_tile_listener(self, listener):
+        """
+        注册地图变化监听器。listener(x, y, old_tile, new_tile) 会在瓦片被修改后调用。
+        """
+        self.tile_listeners.append(listener)
+
+    def set_tile(self, x, y, tile):
+        """
+        修改一个瓦片并通知所有监听器。游戏过程中对地图的修改都应经过这里。
+        """
+        cells = self.maze.cells
+        index = y * self.cols + x
+        old_tile = cells[index]
+        if old_tile == tile:
+            return
+        cells[index] = tile
+        for listener in self.tile_listeners:
+            listener(x, y, old_tile, tile)
+
+
+def new_game_state(rows=ROWS, cols=COLS, seed=None, algorithm=MAZE_ALGORITHM, guard_count=None,
+                   maze_options=None):
+    """
+    生成一张保证可解的新地图、放置元素并返回一个全新的 GameState。
+    seed 相同则地图、守卫路径和守卫的随机决策都相同。
+    guard_count 为 None 时按地图面积决定守卫数量；maze_options 为迷宫生成算法的额外参数 (墙壁、障碍物比例等)。
+    """
+    rng = random.Random(seed)
+    maze, total_treasures, player_start, guard_starts, guard_paths = generate_level(
+        rows, cols, rng, algorithm, guard_count=guard_count, maze_options=maze_options)
+    return GameState(maze, total_treasures, player_start, guard_starts, guard_paths, rng)
+
+
+def get_tile_at_pixel(pixel_x, pixel_y):
+    """根据像素坐标获取所在的瓦片坐标。"""
+    return int(pixel_x // TILE_SIZE), int(pixel_y // TILE_SIZE)
+
+def get_pixel_center_of_tile(tile_x, tile_y):
+    """获取瓦片中心的像素坐标。"""
+    return tile_x * TILE_SIZE + TILE_SIZE / 2, tile_y * TILE_SIZE + TILE_SIZE / 2
+
+def move_player_smooth(state, dt):
+    """
+    玩家平滑移动逻辑，处理像素级移动和碰撞。
+    dx, dy 作为 player_current_speed_x/y 在 step 中根据输入设置。
+    每个坐标轴上做一次扫掠 (见 collision.CollisionMask)：途中遇到墙壁或障碍物时贴紧它停下，
+    因此无论 PLAYER_SPEED 或时间步长多大都不会穿墙。
+    """
+    speed_x = state.player_current_speed_x
+    speed_y = state.player_current_speed_y
+    if speed_x == 0 and speed_y == 0:
+        return # 没有输入时位置不变
+    speed = PLAYER_SPEED * dt * TICK_RATE
+    player_pixel_pos = state.player_pixel_pos
+    player_tile_pos = state.player_tile_pos
+    collision = state.collision
+
+    blocked_x = blocked_y = False
+    if speed_x != 0:
+        target_x = player_pixel_pos[0] + speed_x
+        player_pixel_pos[0] = collision.sweep_x(player_pixel_pos[0], player_pixel_pos[1], TILE_SIZE, TILE_SIZE, speed_x)
+        blocked_x = player_pixel_pos[0] != target_x
+    if speed_y != 0:
+        target_y = player_pixel_pos[1] + speed_y
+        player_pixel_pos[1] = collision.sweep_y(player_pixel_pos[0], player_pixel_pos[1], TILE_SIZE, TILE_SIZE, speed_y)
+        blocked_y = player_pixel_pos[1] != target_y
+
+    # --- 平滑碰撞处理（拐角滑动）---
+    # 当玩家紧贴着墙移动，但目标瓦片侧面是通畅时，沿另一个坐标轴轻微调整：
+    # 像素位置是玩家的左上角，对齐到最近的一行 (列) 瓦片才能进入宽度为一格的通道。
+    # 归位只会缩小玩家覆盖的瓦片范围，因此不需要再做碰撞检测
+    if blocked_x: # 水平移动被阻挡，尝试沿Y轴微调
+        aligned_y = round(player_pixel_pos[1] / TILE_SIZE) * TILE_SIZE
+        if player_pixel_pos[1] < aligned_y:
+            player_pixel_pos[1] += min(speed, aligned_y - player_pixel_pos[1])
+        elif player_pixel_pos[1] > aligned_y:
+            player_pixel_pos[1] -= min(speed, player_pixel_pos[1] - aligned_y)
+    elif blocked_y: # 垂直移动被阻挡，尝试沿X轴微调
+        aligned_x = round(player_pixel_pos[0] / TILE_SIZE) * TILE_SIZE
+        if player_pixel_pos[0] < aligned_x:
+            player_pixel_pos[0] += min(speed, aligned_x - player_pixel_pos[0])
+        elif player_pixel_pos[0] > aligned_x:
+            player_pixel_pos[0] -= min(speed, player_pixel_pos[0] - aligned_x)
+
+    # 最终更新瓦片位置
+    player_tile_pos[0], player_tile_pos[1] = get_tile_at_pixel(player_pixel_pos[0], player_pixel_pos[1])
+
+
+def guard_sight_tiles(state, i):
+    """
+    返回第 i 个守卫当前视野覆盖的瓦片集合 (frozenset)。
+    守卫面朝移动方向，视野为前方最远 GUARD_SIGHT_RANGE 格的扇形，会被墙壁或可炸开障碍物遮挡
+    (见 visibility.GuardVision)。
+    """
+    guards = state.guards
+    return state.vision.sight(guards.tile_x[i], guards.tile_y[i], guards.facing[i]) # 视线检测基于瓦片位置
+
+def check_guard_sight(state):
+    """
+    检查玩家是否在任意一个未被炸晕的守卫的视野内。
+    能看到玩家的守卫必然站在以玩家为中心、边长 2 * GUARD_SIGHT_RANGE + 1 的正方形内：
+    守卫较多时逐格查询该范围的空间哈希，与守卫总数无关；守卫较少时直接遍历所有守卫。
+    """
+    guards = state.guards
+    player_tile = tuple(state.player_tile_pos) # 使用玩家的瓦片位置进行视线检测
+    player_x, player_y = player_tile
+    sight_range = state.vision.sight_range
+    sight = state.vision.sight
+    tile_x, tile_y, facing, hp = guards.tile_x, guards.tile_y, guards.facing, guards.hp
+
+    if len(hp) <= (2 * sight_range + 1) ** 2:
+        for i in range(len(hp)):
+            if hp[i] > 0 and abs(tile_x[i] - player_x) <= sight_range and abs(tile_y[i] - player_y) <= sight_range \
+                    and player_tile in sight(tile_x[i], tile_y[i], facing[i]):
+                return True
+        return False
+
+    spatial = state.spatial
+    for guard_y in range(player_y - sight_range, player_y + sight_range + 1):
+        for guard_x in range(player_x - sight_range, player_x + sight_range + 1):
+            for i in spatial.at(guard_x, guard_y):
+                # 桶中还有只是部分覆盖该瓦片的实体，视线以守卫的逻辑瓦片为准
+                if i != PLAYER and tile_x[i] == guard_x and tile_y[i] == guard_y \
+                        and player_tile in sight(guard_x, guard_y, facing[i]):
+                    return True
+    return False
+
+def choose_guard_step(state, i):
+    """
+    决定第 i 个守卫下一步走向哪个相邻瓦片，返回 None 表示原地等待。
+    优先级：撤离自己放置的炸弹 > 逃离其他炸弹的爆炸范围 > 等待炸弹爆炸 > 沿距离场追踪附近的玩家 > 沿 A* 路线巡逻。
+    追踪或巡逻的下一步在危险图中时原地等待。
+    """
+    guards = state.guards
+    here = (guards.tile_x[i], guards.tile_y[i])
+    retreat = guards.retreats[i]
+    if retreat:
+        return retreat.pop(0)
+    brain = state.guard_brain
+    danger = brain.danger
+    if here in danger:
+        route = brain.escape_route(state, here)
+        if route: # 无路可逃时照常行动
+            guards.retreats[i] = route[1:]
+            return route[0]
+    if state.time < guards.wait_until[i]:
+        return None
+
+    # 玩家在追踪范围内：所有守卫共用同一个距离场，这里只比较四个邻居
+    field = state.flow_field
+    chase_distance = field.distance(here[0], here[1])
+    if chase_distance is not None and chase_distance <= GUARD_CHASE_RANGE:
+        guards.routes[i] = [] # 追踪结束后重新规划巡逻路线
+        step_to = field.next_step(here[0], here[1])
+        return None if step_to in danger else step_to
+
+    # 巡逻：到达当前巡逻点后切换到下一个，并用 A* 规划整条路线
+    route = guards.routes[i]
+    if not route:
+        path = guards.paths[i]
+        if len(path) < 2 or state.guard_replans_left <= 0:
+            return None # 本帧的规划次数已用完，下一帧再规划
+        state.guard_replans_left -= 1
+        if here == path[guards.path_index[i]]:
+            guards.path_index[i] = (guards.path_index[i] + 1) % len(path)
+        route = astar(state.maze, here, path[guards.path_index[i]])
+        if not route:
+            # 巡逻点不可达 (或就在脚下)，下次换下一个巡逻点
+            guards.path_index[i] = (guards.path_index[i] + 1) % len(path)
+            return None
+        guards.routes[i] = route
+    return None if route[0] in danger else route[0]
+
+def guard_consider_bomb(state, i, blocking=None):
+    """
+    停在瓦片上的第 i 个守卫考虑在脚下放置炸弹 (blocking 为挡住去路的可炸开障碍物)。
+    是否放置与撤离路线由 guardbrain 决定：爆炸真的能炸到玩家或炸开障碍物、不会误伤其他守卫，
+    并且引信燃尽前能走出爆炸范围。放置后沿撤离路线离开，并等待炸弹爆炸。
+    Returns:
+        bool: 是否放置了炸弹。
+    """
+    guards = state.guards
+    if state.time - guards.last_bomb_time[i] < GUARD_BOMB_COOLDOWN:
+        return False
+    guard_x, guard_y = guards.tile_x[i], guards.tile_y[i]
+    # 守卫所在位置是可通行区域 (0) 或可炸开障碍物 (4)
+    if state.maze.get(guard_x, guard_y) not in (0, 4):
+        return False
+    route = state.guard_brain.plan_bomb(state, i, blocking)
+    if route is None:
+        return False
+    place_bomb(state, guard_x, guard_y, 'guard')
+    guards.last_bomb_time[i] = state.time
+    guards.retreats[i] = route
+    guards.routes[i] = []
+    guards.wait_until[i] = state.time + BOMB_FUSE_TIME
+    return True
+
+def move_guard_smooth(state, dt):
+    """
+    所有未被炸晕的守卫的平滑移动逻辑 (批量更新结构数组)。
+    守卫每次从一个瓦片中心沿上下左右移动到相邻瓦片中心，因此不会卡在墙角；
+    到达后再决定下一步。下一步是可炸开障碍物时，守卫会尝试炸开它。
+    玩家附近的守卫先一起为所在瓦片与相邻瓦片打分 (guardbrain.GuardBrain.plan_attacks)：
+    最佳位置是所在瓦片时放置炸弹，是相邻瓦片时先走过去。
+    """
+    speed = GUARD_SPEED * dt * TICK_RATE
+    guards = state.guards
+    cells = state.maze.cells
+    cols = state.cols
+    tile_x, tile_y = guards.tile_x, guards.tile_y
+    pixel_x, pixel_y = guards.pixel_x, guards.pixel_y
+    speed_x, speed_y = guards.speed_x, guards.speed_y
+    next_tiles = guards.next_tiles
+    hp = guards.hp
+    state.guard_replans_left = GUARD_REPLANS_PER_TICK
+    brain = state.guard_brain
+    danger = brain.danger
+    bombs = state.bombs
+
+    # 停在瓦片中心、可以放置炸弹的守卫中，与玩家大致在同一行或同一列且距离不远的才值得打分
+    # (候选包括相邻瓦片，所以各方向多算一格；玩家可能跨越两个瓦片，再多算一格)；这些守卫一起打分
+    player_x, player_y = state.player_tile_pos
+    near, attack_range = 2, EXPLOSION_RANGE + 2
+    ready = []
+    for i in guards.active():
+        if next_tiles[i] is not None or guards.retreats[i] or state.time < guards.wait_until[i] \
+                or state.time - guards.last_bomb_time[i] < GUARD_BOMB_COOLDOWN:
+            continue
+        dx, dy = abs(player_x - tile_x[i]), abs(player_y - tile_y[i])
+        if (dx <= near and dy <= attack_range) or (dy <= near and dx <= attack_range):
+            ready.append(i)
+    attacks = brain.plan_attacks(state, ready) if ready else {}
+
+    for i in range(len(hp)):
+        if hp[i] <= 0:
+            continue # 被炸晕的守卫不再移动
+
+        next_tile = next_tiles[i]
+        if next_tile is None:
+            here = (tile_x[i], tile_y[i])
+            target = attacks.get(i)
+            if target == here:
+                guard_consider_bomb(state, i)
+            if target is not None and target != here and here not in danger \
+                    and target not in danger and target not in bombs:
+                guards.routes[i] = [] # 走到能炸到玩家的相邻瓦片，之后重新规划巡逻路线
+                next_tile = target
+            else:
+                next_tile = choose_guard_step(state, i)
+            if next_tile is None or cells[next_tile[1] * cols + next_tile[0]] == 4:
+                speed_x[i] = 0.0 # 停止移动
+                speed_y[i] = 0.0
+                if next_tile is not None:
+                    guard_consider_bomb(state, i, next_tile)
+                continue
+            route = guards.routes[i]
+            if route and route[0] == next_tile:
+                route.pop(0)
+            next_tiles[i] = next_tile
+            facing = facing_of(next_tile[0] - tile_x[i], next_tile[1] - tile_y[i])
+            if facing is not None:
+                guards.facing[i] = facing # 面朝移动方向
+
+        # 目标瓦片左上角的像素坐标
+        target_x_tile, target_y_tile = next_tile
+        target_x_pixel = target_x_tile * TILE_SIZE
+        target_y_pixel = target_y_tile * TILE_SIZE
+
+        # 计算移动方向和距离 (相邻瓦片之间只会沿一个坐标轴移动)
+        dx = target_x_pixel - pixel_x[i]
+        dy = target_y_pixel - pixel_y[i]
+        distance = abs(dx) + abs(dy)
+
+        if distance <= speed: # 如果接近目标中心，则直接对齐并准备选择下一步
+            pixel_x[i] = target_x_pixel
+            pixel_y[i] = target_y_pixel
+            tile_x[i] = target_x_tile
+            tile_y[i] = target_y_tile
+            next_tiles[i] = None
+            continue
+
+        # 计算标准化速度
+        speed_x[i] = speed * (dx / distance)
+        speed_y[i] = speed * (dy / distance)
+        pixel_x[i] += speed_x[i]
+        pixel_y[i] += speed_y[i]
+        # 守卫所在瓦片以其中心点为准
+        tile_x[i] = int((pixel_x[i] + TILE_SIZE / 2) // TILE_SIZE)
+        tile_y[i] = int((pixel_y[i] + TILE_SIZE / 2) // TILE_SIZE)
+
+
+def explode(state, x, y):
+    """
+    计算炸弹爆炸的受影响区域 (不修改地图)。
+    爆炸以 (x, y) 为中心点，向上下左右四个方向各延伸最多 `EXPLOSION_RANGE` 格。
+    墙壁 (1) 阻挡爆炸。可炸开的障碍物 (4) 受到爆炸但会挡住后面的瓦片；
+    障碍物变为通路由 detonate 在整条连锁结算完之后统一处理。
+    结果按瓦片缓存在 state.blasts 中 (见 guardbrain.BlastMasks)，地图变化时局部失效。
+    Returns:
+        tuple: 受影响的瓦片，首项为爆炸中心。
+    """
+    return state.blasts.footprint(x, y)
+
+
+def detonate(state, triggered):
+    """
+    连锁引爆：从 triggered 中的炸弹出发做广度优先搜索，爆炸范围内的其他炸弹在同一帧被引爆。
+    所有爆炸范围合并为一个去重的瓦片集合，再统一把其中的障碍物炸成通路，
+    因此结果与炸弹的处理顺序无关，开销与受影响的瓦片数成线性关系。
+    Args:
+        triggered (list): 本帧到期的炸弹坐标，这些炸弹必须仍在 state.bombs 中。
+    Returns:
+        dict: 受影响的瓦片 (按首次被波及的顺序，值无意义)，当作有序集合使用。
+    """
+    bombs = state.bombs
+    cells = state.maze.cells
+    cols = state.cols
+    affected = {}
+    queue = deque()
+    for pos in triggered:
+        del bombs[pos]
+        queue.append(pos)
+    detonated = list(triggered)
+
+    while queue:
+        bomb_x, bomb_y = queue.popleft()
+        for pos in explode(state, bomb_x, bomb_y):
+            if pos in affected:
+                continue
+            affected[pos] = None
+            if pos in bombs: # 被波及的炸弹立即引爆
+                del bombs[pos]
+                queue.append(pos)
+                detonated.append(pos)
+    state.blast_timeline.remove(detonated)
+
+    # 障碍物被炸毁，变为可通行路径 (基于引爆前的地图计算范围，每个瓦片只修改一次)
+    for x, y in affected:
+        if cells[y * cols + x] == 4:
+            state.set_tile(x, y, 0)
+    return affected
+
+
+def place_bomb(state, x, y, owner):
+    """
+    在瓦片 (x, y) 放置一颗炸弹，并安排它在 BOMB_FUSE_TICKS 帧后爆炸。
+    每个瓦片最多只有一颗炸弹。
+    Returns:
+        bool: 是否成功放置。
+    """
+    if (x, y) in state.bombs:
+        return False
+    bomb = state.bombs[(x, y)] = (x, y, state.tick, owner)
+    state.blast_timeline.add(bomb)
+    state.events.append(("bomb_placed", x, y, owner))
+    state.timers.schedule(state.tick + BOMB_FUSE_TICKS, ("bomb", (x, y), state.tick))
+    return True
+
+
+def update_bombs(state):
+    """
+    从定时器队列中取出本帧到期的事件：引爆炸弹 (含连锁反应) 并结算爆炸伤害，
+    移除已经熄灭的爆炸火焰。同一帧内无论有多少颗炸弹爆炸，每个实体最多受到一次伤害。
+    """
+    current_tick = state.tick
+    spatial = state.spatial
+    bombs = state.bombs
+    explosions = state.explosions
+    timers = state.timers
+    triggered = []
+
+    for kind, pos, stamp in timers.pop_due(current_tick):
+        if kind == "explosion":
+            # 同一瓦片上更晚的爆炸会覆盖开始帧号，此时旧的定时器已经失效
+            if explosions.get(pos) == stamp:
+                del explosions[pos]
+            continue
+
+        bomb_info = bombs.get(pos)
+        if bomb_info is None or bomb_info[2] != stamp:
+            continue # 炸弹已经不存在 (例如已被连锁引爆)
+        triggered.append(pos)
+
+    if not triggered:
+        return
+
+    affected = detonate(state, triggered)
+    state.events.append(("explosion", len(affected)))
+    hit_entities = set()
+    for exp_x, exp_y in affected:
+        explosions[(exp_x, exp_y)] = current_tick
+        timers.schedule(current_tick + EXPLOSION_TICKS, ("explosion", (exp_x, exp_y), current_tick))
+        # 检查玩家和守卫是否在爆炸区域：只查询该瓦片的空间哈希桶
+        hit_entities.update(spatial.at(exp_x, exp_y))
+
+    for entity in hit_entities:
+        if entity == PLAYER:
+            state.player_hp -= 1
+        else:
+            state.guards.hp[entity] -= 1
+
+
+def end_game(state, reason):
+    """记录本局的结束原因和胜负结果。"""
+    state.end_reason = reason
+    state.result = END_REASONS[reason]
+
+
+def step(state, inputs, dt):
+    """
+    以固定时间步长 dt (秒) 推进一帧游戏逻辑。
+    Args:
+        state (GameState): 当前游戏状态，会被原地修改。
+        inputs (PlayerInput): 本帧的玩家输入。
+        dt (float): 本帧推进的仿真时间，通常为 config.FIXED_DT。
+    Returns:
+        str | None: 游戏结果 ("won", "lost")，游戏仍在进行时为 None。
+    """
+    if state.result is not None:
+        return state.result
+
+    # --- 重建空间索引 (本帧的爆炸伤害与视线检测都基于帧开始时的位置) ---
+    state.spatial.rebuild(state.player_pixel_pos, state.guards)
+
+    # --- 炸弹和爆炸逻辑更新 ---
+    update_bombs(state)
+
+    # --- 碰撞检测与胜负判断 ---
+    if state.player_hp <= 0:
+        end_game(state, "bombed")
+    elif state.guards.all_stunned():
+        end_game(state, "guard_stunned")
+    elif check_guard_sight(state):
+        end_game(state, "spotted")
+    if state.result is not None:
+        return state.result
+
+    # --- 玩家放置炸弹 ---
+    if inputs.place_bomb:
+        # 玩家放置炸弹的位置基于其当前的瓦片坐标
+        player_current_tile_x, player_current_tile_y = state.player_tile_pos
+        if state.maze.get(player_current_tile_x, player_current_tile_y) in (0, 4):
+            place_bomb(state, player_current_tile_x, player_current_tile_y, 'player')
+
+    # --- 玩家移动 ---
+    speed = PLAYER_SPEED * dt * TICK_RATE
+    state.player_current_speed_x = inputs.dx * speed
+    state.player_current_speed_y = inputs.dy * speed
+
+    # 如果同时按了水平和垂直方向，只允许单一方向移动 (优先垂直方向)
+    if state.player_current_speed_x != 0 and state.player_current_speed_y != 0:
+        state.player_current_speed_x = 0
+
+    move_player_smooth(state, dt)
+
+    # --- 游戏状态更新 ---
+    # 检查玩家是否收集到宝藏 (基于瓦片位置)
+    player_x, player_y = state.player_tile_pos
+    if state.maze.get(player_x, player_y) == 2:
+        state.got_treasures += 1
+        state.set_tile(player_x, player_y, 0)
+
+    # 检查玩家是否到达出口并成功逃脱 (基于瓦片位置)
+    if state.maze.get(player_x, player_y) == 3:
+        if state.got_treasures == state.total_treasures:
+            end_game(state, "escaped")
+            return state.result
+
+    state.flow_field.retarget(player_x, player_y) # 玩家换格时才会重建
+    move_guard_smooth(state, dt) # 所有守卫平滑移动
+
+    state.time += dt
+    state.tick += 1
+    return None
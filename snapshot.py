@@ -0,0 +1,220 @@
+# snapshot.py - 游戏进度的二进制快照 (存档、自动存档与回滚检查点)
+# 快照保存一局游戏在某一帧结束时的全部状态：整张瓦片地图原样写入 (每格 1 字节)，
+# 玩家、守卫、炸弹、爆炸与定时器用 struct 紧凑编码，守卫的数值属性直接写入 array 的内存，
+# 随机数发生器的内部状态也一并保存。因此读取快照后继续仿真，与不中断时逐帧完全一致，
+# 并且不需要重新运行 generate_maze。
+# 距离场、视野缓存、碰撞掩码等派生数据不保存，读取时由 GameState 重新构造；
+# 仿真事件队列 (音效) 只供表现层使用，也不保存。
+#
+# 文件格式 (小端)：
+#   文件头   MAGIC、版本、标志位 (FLAG_ZLIB)、数据长度 (u32)
+#   数据     可选 zlib 压缩：状态、瓦片、随机数状态、守卫数组、守卫的路线、炸弹、爆炸、定时器
+
+import os
+import random
+import struct
+import sys
+import zlib
+from array import array
+from itertools import chain
+
+from config import SNAPSHOT_COMPRESS_LEVEL
+from simulation import GameState, END_REASONS
+from tilegrid import TileGrid
+
+MAGIC = b"TMSV"
+VERSION = 2
+FLAG_ZLIB = 0x01
+
+_HEADER = struct.Struct("<4sBBI")
+# 列数、行数、帧号、仿真时间、玩家像素位置、玩家瓦片位置、玩家速度、玩家血量、已收集 / 总宝藏数、
+# 本帧剩余的守卫规划次数、胜负结果、结束原因、守卫 / 炸弹 / 爆炸 / 定时器数量、定时器序号
+_STATE = struct.Struct("<IIIdddiiddiiiiBBIIIIQ")
+_RNG = struct.Struct("<Bd") # 是否有缓存的高斯随机数、缓存值
+_BOMB = struct.Struct("<iiIB")
+_EXPLOSION = struct.Struct("<iiI")
+_TIMER = struct.Struct("<IQBiiI")
+
+# 守卫的数值属性，按写入顺序排列 (类型码决定每项的字节数)
+GUARD_ARRAYS = ("tile_x", "tile_y", "pixel_x", "pixel_y", "speed_x", "speed_y", "hp", "facing",
+                "path_index", "last_bomb_time", "wait_until")
+# 守卫的长度不定的瓦片列表，按写入顺序排列
+GUARD_LISTS = ("paths", "routes", "retreats")
+
+RESULTS = (None, "won", "lost")
+REASONS = (None,) + tuple(END_REASONS)
+OWNERS = ("player", "guard")
+TIMER_KINDS = ("bomb", "explosion")
+
+_RNG_WORDS = 625 # random.Random 的内部状态：624 个 32 位整数加当前位置
+
+
+def _to_little(values):
+    """array 按小端写出。"""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _from_little(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def dumps(state, compress_level=None):
+    """
+    把 state 编码为快照。compress_level 为 zlib 压缩级别 (1-9)，None 表示不压缩。
+    Returns:
+        bytes
+    """
+    guards = state.guards
+    timers = state.timers
+    out = bytearray(_STATE.pack(
+        state.cols, state.rows, state.tick, state.time,
+        state.player_pixel_pos[0], state.player_pixel_pos[1],
+        state.player_tile_pos[0], state.player_tile_pos[1],
+        state.player_current_speed_x, state.player_current_speed_y,
+        state.player_hp, state.got_treasures, state.total_treasures, state.guard_replans_left,
+        RESULTS.index(state.result), REASONS.index(state.end_reason),
+        len(guards), len(state.bombs), len(state.explosions), len(timers.heap), timers.counter))
+    out += state.maze.cells
+
+    _, words, gauss_next = state.rng.getstate()
+    out += _RNG.pack(gauss_next is not None, gauss_next or 0.0)
+    out += _to_little(array('I', words))
+
+    for name in GUARD_ARRAYS:
+        out += _to_little(getattr(guards, name))
+    # 正在走向的瓦片 (没有时为 -1, -1)；长度不定的瓦片列表先写每个守卫的各列表长度，
+    # 再把所有坐标连续写成一个 int32 数组
+    out += _to_little(array('i', chain.from_iterable(tile or (-1, -1) for tile in guards.next_tiles)))
+    per_guard = list(zip(*(getattr(guards, name) for name in GUARD_LISTS)))
+    out += _to_little(array('I', [len(tiles) for lists in per_guard for tiles in lists]))
+    out += _to_little(array('i', chain.from_iterable(chain.from_iterable(chain.from_iterable(per_guard)))))
+
+    for x, y, placed_tick, owner in state.bombs.values():
+        out += _BOMB.pack(x, y, placed_tick, OWNERS.index(owner))
+    for (x, y), start_tick in state.explosions.items():
+        out += _EXPLOSION.pack(x, y, start_tick)
+    # 定时器按堆中的顺序写出，读取后无需重新建堆
+    for tick, counter, (kind, (x, y), stamp) in timers.heap:
+        out += _TIMER.pack(tick, counter, TIMER_KINDS.index(kind), x, y, stamp)
+
+    flags = 0
+    if compress_level is not None:
+        out = zlib.compress(out, compress_level)
+        flags |= FLAG_ZLIB
+    return _HEADER.pack(MAGIC, VERSION, flags, len(out)) + out
+
+
+def loads(data):
+    """
+    从快照数据 (bytes 或 memoryview) 恢复一个新的 GameState。
+    数据不是快照、被截断或已损坏时抛出 ValueError。
+    """
+    try:
+        return _decode(data)
+    except (struct.error, zlib.error, IndexError) as e:
+        raise ValueError(f"快照数据已损坏 ({e})") from None
+
+
+def _decode(data):
+    magic, version, flags, length = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"不是可识别的快照文件 (标识 {magic!r}，版本 {version})")
+    payload = memoryview(data)[_HEADER.size:_HEADER.size + length]
+    if len(payload) != length:
+        raise ValueError(f"快照数据不完整 (应为 {length} 字节，只有 {len(payload)} 字节)")
+    if flags & FLAG_ZLIB:
+        payload = memoryview(zlib.decompress(payload))
+
+    (cols, rows, tick, sim_time, pixel_x, pixel_y, tile_x, tile_y, speed_x, speed_y,
+     player_hp, got_treasures, total_treasures, replans_left, result, reason,
+     guard_count, bomb_count, explosion_count, timer_count, timer_counter) = _STATE.unpack_from(payload, 0)
+    pos = _STATE.size
+    maze = TileGrid(cols, rows, cells=payload[pos:pos + cols * rows])
+    pos += cols * rows
+
+    has_gauss, gauss_next = _RNG.unpack_from(payload, pos)
+    pos += _RNG.size
+    words = _from_little('I', payload[pos:pos + 4 * _RNG_WORDS])
+    pos += 4 * _RNG_WORDS
+    rng = random.Random()
+    rng.setstate((3, tuple(words), gauss_next if has_gauss else None))
+
+    state = GameState(maze, total_treasures, (tile_x, tile_y), [], [], rng)
+    state.tick = tick
+    state.time = sim_time
+    state.player_pixel_pos[:] = [pixel_x, pixel_y]
+    state.player_current_speed_x = speed_x
+    state.player_current_speed_y = speed_y
+    state.player_hp = player_hp
+    state.got_treasures = got_treasures
+    state.guard_replans_left = replans_left
+    state.result = RESULTS[result]
+    state.end_reason = REASONS[reason]
+
+    guards = state.guards
+    for name in GUARD_ARRAYS:
+        typecode = getattr(guards, name).typecode
+        size = array(typecode).itemsize * guard_count
+        setattr(guards, name, _from_little(typecode, payload[pos:pos + size]))
+        pos += size
+    next_coords = iter(_from_little('i', payload[pos:pos + 8 * guard_count]))
+    pos += 8 * guard_count
+    guards.next_tiles = [tile if tile[0] >= 0 else None for tile in zip(next_coords, next_coords)]
+    lengths = _from_little('I', payload[pos:pos + 4 * len(GUARD_LISTS) * guard_count])
+    pos += 4 * len(GUARD_LISTS) * guard_count
+    coord_count = 2 * sum(lengths)
+    coords = iter(_from_little('i', payload[pos:pos + 4 * coord_count]))
+    pos += 4 * coord_count
+    tiles = list(zip(coords, coords))
+    lists = [[] for _ in GUARD_LISTS]
+    start = 0
+    for index, length in enumerate(lengths):
+        lists[index % len(GUARD_LISTS)].append(tiles[start:start + length])
+        start += length
+    for name, values in zip(GUARD_LISTS, lists):
+        setattr(guards, name, values)
+
+    for _ in range(bomb_count):
+        x, y, placed_tick, owner = _BOMB.unpack_from(payload, pos)
+        pos += _BOMB.size
+        state.bombs[(x, y)] = (x, y, placed_tick, OWNERS[owner])
+    for _ in range(explosion_count):
+        x, y, start_tick = _EXPLOSION.unpack_from(payload, pos)
+        pos += _EXPLOSION.size
+        state.explosions[(x, y)] = start_tick
+    heap = state.timers.heap
+    for _ in range(timer_count):
+        timer_tick, counter, kind, x, y, stamp = _TIMER.unpack_from(payload, pos)
+        pos += _TIMER.size
+        heap.append((timer_tick, counter, (TIMER_KINDS[kind], (x, y), stamp)))
+    if pos != len(payload):
+        raise ValueError(f"快照数据已损坏 (解析了 {pos} 字节，数据共 {len(payload)} 字节)")
+    state.timers.counter = timer_counter
+    state.blast_timeline.sync(state)
+    return state
+
+
+def save_snapshot(state, path, compress_level=SNAPSHOT_COMPRESS_LEVEL):
+    """
+    把快照写入 path。先写临时文件再替换，写到一半退出也不会损坏原有的存档。
+    """
+    data = dumps(state, compress_level)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def load_snapshot(path):
+    """
+    读取快照文件并恢复 GameState。文件整体读入 bytes 而不是映射到内存：
+    解析出错时异常的回溯仍引用着数据的切片，映射无法关闭，会抛出 BufferError 而不是 ValueError。
+    """
+    with open(path, "rb") as f:
+        return loads(f.read())
@@ -0,0 +1,69 @@
+# spatial.py - 按瓦片分桶的空间哈希
+# 每个仿真帧开始时把玩家和所有未被炸晕的守卫放进它们的像素矩形覆盖的瓦片桶中
+# (一个 TILE_SIZE x TILE_SIZE 的实体最多覆盖 2x2 个瓦片)。之后爆炸伤害、视线等
+# "某个瓦片上有谁" 的查询都只需一次字典查找，而不必遍历全部实体、逐个构造 pygame.Rect。
+
+from config import TILE_SIZE
+
+PLAYER = -1 # 玩家在空间哈希中的实体编号；守卫使用其在 Guards 中的编号 (0, 1, 2, ...)
+
+
+class SpatialHash:
+    """
+    瓦片下标 (y * cols + x) -> 占据该瓦片的实体编号列表。
+    """
+
+    __slots__ = ("cols", "buckets")
+
+    def __init__(self, cols):
+        self.cols = cols
+        self.buckets = {}
+
+    def clear(self):
+        """清空所有桶。"""
+        self.buckets.clear()
+
+    def insert(self, entity, pixel_x, pixel_y):
+        """
+        把左上角位于 (pixel_x, pixel_y) 的实体放入其覆盖的每个瓦片桶中。
+        与 pygame.Rect 一样先把像素坐标截断为整数，因此结果与原先的 colliderect 判定一致。
+        """
+        left, top = int(pixel_x), int(pixel_y)
+        buckets = self.buckets
+        key = (top // TILE_SIZE) * self.cols + left // TILE_SIZE
+        keys = (key, key + 1) if left % TILE_SIZE else (key,) # 跨越两列
+        if top % TILE_SIZE: # 跨越两行
+            keys += tuple(k + self.cols for k in keys)
+        for key in keys:
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [entity]
+            else:
+                bucket.append(entity)
+
+    def rebuild(self, player_pixel_pos, guards):
+        """清空后重新放入玩家与所有未被炸晕的守卫 (每帧调用一次，守卫部分内联了 insert 以减少调用开销)。"""
+        self.buckets.clear()
+        self.insert(PLAYER, player_pixel_pos[0], player_pixel_pos[1])
+        buckets = self.buckets
+        cols = self.cols
+        pixel_y = guards.pixel_y
+        hp = guards.hp
+        for i, x in enumerate(guards.pixel_x):
+            if hp[i] <= 0:
+                continue
+            left, top = int(x), int(pixel_y[i])
+            key = (top // TILE_SIZE) * cols + left // TILE_SIZE
+            keys = (key, key + 1) if left % TILE_SIZE else (key,)
+            if top % TILE_SIZE:
+                keys += tuple(k + cols for k in keys)
+            for key in keys:
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = [i]
+                else:
+                    bucket.append(i)
+
+    def at(self, x, y):
+        """瓦片 (x, y) 上的实体编号 (没有实体时为空元组)。"""
+        return self.buckets.get(y * self.cols + x, ())
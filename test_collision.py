@@ -0,0 +1,68 @@
+# test_collision.py - 扫掠移动与逐像素移动的结果一致 (任意速度都不会穿墙)，位掩码随地图变化正确更新
+# 运行：python -m pytest -q
+
+import math
+import random
+
+from collision import CollisionMask
+from config import TILE_BOX, TILE_FLOOR, TILE_SIZE
+from maze import generate_maze
+from tilegrid import BLOCKED_TABLE
+
+
+def _overlaps(grid, left, top, size=TILE_SIZE):
+    """逐瓦片检查左上角在整数像素 (left, top) 的矩形是否与阻挡瓦片重叠 (地图之外视为阻挡)。"""
+    for y in range(top // TILE_SIZE, (top + size - 1) // TILE_SIZE + 1):
+        for x in range(left // TILE_SIZE, (left + size - 1) // TILE_SIZE + 1):
+            if not (0 <= x < grid.cols and 0 <= y < grid.rows) or BLOCKED_TABLE[grid.cells[y * grid.cols + x]]:
+                return True
+    return False
+
+
+def _step_by_pixel(blocked, start, delta):
+    """
+    沿一个坐标轴逐个整数像素移动，停在第一个阻挡位置之前 (贴紧，不后退)。
+    阻挡只取决于截断后的像素坐标，所以只需检查途经的整数位置。
+    """
+    target = start + delta
+    if delta > 0:
+        for position in range(math.floor(start) + 1, math.floor(target) + 1):
+            if blocked(position):
+                return max(start, position - 1)
+    elif delta < 0:
+        for position in range(math.floor(start) - 1, math.floor(target) - 1, -1):
+            if blocked(position):
+                return max(target, min(start, position + 1))
+    return target
+
+
+def test_sweep_matches_pixel_steps():
+    rng = random.Random(18)
+    for _ in range(30):
+        cols, rows = rng.randint(5, 25), rng.randint(5, 25)
+        grid = generate_maze(rows, cols, rng, rng.choice(["scatter", "cellular"]))
+        mask = CollisionMask(grid)
+        for _ in range(100):
+            x = rng.uniform(0, (cols - 1) * TILE_SIZE)
+            y = rng.uniform(0, (rows - 1) * TILE_SIZE)
+            if rng.random() < 0.5:
+                x = float(round(x / TILE_SIZE) * TILE_SIZE) # 对齐到瓦片 (正常游戏中的常见情况)
+            if _overlaps(grid, math.floor(x), math.floor(y)):
+                continue
+            delta = rng.choice([1, 3, 0.5, TILE_SIZE, 2.5 * TILE_SIZE, 7 * TILE_SIZE]) * rng.choice([1, -1])
+            expected_x = _step_by_pixel(lambda left: _overlaps(grid, left, math.floor(y)), x, delta)
+            expected_y = _step_by_pixel(lambda top: _overlaps(grid, math.floor(x), top), y, delta)
+            assert mask.sweep_x(x, y, TILE_SIZE, TILE_SIZE, delta) == expected_x
+            assert mask.sweep_y(x, y, TILE_SIZE, TILE_SIZE, delta) == expected_y
+
+
+def test_mask_follows_tile_changes():
+    rng = random.Random(81)
+    grid = generate_maze(30, 40, rng)
+    mask = CollisionMask(grid)
+    for _ in range(300):
+        x, y = rng.randrange(grid.cols), rng.randrange(grid.rows)
+        old, new = grid.get(x, y), rng.choice([TILE_FLOOR, TILE_BOX])
+        grid.set(x, y, new)
+        mask.on_tile_changed(x, y, old, new)
+    assert mask.row_bits == CollisionMask(grid).row_bits
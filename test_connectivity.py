@@ -0,0 +1,56 @@
+# test_connectivity.py - 连通性检查：按层的掩码 0-1 广度优先搜索与逐格计算的结果一致
+# 运行：python -m pytest -q
+
+import random
+from collections import deque
+
+import pytest
+
+from config import TILE_BOX, TILE_FLOOR
+from connectivity import TRAVERSABLE_TABLE, bomb_region, reachable_region
+from maze import generate_maze
+
+
+def _bomb_costs(grid, start):
+    """逐格的 0-1 广度优先搜索：到达每个瓦片最少需要炸开的障碍物数量，不可到达为 -1。"""
+    cols, rows = grid.cols, grid.rows
+    cells = grid.cells
+    costs = [-1] * len(cells)
+    start_index = start[1] * cols + start[0]
+    costs[start_index] = 0
+    queue = deque([start_index])
+    while queue:
+        index = queue.popleft()
+        x, y = index % cols, index // cols
+        for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if not (0 <= nx < cols and 0 <= ny < rows) or not TRAVERSABLE_TABLE[cells[ny * cols + nx]]:
+                continue
+            neighbor = ny * cols + nx
+            cost = costs[index] + (cells[neighbor] == TILE_BOX)
+            if costs[neighbor] == -1 or cost < costs[neighbor]:
+                costs[neighbor] = cost
+                if cost == costs[index]:
+                    queue.appendleft(neighbor)
+                else:
+                    queue.append(neighbor)
+    return costs
+
+
+@pytest.mark.parametrize("algorithm", ["scatter", "backtracker", "kruskal", "cellular"])
+def test_bomb_region_matches_bfs(algorithm):
+    rng = random.Random(algorithm)
+    for _ in range(20):
+        cols, rows = rng.randint(5, 40), rng.randint(5, 40)
+        grid = generate_maze(rows, cols, rng, algorithm, {"box_density": rng.choice([0.05, 0.1, 0.3])})
+        floors = [(i % cols, i // cols) for i, tile in enumerate(grid.cells) if tile == TILE_FLOOR]
+        if not floors:
+            continue
+        start = rng.choice(floors)
+        costs = _bomb_costs(grid, start)
+        tiles = [(x, y) for y in range(rows) for x in range(cols)]
+        reachable = reachable_region(grid, start)
+        assert [pos in reachable for pos in tiles] == [cost >= 0 for cost in costs]
+        for max_bombs in range(5):
+            region = bomb_region(grid, start, max_bombs)
+            assert [pos in region for pos in tiles] == [0 <= cost <= max_bombs for cost in costs]
+            assert len(region) == sum(0 <= cost <= max_bombs for cost in costs)
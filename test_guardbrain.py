@@ -0,0 +1,90 @@
+# test_guardbrain.py - 守卫炸弹决策：候选瓦片打分；增量维护的爆炸时间表与爆炸足迹缓存和暴力计算结果一致
+# 运行：python -m pytest -q
+
+import random
+
+from config import BOMB_FUSE_TICKS, TILE_BOX, TILE_FLOOR, TILE_WALL
+from mazegen import add_border
+from simulation import GameState, new_game_state, place_bomb, update_bombs
+from test_simulation import blast_rays
+from tilegrid import TileGrid
+
+
+def _state(player, guard, walls=()):
+    """9x9、四周为墙壁的空地图，一个守卫。"""
+    maze = TileGrid(9, 9)
+    add_border(maze)
+    for x, y in walls:
+        maze.set(x, y, TILE_WALL)
+    state = GameState(maze, 0, player, [guard], [[guard]])
+    state.spatial.rebuild(state.player_pixel_pos, state.guards)
+    return state
+
+
+def test_attack_from_own_tile():
+    state = _state(player=(5, 3), guard=(3, 3))
+    assert state.guard_brain.plan_attacks(state, [0]) == {0: (3, 3)}
+
+
+def test_attack_moves_to_neighbour():
+    # 所在瓦片的足迹炸不到 (5, 4)，往下走一格后可以
+    state = _state(player=(5, 4), guard=(3, 3))
+    assert state.guard_brain.plan_attacks(state, [0]) == {0: (3, 4)}
+
+
+def test_wall_blocks_attack():
+    state = _state(player=(5, 3), guard=(3, 3), walls=[(4, 3)])
+    assert state.guard_brain.plan_attacks(state, [0]) == {}
+
+
+def _brute_timeline(state):
+    """
+    暴力计算爆炸时间表：每颗炸弹的爆炸帧号取它自己的引信与所有足迹覆盖它的炸弹中最早的一个，
+    反复松弛直到不再变化；每个瓦片取覆盖它的炸弹中最早的爆炸帧号。
+    """
+    maze = state.maze
+    footprints = {pos: blast_rays(maze.cells, maze.cols, maze.rows, *pos) for pos in state.bombs}
+    fuse = {pos: bomb[2] + BOMB_FUSE_TICKS for pos, bomb in state.bombs.items()}
+    changed = True
+    while changed:
+        changed = False
+        for pos, tiles in footprints.items():
+            for other in tiles:
+                if other in fuse and fuse[pos] < fuse[other]:
+                    fuse[other] = fuse[pos]
+                    changed = True
+    blast_tick = {}
+    for pos, tiles in footprints.items():
+        for tile in tiles:
+            blast_tick[tile] = min(blast_tick.get(tile, fuse[pos]), fuse[pos])
+    return fuse, blast_tick
+
+
+def test_timeline_and_footprints_match_brute_force():
+    rng = random.Random(23)
+    for seed in range(12):
+        state = new_game_state(rng.randint(10, 25), rng.randint(10, 25), seed, rng.choice(["scatter", "cellular"]),
+                               guard_count=0, maze_options={"box_density": 0.3})
+        maze = state.maze
+        cols = maze.cols
+        timeline = state.blast_timeline
+        for _ in range(400):
+            if rng.random() < 0.15:
+                x, y = rng.randrange(1, cols - 1), rng.randrange(1, maze.rows - 1)
+                if maze.get(x, y) in (TILE_FLOOR, TILE_BOX):
+                    place_bomb(state, x, y, 'player')
+            if rng.random() < 0.02:
+                # 地图被其他方式修改 (障碍物变成墙壁会让足迹变小，时间表需要整体重建)
+                x, y = rng.randrange(1, cols - 1), rng.randrange(1, maze.rows - 1)
+                if (x, y) not in state.bombs:
+                    state.set_tile(x, y, rng.choice([TILE_FLOOR, TILE_BOX, TILE_WALL]))
+            state.spatial.rebuild(state.player_pixel_pos, state.guards)
+            update_bombs(state)
+            state.tick += 1
+
+            fuse, blast_tick = _brute_timeline(state)
+            assert timeline.fuse == fuse
+            assert timeline.blast_tick == blast_tick
+            for (x, y), (tiles, keys) in state.blasts.cache.items():
+                assert set(tiles) == blast_rays(maze.cells, cols, maze.rows, x, y) and len(tiles) == len(set(tiles))
+                assert keys == tuple(ty * cols + tx for tx, ty in tiles)
@@ -0,0 +1,22 @@
+# test_hud.py - 随游戏附带的字体子集 fonts/hud.ttf 包含界面上出现的全部字符
+# 运行：python -m pytest -q (界面新增文字时需要重新生成字体子集)
+
+import os
+import string
+
+import pygame.freetype
+
+from config import HUD_FONT_FILE
+from main import END_MESSAGES
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_bundled_font_covers_game_text():
+    pygame.freetype.init()
+    font = pygame.freetype.Font(os.path.join(HERE, HUD_FONT_FILE), 18)
+    texts = [message for message, _ in END_MESSAGES.values()]
+    texts.append("宝藏 " + string.digits + "/") # Hud 的宝藏计数
+    for text in texts:
+        missing = [char for char, metrics in zip(text, font.get_metrics(text)) if metrics is None]
+        assert not missing, text
@@ -0,0 +1,45 @@
+# test_pathfinding.py - 距离场的增量修复与整张重建结果一致
+# 运行：python -m pytest -q
+
+import random
+
+import pytest
+
+from config import TILE_BOX, TILE_FLOOR, TILE_WALL
+from maze import generate_maze
+from pathfinding import FlowField
+
+
+def _fresh(grid, target, radius):
+    field = FlowField(grid, radius)
+    field.retarget(*target)
+    return field.distances
+
+
+@pytest.mark.parametrize("algorithm", ["scatter", "backtracker", "cellular"])
+def test_flow_field_repair_matches_rebuild(algorithm):
+    rng = random.Random(algorithm)
+    for _ in range(10):
+        cols, rows = rng.randint(10, 40), rng.randint(10, 40)
+        grid = generate_maze(rows, cols, rng, algorithm, {"box_density": 0.2})
+        cells = grid.cells
+        floors = [i for i, tile in enumerate(cells) if tile == TILE_FLOOR]
+        target = divmod(rng.choice(floors), cols)[::-1]
+        radius = rng.randint(5, 40)
+        field = FlowField(grid, radius)
+        field.retarget(*target)
+        boxes = [i for i, tile in enumerate(cells) if tile == TILE_BOX]
+        rng.shuffle(boxes)
+        for index in boxes[:30]:
+            # 炸开障碍物：增量修复
+            x, y = index % cols, index // cols
+            cells[index] = TILE_FLOOR
+            field.on_tile_changed(x, y, TILE_BOX, TILE_FLOOR)
+            field.retarget(*target)
+            assert field.distances == _fresh(grid, target, radius)
+        # 瓦片变得更难通过：下一次 retarget 整张重建
+        index = rng.choice(floors)
+        cells[index] = TILE_WALL
+        field.on_tile_changed(index % cols, index // cols, TILE_FLOOR, TILE_WALL)
+        field.retarget(*target)
+        assert field.distances == _fresh(grid, target, radius)
@@ -0,0 +1,50 @@
+# test_renderer.py - 脏矩形渲染器：每一帧的画面与不使用缓存的完整重绘 (draw_frame) 逐像素一致
+# 运行：python -m pytest -q (无窗口环境下使用 SDL 的 dummy 视频驱动)
+
+import os
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+import renderer
+from bots import ThiefBot
+from config import FIXED_DT, HEIGHT, WIDTH
+from renderer import DirtyRectRenderer, draw_frame
+from simulation import new_game_state, step
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope="module")
+def screen():
+    pygame.init()
+    surface = pygame.display.set_mode((WIDTH, HEIGHT))
+    if not renderer.GAME_IMAGES:
+        renderer.load_images(os.path.join(HERE, renderer.ATLAS_IMAGE), os.path.join(HERE, renderer.ATLAS_MANIFEST))
+    yield surface
+    pygame.quit()
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_dirty_rects_match_full_redraw(screen, seed):
+    state = new_game_state(30, 40, seed, maze_options={"box_density": 0.3})
+    changed = []
+    state.add_tile_listener(lambda x, y, old_tile, new_tile: changed.append((x, y)))
+    bot = ThiefBot(state, random.Random(seed))
+    dirty_renderer = DirtyRectRenderer(screen, state)
+    reference = pygame.Surface((WIDTH, HEIGHT))
+    offsets = set()
+    for _ in range(300):
+        if state.result is None:
+            step(state, bot.act(state), FIXED_DT)
+        dirty_renderer.draw()
+        offset = dirty_renderer.camera.offset
+        offsets.add(tuple(offset))
+        draw_frame(reference, state, offset, dirty_renderer.animator)
+        assert pygame.image.tobytes(screen, "RGB") == pygame.image.tobytes(reference, "RGB"), state.tick
+    # 确认摄像机移动过，且有瓦片被炸开 (两条路径都被覆盖到)
+    assert len(offsets) > 1
+    assert changed
@@ -0,0 +1,42 @@
+# test_replay.py - 录像：带种子录制的对局保存、读取后无窗口回放，每一帧的状态哈希都一致
+# 运行：python -m pytest -q
+
+import random
+
+from bots import ThiefBot
+from config import FIXED_DT
+from replay import Replay, ReplayRecorder, run_replay
+from simulation import step
+
+
+def _record(seed, maze_options=None, max_ticks=3000):
+    """让小偷机器人玩一局并录制。"""
+    state, recorder = ReplayRecorder.start(12, 22, "scatter", seed, maze_options=maze_options)
+    bot = ThiefBot(state, random.Random(seed))
+    while state.result is None and state.tick < max_ticks:
+        inputs = bot.act(state)
+        step(state, inputs, FIXED_DT)
+        recorder.record(inputs)
+    return state, recorder.replay
+
+
+def test_round_trip(tmp_path):
+    for seed in range(4):
+        state, replay = _record(seed, {"box_density": 0.2})
+        path = str(tmp_path / f"{seed}.replay")
+        replay.save(path)
+        loaded = Replay.load(path)
+        assert loaded.to_bytes() == replay.to_bytes()
+        assert loaded.maze_options == {"box_density": 0.2}
+        final, mismatch = run_replay(loaded)
+        assert mismatch is None
+        assert (final.tick, final.end_reason, final.player_pixel_pos) == \
+               (state.tick, state.end_reason, state.player_pixel_pos)
+
+
+def test_divergence_is_reported():
+    _, replay = _record(7)
+    tick = replay.tick_count // 2
+    replay.hashes[tick] ^= 1 # 录制时的状态与回放不一致的第一帧
+    _, mismatch = run_replay(replay)
+    assert mismatch == tick
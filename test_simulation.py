@@ -0,0 +1,86 @@
+# test_simulation.py - 连锁爆炸：与逐颗炸弹反复引爆的暴力计算结果一致，每个实体只受一次伤害
+# 运行：python -m pytest -q
+
+import random
+
+from config import (
+    BOMB_FUSE_TICKS, EXPLOSION_RANGE, GUARD_MAX_HP, PLAYER_MAX_HP, TILE_BOX, TILE_FLOOR, TILE_SIZE, TILE_WALL,
+)
+from maze import generate_level
+from mazegen import add_border
+from simulation import GameState, detonate, place_bomb, update_bombs
+from tilegrid import TileGrid
+
+
+def blast_rays(cells, cols, rows, x, y, blast_range=EXPLOSION_RANGE):
+    """逐格追踪四条射线的爆炸范围 (不使用缓存)：墙壁阻挡，障碍物被炸到但挡住后面的瓦片。"""
+    tiles = {(x, y)}
+    for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+        for i in range(1, blast_range + 1):
+            nx, ny = x + dx * i, y + dy * i
+            if not (0 <= nx < cols and 0 <= ny < rows) or cells[ny * cols + nx] == TILE_WALL:
+                break
+            tiles.add((nx, ny))
+            if cells[ny * cols + nx] == TILE_BOX:
+                break
+    return tiles
+
+
+def _brute_chain(cells, cols, rows, bombs, triggered):
+    """反复引爆落在已有爆炸范围内的炸弹，直到不再变化。返回 (受影响的瓦片, 被引爆的炸弹)。"""
+    exploded = set(triggered)
+    while True:
+        affected = set()
+        for x, y in exploded:
+            affected |= blast_rays(cells, cols, rows, x, y)
+        more = {pos for pos in bombs if pos in affected} - exploded
+        if not more:
+            return affected, exploded
+        exploded |= more
+
+
+def test_chain_matches_brute_force():
+    rng = random.Random(10)
+    chained = 0
+    for seed in range(40):
+        maze, _, player_start, guard_starts, guard_paths = generate_level(rng.randint(8, 30), rng.randint(8, 30),
+                                                                          random.Random(seed))
+        state = GameState(maze, 0, player_start, guard_starts, guard_paths)
+        cols, rows = maze.cols, maze.rows
+        open_tiles = [(i % cols, i // cols) for i, tile in enumerate(maze.cells) if tile in (TILE_FLOOR, TILE_BOX)]
+        for x, y in rng.sample(open_tiles, min(len(open_tiles), 25)):
+            place_bomb(state, x, y, 'player')
+        before = bytes(maze.cells)
+        bombs = dict(state.bombs)
+        triggered = rng.sample(sorted(bombs), 3)
+        expected, exploded = _brute_chain(before, cols, rows, bombs, triggered)
+        chained += len(exploded) > len(triggered)
+
+        affected = detonate(state, triggered)
+        assert set(affected) == expected and len(affected) == len(expected)
+        assert set(state.bombs) == set(bombs) - exploded
+        for i, (old, new) in enumerate(zip(before, maze.cells)):
+            pos = (i % cols, i // cols)
+            assert new == (TILE_FLOOR if old == TILE_BOX and pos in expected else old)
+        # 爆炸时间表只剩下未引爆的炸弹
+        assert state.blast_timeline.known_bombs == state.bombs
+    assert chained > 10 # 大部分地图上都发生了连锁
+
+
+def test_chain_hits_each_entity_once():
+    maze = TileGrid(12, 5)
+    add_border(maze)
+    # 玩家跨越 (3, 2) 与 (4, 2)，守卫站在 (6, 2)；只有第一颗炸弹到期，其余三颗被它连锁引爆，
+    # 每个实体都在多颗炸弹的范围内
+    state = GameState(maze, 0, (3, 2), [(6, 2)], [[(6, 2)]])
+    state.player_pixel_pos[0] += TILE_SIZE // 2
+    place_bomb(state, 2, 2, 'player')
+    state.tick = 1
+    for x in (4, 6, 8):
+        place_bomb(state, x, 2, 'guard')
+    state.tick = BOMB_FUSE_TICKS
+    state.spatial.rebuild(state.player_pixel_pos, state.guards)
+    update_bombs(state)
+    assert not state.bombs
+    assert state.player_hp == PLAYER_MAX_HP - 1
+    assert state.guards.hp[0] == GUARD_MAX_HP - 1
@@ -0,0 +1,44 @@
+# test_snapshot.py - 快照读写：完整往返，以及截断、损坏的存档只抛出 ValueError
+# 运行：python -m pytest -q
+
+import pytest
+
+from simulation import PlayerInput, new_game_state, place_bomb, step
+from snapshot import dumps, loads, load_snapshot, save_snapshot
+
+
+def _state():
+    state = new_game_state(20, 30, seed=5)
+    place_bomb(state, state.player_tile_pos[0], state.player_tile_pos[1], 'player')
+    for _ in range(10):
+        step(state, PlayerInput(0, 0, False), 1 / 60)
+    return state
+
+
+@pytest.mark.parametrize("compress_level", [None, 6])
+def test_round_trip(tmp_path, compress_level):
+    state = _state()
+    path = str(tmp_path / "game.sav")
+    save_snapshot(state, path, compress_level)
+    loaded = load_snapshot(path)
+    assert dumps(loaded) == dumps(state)
+
+
+@pytest.mark.parametrize("compress_level", [None, 6])
+def test_truncated_file(tmp_path, compress_level):
+    path = tmp_path / "game.sav"
+    save_snapshot(_state(), str(path), compress_level)
+    data = path.read_bytes()
+    for size in (len(data) // 2, len(data) - 1, 8, 0):
+        path.write_bytes(data[:size])
+        with pytest.raises(ValueError):
+            load_snapshot(str(path))
+
+
+def test_corrupt_data():
+    data = bytearray(dumps(_state(), 6))
+    data[20:40] = bytes(20) # 破坏压缩数据
+    with pytest.raises(ValueError):
+        loads(bytes(data))
+    with pytest.raises(ValueError):
+        loads(b"not a snapshot file")
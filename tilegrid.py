@@ -0,0 +1,67 @@
+# tilegrid.py - 紧凑的迷宫瓦片存储
+# 用一个按行展开的 bytearray 保存整张地图 (每个瓦片 1 字节)，取代原先的 list of lists。
+# 500x500 的地图只占 250 KB；整图查询 (阻挡掩码) 借助 bytes.translate 在 C 层一次完成，
+# 不需要逐格的 Python 循环。
+
+from config import TILE_FLOOR, TILE_WALL, TILE_BOX
+
+
+def make_tile_table(tiles):
+    """构造 bytes.translate 用的 256 字节查找表：tiles 中的类型映射为 1，其余为 0。"""
+    return bytes(1 if value in tiles else 0 for value in range(256))
+
+# 阻挡移动的瓦片：墙壁 (1) 与可炸开障碍物 (4)
+BLOCKING_TILES = (TILE_WALL, TILE_BOX)
+BLOCKED_TABLE = make_tile_table(BLOCKING_TILES)
+
+
+class TileGrid:
+    """
+    cols x rows 的瓦片网格，cells[y * cols + x] 为 (x, y) 处的瓦片类型。
+    热路径可以直接读取 cells 与 cols 以避免方法调用开销。
+    """
+
+    __slots__ = ("cols", "rows", "cells")
+
+    def __init__(self, cols, rows, fill=TILE_FLOOR, cells=None):
+        self.cols = cols
+        self.rows = rows
+        if cells is None:
+            self.cells = bytearray([fill]) * (cols * rows)
+        else:
+            if len(cells) != cols * rows:
+                raise ValueError(f"瓦片数据长度 {len(cells)} 与网格大小 {cols}x{rows} 不符")
+            self.cells = bytearray(cells)
+
+    def copy(self):
+        """复制整个网格。"""
+        return TileGrid(self.cols, self.rows, cells=self.cells)
+
+    def get(self, x, y):
+        """读取 (x, y) 处的瓦片类型。"""
+        return self.cells[y * self.cols + x]
+
+    def set(self, x, y, tile):
+        """直接修改 (x, y) 处的瓦片 (游戏过程中请使用 GameState.set_tile 以通知监听器)。"""
+        self.cells[y * self.cols + x] = tile
+
+    def fill_rect(self, x, y, width, height, tile):
+        """把一个矩形区域整体设为同一种瓦片 (按行切片赋值)。"""
+        line = bytes([tile]) * width
+        for row_y in range(y, y + height):
+            start = row_y * self.cols + x
+            self.cells[start:start + width] = line
+
+    # --- 整图查询 ---
+
+    def blocked_mask(self):
+        """阻挡移动的瓦片为 1，其余为 0。"""
+        return self.cells.translate(BLOCKED_TABLE)
+
+    def __eq__(self, other):
+        return (isinstance(other, TileGrid) and self.cols == other.cols
+                and self.rows == other.rows and self.cells == other.cells)
+
+    def __repr__(self):
+        return f"TileGrid({self.cols}x{self.rows})"
+
@@ -0,0 +1,38 @@
+# timers.py - 以仿真帧号为键的定时器队列
+# 炸弹引信与爆炸火焰的到期时间都换算成仿真帧号 (state.tick) 放入二叉堆，
+# 每帧只弹出已经到期的条目 (O(log n))，不再每帧复制并扫描整个列表、调用 list.remove。
+# 到期时间只取决于帧号而不是墙上时钟，因此同样的输入序列总能得到同样的结果 (可回放)。
+
+import heapq
+
+
+class TimerQueue:
+    """
+    (到期帧号, 序号, 事件) 组成的最小堆。序号保证同一帧到期的事件按加入顺序弹出，
+    事件本身不参与比较。
+    被取消的定时器不会从堆中删除 (惰性删除)：到期时由调用者检查事件是否仍然有效。
+    """
+
+    __slots__ = ("heap", "counter")
+
+    def __init__(self):
+        self.heap = []
+        self.counter = 0
+
+    def schedule(self, tick, event):
+        """安排 event 在第 tick 帧到期。"""
+        heapq.heappush(self.heap, (tick, self.counter, event))
+        self.counter += 1
+
+    def pop_due(self, tick):
+        """依次弹出所有在第 tick 帧或之前到期的事件 (生成器)。"""
+        heap = self.heap
+        while heap and heap[0][0] <= tick:
+            yield heapq.heappop(heap)[2]
+
+    def next_tick(self):
+        """最早到期的帧号；队列为空时为 None。"""
+        return self.heap[0][0] if self.heap else None
+
+    def __len__(self):
+        return len(self.heap)
@@ -0,0 +1,119 @@
+# visibility.py - 守卫视野
+# 守卫面朝自己的移动方向 (上、下、左、右)，视野是朝向前方、最远 GUARD_SIGHT_RANGE 格的扇形
+# (GUARD_SIGHT_SPREAD 为 0 时退化为一条直线)。从守卫所在瓦片到扇形内每个瓦片沿 Bresenham 直线
+# 投射一条视线，途中经过墙壁或可炸开障碍物即被遮挡。
+#
+# 视野只取决于 (瓦片, 朝向) 和周围的地图，因此结果按 (瓦片, 朝向) 缓存，所有守卫共用：
+# 胜负判定与渲染每帧查询到的是同一个集合。缓存同时记录每条视线实际检查过的瓦片，
+# 地图监听器收到某个瓦片的阻挡性发生变化时，只丢弃视线经过该瓦片的那些缓存项。
+
+from tilegrid import BLOCKED_TABLE
+
+# 朝向编号 -> 方向向量，顺序与精灵表的朝向 (下、左、右、上) 一致
+FACINGS = ((0, 1), (-1, 0), (1, 0), (0, -1))
+FACING_DOWN = 0
+
+
+def facing_of(dx, dy):
+    """移动方向 (dx, dy) 对应的朝向编号；原地不动时返回 None。"""
+    if dx == dy == 0:
+        return None
+    if abs(dx) >= abs(dy):
+        return 2 if dx > 0 else 1
+    return FACING_DOWN if dy > 0 else 3
+
+
+def bresenham(x0, y0, x1, y1):
+    """从 (x0, y0) 到 (x1, y1) 的 Bresenham 直线经过的瓦片 (不含起点，含终点)。"""
+    tiles = []
+    dx, dy = abs(x1 - x0), -abs(y1 - y0)
+    step_x = 1 if x1 > x0 else -1
+    step_y = 1 if y1 > y0 else -1
+    error = dx + dy
+    x, y = x0, y0
+    while (x, y) != (x1, y1):
+        double_error = 2 * error
+        if double_error >= dy:
+            error += dy
+            x += step_x
+        if double_error <= dx:
+            error += dx
+            y += step_y
+        tiles.append((x, y))
+    return tiles
+
+
+def build_rays(sight_range, spread):
+    """
+    为每个朝向预先计算扇形内的视线：[(目标偏移, 途经的偏移列表), ...]，按距离由近到远排列。
+    前方第 d 格处，两侧各覆盖 int(d * spread) 格。
+    """
+    rays = []
+    for forward_x, forward_y in FACINGS:
+        facing_rays = []
+        for distance in range(1, sight_range + 1):
+            width = int(distance * spread)
+            for side in range(-width, width + 1):
+                # 侧向偏移垂直于朝向
+                target = (forward_x * distance - forward_y * side, forward_y * distance + forward_x * side)
+                facing_rays.append((target, bresenham(0, 0, target[0], target[1])))
+        rays.append(facing_rays)
+    return rays
+
+
+class GuardVision:
+    """
+    (瓦片, 朝向) -> 可见瓦片集合的缓存。注册为 GameState 的地图监听器后自动失效。
+    """
+
+    def __init__(self, maze, sight_range, spread):
+        self.maze = maze
+        self.sight_range = sight_range
+        self.rays = build_rays(sight_range, spread)
+        self.cache = {}      # (x, y, 朝向) -> frozenset of (x, y)
+        self.dependents = {} # 瓦片下标 -> 视线经过该瓦片的缓存键集合
+
+    def sight(self, x, y, facing):
+        """站在 (x, y)、面朝 facing 的守卫能看到的瓦片 (frozenset)。"""
+        key = (x, y, facing)
+        visible = self.cache.get(key)
+        if visible is None:
+            visible = self.cache[key] = self._cast(x, y, facing, key)
+        return visible
+
+    def _cast(self, x, y, facing, key):
+        """沿预先计算的视线逐条检查遮挡，并登记每条视线检查过的瓦片。"""
+        maze = self.maze
+        cols, rows = maze.cols, maze.rows
+        cells = maze.cells
+        dependents = self.dependents
+        visible = []
+        examined = set()
+        for (target_x, target_y), path in self.rays[facing]:
+            for offset_x, offset_y in path:
+                tile_x, tile_y = x + offset_x, y + offset_y
+                if not (0 <= tile_x < cols and 0 <= tile_y < rows):
+                    break
+                index = tile_y * cols + tile_x
+                examined.add(index)
+                if BLOCKED_TABLE[cells[index]]:
+                    break
+            else:
+                visible.append((x + target_x, y + target_y))
+        for index in examined:
+            keys = dependents.get(index)
+            if keys is None:
+                dependents[index] = {key}
+            else:
+                keys.add(key)
+        return frozenset(visible)
+
+    def on_tile_changed(self, x, y, old_tile, new_tile):
+        """地图监听器：瓦片的阻挡性改变时，丢弃视线经过它的缓存项。"""
+        if BLOCKED_TABLE[old_tile] == BLOCKED_TABLE[new_tile]:
+            return
+        keys = self.dependents.pop(y * self.maze.cols + x, None)
+        if keys:
+            cache = self.cache
+            for key in keys:
+                cache.pop(key, None)